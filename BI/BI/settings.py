@@ -42,13 +42,30 @@ INSTALLED_APPS = [
     'corsheaders',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
-    'drf_yasg',
 
     # my apps
     'userManagement',
     'reportApp',
 ]
 
+# =========================
+# API DOCS
+# =========================
+# swagger/, redoc/ and swagger.json; drf_yasg is not loaded at all when off
+API_DOCS_ENABLED = DEVELOPMENT
+API_SCHEMA_FILE = BASE_DIR / 'openapi.json'  # written by `manage.py export_openapi_schema`
+
+if API_DOCS_ENABLED:
+    INSTALLED_APPS.append('drf_yasg')
+    SWAGGER_SETTINGS = {'SPEC_URL': 'schema-json'}
+    REDOC_SETTINGS = {'SPEC_URL': 'schema-json'}
+
+# =========================
+# STARTUP
+# =========================
+STARTUP_BUDGET_SECONDS = 2.0  # cold start (app ready + URLconf) budget; see `manage.py profile_startup`
+STARTUP_WARM_URLCONF = True  # import views at worker boot instead of on the first request
+
 # =========================
 # MIDDLEWARE
 # =========================
@@ -127,6 +144,64 @@ STATIC_URL = 'static/'
 # =========================
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# =========================
+# CACHE
+# =========================
+# Swap for a shared backend (e.g. Redis) when running several workers
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'bi-default',
+    }
+}
+
+# =========================
+# REPORTS
+# =========================
+REPORTS_CACHE_TIMEOUT = 60 * 60 * 24  # snapshot-derived results are immutable until a reload
+REPORTS_DIFF_PAGE_SIZE = 500
+REPORTS_DIFF_MAX_PAGE_SIZE = 5000
+REPORTS_SCOPE_CACHE_TIMEOUT = 60 * 5  # per-user branch/region scope
+REPORTS_TOP_N_MAX = 100  # accounts per group in top_per_group
+REPORTS_RECENT_MAX_LIMIT = 1000
+REPORTS_CUSTOMER_BATCH_MAX = 100  # customer_no values per customer (360) request
+REPORTS_BATCH_MAX_ACCOUNTS = 1000  # account numbers per batch lookup
+# In-memory (NumPy, memory-mapped) copy of the latest snapshot for stats/facets;
+# rebuilt on every snapshot load or with `manage.py build_columnar_snapshot`
+REPORTS_COLUMNAR_ENGINE = False
+REPORTS_COLUMNAR_DIR = BASE_DIR / 'columnar'
+# Embedded DuckDB over one Parquet file per snapshot for stats/trend/diff;
+# exported on every snapshot load or with `manage.py export_olap_snapshots`
+REPORTS_OLAP_BACKEND = False
+REPORTS_OLAP_DIR = BASE_DIR / 'olap'
+REPORTS_OLAP_POOL_SIZE = 4  # concurrent DuckDB queries per process
+# Loads move the shared snapshot generation row; workers re-read it this often
+REPORTS_SNAPSHOT_GENERATION_TTL = 5  # seconds a worker may serve pre-load cached results after a load
+# Single-flight coalescing of identical stats/cached report computations
+REPORTS_SINGLE_FLIGHT_TIMEOUT = 30  # seconds a caller waits for the shared result (then 503)
+REPORTS_SINGLE_FLIGHT_LEASE = 60 * 2  # cross-worker lease; outlives the slowest report query
+REPORTS_SINGLE_FLIGHT_RESULT_TTL = 10  # seconds a published result stays readable by other workers
+# Cache warming: hot (endpoint, params, scope) entries from the access log are
+# replayed after each load; refused unless CACHES is shared with the web workers
+REPORTS_ACCESS_LOG = True
+REPORTS_ACCESS_LOG_FLUSH_INTERVAL = 60  # seconds between hit-count upserts per process
+REPORTS_RESPONSE_CACHE_MAX_ITEMS = 5000  # larger list responses are not cached
+REPORTS_WARM_ON_LOAD = False
+REPORTS_WARM_TOP_N = 50
+REPORTS_WARM_LOOKBACK_DAYS = 7
+REPORTS_WARM_DB_CONCURRENCY = 2  # warmer threads, each holding one DB connection
+REPORTS_DASHBOARD_MAX_WIDGETS = 20
+REPORTS_DASHBOARD_CONCURRENCY = 4  # widgets resolved at once per dashboard request (one DB connection each)
+# Snapshot events (SSE, ASGI only): loads pg_notify this channel, each worker LISTENs once
+REPORTS_SNAPSHOT_EVENTS_CHANNEL = 'report_snapshots'
+REPORTS_SNAPSHOT_EVENTS_HEARTBEAT = 25  # seconds between keep-alive comments
+REPORTS_SNAPSHOT_EVENTS_MAX_SUBSCRIBERS = 5000  # open streams per worker
+# Saved reports: each web worker runs the scheduler thread; an advisory lock
+# lets one of them precompute the artifacts for the latest snapshot
+REPORTS_SAVED_REPORTS_SCHEDULER = True
+REPORTS_SAVED_REPORTS_POLL_INTERVAL = 60  # seconds between checks for a new snapshot
+REPORTS_SAVED_REPORTS_DIR = BASE_DIR / 'saved_reports'
+
 # =========================
 # REST FRAMEWORK
 # =========================
@@ -138,7 +213,8 @@ if DEVELOPMENT:
 else:
     REST_FRAMEWORK = {
         'DEFAULT_AUTHENTICATION_CLASSES': (
-            'rest_framework_simplejwt.authentication.JWTAuthentication',
+            # Serves role/permission checks from token claims (no auth queries)
+            'userManagement.authentication.ClaimsJWTAuthentication',
         ),
         'DEFAULT_PERMISSION_CLASSES': (
             'rest_framework.permissions.IsAuthenticated',
@@ -155,6 +231,30 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
 }
 
+# =========================
+# TOKEN REVOCATION
+# =========================
+TOKEN_PRUNE_BATCH_SIZE = 5000  # rows per transaction in prune_tokens
+TOKEN_REVOCATION_REFRESH_INTERVAL = 30  # max seconds a worker trusts its revoked-JTI set
+TOKEN_REVOCATION_FULL_RELOAD_INTERVAL = 60 * 5
+PERMISSION_VERSION_TTL = 5  # max seconds a worker trusts token claims after a role/user change
+
+# =========================
+# LOGIN THROTTLING
+# =========================
+# Token buckets checked before any password hashing; None disables a bucket
+LOGIN_THROTTLE_RATES = {
+    'ip': '30/min',
+    'email': '10/min',
+}
+LOGIN_THROTTLE_CACHE = None  # cache alias shared by all workers; None = per-process memory
+
+# =========================
+# USER PROVISIONING
+# =========================
+USER_BULK_MAX_ROWS = 5000
+USER_BULK_HASH_WORKERS = None  # password hashing threads; None = one per CPU
+
 # =========================
 # CORS SETTINGS
 # =========================
@@ -0,0 +1,94 @@
+# BI/startup.py
+"""
+Cold-start measurement for the WSGI/ASGI entry points. Each measurement runs
+in a fresh interpreter with `-X importtime`, so nothing is already imported.
+"""
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+
+ENTRY_POINTS = ('BI.wsgi', 'BI.asgi')
+
+# Runs in the child interpreter: import the entry point (settings, app
+# registry, middleware), then load the URLconf, which is what the first
+# request would otherwise pay for.
+PROBE = """
+import importlib, json, sys, time
+started = time.perf_counter()
+importlib.import_module(sys.argv[1])
+ready = time.perf_counter() - started
+from django.urls import get_resolver
+started = time.perf_counter()
+get_resolver().url_patterns
+urlconf = time.perf_counter() - started
+print(json.dumps({'ready': ready, 'urlconf': urlconf}))
+"""
+
+
+def parse_importtime(output):
+    """
+    Parse `-X importtime` lines into dicts of module, self and cumulative
+    seconds and nesting depth, in import order.
+    """
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        imports.append({
+            'module': name.strip(),
+            'self': int(self_us) / 1e6,
+            'cumulative': int(cumulative_us) / 1e6,
+            'depth': (len(name) - len(name.lstrip())) // 2,
+        })
+    return imports
+
+
+def measure_startup(module='BI.wsgi', python=None):
+    """
+    Cold-start `module` in a subprocess. Returns ready (seconds to import the
+    entry point, including django.setup()), urlconf (seconds to load the
+    URLconf and views), total, and the parsed import timings.
+    """
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', 'BI.settings')
+    env.pop('PYTHONPROFILEIMPORTTIME', None)
+    result = subprocess.run(
+        [python or sys.executable, '-X', 'importtime', '-c', PROBE, module],
+        cwd=str(settings.BASE_DIR), env=env, capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f'Starting {module} failed:\n{result.stderr[-2000:]}')
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['total'] = timings['ready'] + timings['urlconf']
+    timings['module'] = module
+    timings['imports'] = parse_importtime(result.stderr)
+    return timings
+
+
+def package_totals(imports):
+    """Self import time summed per top-level package, largest first."""
+    totals = {}
+    for entry in imports:
+        package = entry['module'].split('.')[0]
+        totals[package] = totals.get(package, 0) + entry['self']
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def warm_up():
+    """
+    Load the URLconf (and with it every view module) at worker boot when
+    STARTUP_WARM_URLCONF is on, so the first request does not pay for it.
+    Under `gunicorn --preload` the loaded modules are shared by all workers.
+    """
+    if getattr(settings, 'STARTUP_WARM_URLCONF', False):
+        from django.urls import get_resolver
+
+        get_resolver().url_patterns
+
+
+def startup_budget():
+    return getattr(settings, 'STARTUP_BUDGET_SECONDS', None)
@@ -1,33 +1,34 @@
 # urls.py (main project)
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 
-schema_view = get_schema_view(
-   openapi.Info(
-      title="BI Project API",
-      default_version='v1',
-      description="Complete BI Project API with User Management and Reporting",
-      terms_of_service="https://www.example.com/terms/",
-      contact=openapi.Contact(email="support@bi-project.com"),
-      license=openapi.License(name="Commercial License"),
-   ),
-   public=True,
-   permission_classes=(permissions.AllowAny,),
-)
+from .apidocs import api_info, schema_file_view
 
 urlpatterns = [
     # Admin
     path('admin/', admin.site.urls),
 
-    # API Documentation
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
-    path('swagger.json', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-
     # API Routes
     path('api/user-management/', include('userManagement.urls')),
     path('api/reports/', include('reportApp.urls')),
 ]
+
+# API Documentation (drf_yasg is only imported when enabled)
+if settings.API_DOCS_ENABLED:
+    from rest_framework import permissions
+    from drf_yasg.views import get_schema_view
+
+    schema_view = get_schema_view(
+       api_info(),
+       public=True,
+       permission_classes=(permissions.AllowAny,),
+    )
+
+    urlpatterns += [
+        # The UI pages load the schema from swagger.json (SWAGGER_SETTINGS['SPEC_URL']),
+        # which serves the file written by `manage.py export_openapi_schema`
+        path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+        path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+        path('swagger.json', schema_file_view(schema_view.without_ui(cache_timeout=0)), name='schema-json'),
+    ]
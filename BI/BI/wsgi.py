@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'BI.settings')
 
 application = get_wsgi_application()
+
+from BI.startup import warm_up  # noqa: E402  (needs configured settings)
+
+warm_up()
+
+from reportApp.scheduler import start_scheduler  # noqa: E402
+
+start_scheduler()
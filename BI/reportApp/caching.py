@@ -0,0 +1,90 @@
+# reportApp/caching.py
+"""
+Snapshot-generation keyed caching of report results.
+
+The generation lives in the SnapshotGeneration row, moved forward by every
+load whichever process runs it, so the web workers notice a load even when
+CACHES is per process. Workers read the row through the cache for
+REPORTS_SNAPSHOT_GENERATION_TTL seconds: for that long after a load a
+worker that read it just before may still serve pre-load results.
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Max
+
+from .coalescing import coalesce
+from .models import AccountBase, SnapshotGeneration
+
+SNAPSHOT_GENERATION_KEY = 'reportApp:snapshot_generation'
+
+
+def generation_ttl():
+    return getattr(settings, 'REPORTS_SNAPSHOT_GENERATION_TTL', 5)
+
+
+def latest_loaded_date():
+    return AccountBase.objects.aggregate(latest=Max('report_date'))['latest']
+
+
+def read_generation():
+    """
+    (version, latest report_date ISO) from the shared row. A missing row is
+    seeded with a timestamp rather than 1, so results cached in a shared
+    cache under an earlier (since deleted) row can never match again.
+    """
+    row = SnapshotGeneration.objects.filter(pk=1).values_list('version', 'latest_report_date').first()
+    if row is None:
+        generation = SnapshotGeneration.objects.get_or_create(
+            pk=1, defaults={'version': int(time.time() * 1000), 'latest_report_date': latest_loaded_date()}
+        )[0]
+        row = generation.version, generation.latest_report_date
+    version, latest = row
+    return [version, latest.isoformat() if latest else None]
+
+
+def snapshot_generation():
+    return cache.get_or_set(SNAPSHOT_GENERATION_KEY, read_generation, generation_ttl())
+
+
+def snapshot_version():
+    """Generation counter bumped whenever account_base snapshots are (re)loaded."""
+    return snapshot_generation()[0]
+
+
+def latest_snapshot_date():
+    """Latest report_date (ISO) as of the current generation."""
+    return snapshot_generation()[1]
+
+
+def invalidate_snapshot_cache():
+    """Orphan every cached snapshot result by moving to a new generation."""
+    updated = SnapshotGeneration.objects.filter(pk=1).update(
+        version=F('version') + 1, latest_report_date=latest_loaded_date()
+    )
+    if not updated:
+        read_generation()
+    cache.delete(SNAPSHOT_GENERATION_KEY)
+
+
+def snapshot_cache_key(namespace, **params):
+    digest = hashlib.md5(
+        json.dumps(params, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return f'reportApp:{namespace}:{snapshot_version()}:{digest}'
+
+
+def cached_snapshot_result(namespace, params, compute):
+    """
+    Return the cached value for (namespace, params), computing it on a miss.
+    Concurrent misses of the same key share a single computation.
+    """
+    key = snapshot_cache_key(namespace, **params)
+    result = cache.get(key)
+    if result is None:
+        result = coalesce(key, compute)
+        cache.set(key, result, getattr(settings, 'REPORTS_CACHE_TIMEOUT', 3600))
+    return result
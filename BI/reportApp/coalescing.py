@@ -0,0 +1,128 @@
+# reportApp/coalescing.py
+"""
+Single-flight execution of identical expensive report queries.
+
+Concurrent callers with the same key share one computation. Inside a
+process the first caller becomes the leader and the others wait on its
+Future. Across workers the leader must also win a lease in the cache
+(cache.add); leaders of other workers then poll for the result the lease
+holder publishes under its lease token instead of running the query again.
+
+A leader's exception is re-raised in every waiting caller: the original
+exception in-process, SingleFlightError with its message in other workers.
+Callers that wait longer than REPORTS_SINGLE_FLIGHT_TIMEOUT get
+SingleFlightTimeout. With a per-process cache backend (LocMemCache) only
+the in-process coalescing applies.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.core.cache import cache
+
+POLL_INTERVAL = 0.05
+MAX_POLL_INTERVAL = 0.5
+
+
+class SingleFlightError(RuntimeError):
+    """The computation failed in another worker."""
+
+
+class SingleFlightTimeout(Exception):
+    """Waiting for another caller's computation took too long."""
+
+
+def wait_timeout():
+    return getattr(settings, 'REPORTS_SINGLE_FLIGHT_TIMEOUT', 30)
+
+
+def lease_timeout():
+    return getattr(settings, 'REPORTS_SINGLE_FLIGHT_LEASE', 120)
+
+
+def result_timeout():
+    return getattr(settings, 'REPORTS_SINGLE_FLIGHT_RESULT_TTL', 10)
+
+
+def result_key(key, token):
+    return f'{key}:result:{token}'
+
+
+def shared_result(key, compute, deadline):
+    """
+    Compute under the cross-worker lease of key, or wait for the worker
+    holding it to publish its outcome. Outcomes are published under the
+    lease's token, so a waiter only ever reads the run it waited for, never
+    the leftover outcome of an earlier one. A lease left behind by a crashed
+    worker expires after REPORTS_SINGLE_FLIGHT_LEASE and is taken over.
+    """
+    lease_key = f'{key}:lease'
+    token = uuid.uuid4().hex
+    holder = None
+    interval = POLL_INTERVAL
+    while True:
+        if cache.add(lease_key, token, lease_timeout()):
+            try:
+                result = compute()
+            except Exception as e:
+                cache.set(result_key(key, token), {'error': f'{type(e).__name__}: {e}'}, result_timeout())
+                raise
+            else:
+                cache.set(result_key(key, token), {'result': result}, result_timeout())
+                return result
+            finally:
+                if cache.get(lease_key) == token:
+                    cache.delete(lease_key)
+
+        # Another worker holds the lease: wait for the outcome of that lease
+        holder = cache.get(lease_key) or holder
+        time.sleep(interval)
+        interval = min(interval * 2, MAX_POLL_INTERVAL)
+        outcome = cache.get(result_key(key, holder)) if holder else None
+        if outcome is not None:
+            if 'error' in outcome:
+                raise SingleFlightError(outcome['error'])
+            return outcome['result']
+        if time.monotonic() >= deadline:
+            raise SingleFlightTimeout(f'Timed out waiting for {key}')
+
+
+class SingleFlight:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def run(self, key, compute):
+        """Return compute() for key, sharing one in-flight computation among concurrent callers."""
+        with self.lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = self.calls[key] = Future()
+
+        if not leader:
+            try:
+                return future.result(timeout=wait_timeout())
+            except FutureTimeout:
+                raise SingleFlightTimeout(f'Timed out waiting for {key}')
+
+        try:
+            result = shared_result(key, compute, time.monotonic() + wait_timeout())
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self.lock:
+                del self.calls[key]
+
+
+flights = SingleFlight()
+
+
+def coalesce(key, compute):
+    return flights.run(key, compute)
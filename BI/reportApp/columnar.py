@@ -0,0 +1,266 @@
+# reportApp/columnar.py
+"""
+Optional in-process columnar copy of the latest account_base snapshot.
+
+A build writes one .npy file per column plus meta.json into a fresh
+generation directory under REPORTS_COLUMNAR_DIR and then atomically
+replaces the CURRENT pointer file. Workers memory-map the columns, so every
+process on the host shares one copy through the page cache, and pick up a
+new generation on their next request after the pointer moves.
+
+Columns: the rollup dimensions as int32 dictionary codes, working_balance
+as int64 cents (0 where NULL) with a boolean NULL mask, and opening_date as
+int32 days since 1970-01-01.
+"""
+import datetime
+import json
+import os
+import shutil
+import threading
+import uuid
+from array import array
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max
+
+from .models import AccountBase
+from .rollups import ROLLUP_DIMENSIONS
+from .scoping import UNRESTRICTED
+
+CATEGORICAL_COLUMNS = ROLLUP_DIMENSIONS
+POINTER_FILE = 'CURRENT'
+NULL_DAY = -2 ** 31
+KEEP_GENERATIONS = 2
+
+# bincount sums in float64; balances are split at 2**26 cents so each
+# partial sum stays below 2**53 and is exact for up to 2**27 rows
+SPLIT = 1 << 26
+
+
+def engine_enabled():
+    return getattr(settings, 'REPORTS_COLUMNAR_ENGINE', False)
+
+
+def storage_dir():
+    return str(getattr(settings, 'REPORTS_COLUMNAR_DIR', settings.BASE_DIR / 'columnar'))
+
+
+def import_numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError('The columnar engine requires numpy (pip install numpy)')
+    return numpy
+
+
+def build_snapshot(report_date=None, chunk_size=20000):
+    """
+    Encode one snapshot (the latest by default) into a new generation and
+    publish it. Returns (report_date, row_count), or (None, 0) when
+    account_base is empty.
+    """
+    np = import_numpy()
+    report_date = report_date or AccountBase.objects.aggregate(latest=Max('report_date'))['latest']
+    if report_date is None:
+        return None, 0
+
+    dictionaries = {column: {} for column in CATEGORICAL_COLUMNS}
+    codes = {column: array('i') for column in CATEGORICAL_COLUMNS}
+    balance_cents = array('q')
+    balance_nulls = array('b')
+    opening_days = array('i')
+
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(
+            f"SELECT {', '.join(CATEGORICAL_COLUMNS)},"
+            f" COALESCE(ROUND(working_balance * 100), 0)::bigint, working_balance IS NULL,"
+            f" COALESCE(opening_date - DATE '1970-01-01', %s)"
+            f" FROM {AccountBase._meta.db_table} WHERE report_date = %s",
+            [NULL_DAY, report_date]
+        )
+        width = len(CATEGORICAL_COLUMNS)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            for row in rows:
+                for index, column in enumerate(CATEGORICAL_COLUMNS):
+                    values = dictionaries[column]
+                    codes[column].append(values.setdefault(row[index], len(values)))
+                balance_cents.append(row[width])
+                balance_nulls.append(row[width + 1])
+                opening_days.append(row[width + 2])
+
+    generation = f"{report_date:%Y%m%d}-{uuid.uuid4().hex[:8]}"
+    root = storage_dir()
+    path = os.path.join(root, generation)
+    os.makedirs(path)
+    for column in CATEGORICAL_COLUMNS:
+        np.save(os.path.join(path, f'{column}.npy'), np.frombuffer(codes[column], dtype=np.int32))
+    np.save(os.path.join(path, 'working_balance.npy'), np.frombuffer(balance_cents, dtype=np.int64))
+    np.save(os.path.join(path, 'working_balance_null.npy'), np.frombuffer(balance_nulls, dtype=np.int8).astype(bool))
+    np.save(os.path.join(path, 'opening_date.npy'), np.frombuffer(opening_days, dtype=np.int32))
+    with open(os.path.join(path, 'meta.json'), 'w') as handle:
+        json.dump({
+            'report_date': report_date.isoformat(),
+            'row_count': len(balance_cents),
+            'dictionaries': {column: list(values) for column, values in dictionaries.items()},
+        }, handle)
+
+    pointer = os.path.join(root, POINTER_FILE)
+    with open(f'{pointer}.tmp', 'w') as handle:
+        handle.write(generation)
+    os.replace(f'{pointer}.tmp', pointer)
+    prune_generations(root, generation)
+    return report_date, len(balance_cents)
+
+
+def prune_generations(root, current):
+    """Drop old generations; mapped files stay readable for workers still using them."""
+    generations = sorted(
+        (name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name)) and name != current),
+        key=lambda name: os.path.getmtime(os.path.join(root, name)),
+        reverse=True
+    )
+    for name in generations[KEEP_GENERATIONS - 1:]:
+        shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def exact_group_sums(np, codes, cents, size):
+    high, low = np.divmod(cents, SPLIT)
+    high_sums = np.bincount(codes, weights=high, minlength=size)
+    low_sums = np.bincount(codes, weights=low, minlength=size)
+    return [int(h) * SPLIT + int(l) for h, l in zip(high_sums, low_sums)]
+
+
+def to_amount(cents):
+    return Decimal(cents).scaleb(-2)
+
+
+class ColumnarSnapshot:
+    """Memory-mapped columns of one generation, answering aggregate queries with masks and bincount."""
+
+    def __init__(self, path):
+        self.np = import_numpy()
+        with open(os.path.join(path, 'meta.json')) as handle:
+            meta = json.load(handle)
+        self.report_date = datetime.date.fromisoformat(meta['report_date'])
+        self.row_count = meta['row_count']
+        self.dictionaries = meta['dictionaries']
+        self.lookup = {
+            column: {value: code for code, value in enumerate(values)}
+            for column, values in self.dictionaries.items()
+        }
+        load = lambda name: self.np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+        self.codes = {column: load(column) for column in CATEGORICAL_COLUMNS}
+        self.balance_cents = load('working_balance')
+        self.balance_nulls = load('working_balance_null')
+        self.opening_days = load('opening_date')
+
+    def mask(self, filters=None, scope=UNRESTRICTED, exclude=None):
+        """Boolean row mask for equality filters on categorical columns and the user scope."""
+        mask = self.np.ones(self.row_count, dtype=bool)
+        for column, value in (filters or {}).items():
+            if column == exclude:
+                continue
+            code = self.lookup[column].get(value)
+            if code is None:
+                return self.np.zeros(self.row_count, dtype=bool)
+            mask &= self.codes[column] == code
+        if not scope.unrestricted:
+            allowed = [self.lookup[scope.field][v] for v in scope.values if v in self.lookup[scope.field]]
+            mask &= self.np.isin(self.codes[scope.field], allowed)
+        return mask
+
+    def total(self, mask):
+        """(account_count, total_balance Decimal); the int64 cent sum is exact."""
+        return int(mask.sum()), to_amount(int(self.balance_cents[mask].sum()))
+
+    def group_by(self, column, mask):
+        """
+        [(value, account_count, total_balance Decimal)] for values present
+        under mask. Like SUM, total_balance is None for a group whose
+        balances are all NULL.
+        """
+        size = len(self.dictionaries[column])
+        codes = self.codes[column][mask]
+        counts = self.np.bincount(codes, minlength=size)
+        non_null_counts = self.np.bincount(codes[~self.balance_nulls[mask]], minlength=size)
+        sums = exact_group_sums(self.np, codes, self.balance_cents[mask], size)
+        values = self.dictionaries[column]
+        return [
+            (values[code], int(counts[code]), to_amount(sums[code]) if non_null_counts[code] else None)
+            for code in range(size) if counts[code]
+        ]
+
+    def stats(self, filters=None, scope=UNRESTRICTED):
+        """Same payload as AccountBaseViewSet.stats for this snapshot."""
+        mask = self.mask(filters, scope)
+        total_accounts, total_balance = self.total(mask)
+
+        def grouped(column):
+            # ORDER BY total_balance DESC (NULLs first, as in PostgreSQL), column ASC (NULLs last)
+            groups = sorted(self.group_by(column, mask), key=lambda group: (
+                group[2] is not None, -(group[2] or 0), group[0] is None, group[0] or ''
+            ))
+            return [{column: value, 'count': count, 'total_balance': balance} for value, count, balance in groups]
+
+        return {
+            'total_accounts': total_accounts,
+            'total_balance': float(total_balance),
+            'by_branch': grouped('branch_name'),
+            'by_product': grouped('product_name'),
+        }
+
+    def facets(self, filters=None, scope=UNRESTRICTED):
+        """Same payload as facets.facet_counts for this snapshot."""
+        facets = {}
+        for column in CATEGORICAL_COLUMNS:
+            values = [
+                {'value': value, 'count': count, 'total_balance': float(balance or 0)}
+                for value, count, balance in self.group_by(column, self.mask(filters, scope, exclude=column))
+            ]
+            values.sort(key=lambda item: (-item['count'], item['value'] is None, item['value'] or ''))
+            facets[column] = values
+        return {'report_date': self.report_date, 'facets': facets}
+
+
+class ColumnarEngine:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = None
+        self.snapshot = None
+
+    def current(self):
+        """The published snapshot, reloaded when CURRENT points at a new generation."""
+        root = storage_dir()
+        try:
+            with open(os.path.join(root, POINTER_FILE)) as handle:
+                generation = handle.read().strip()
+        except FileNotFoundError:
+            return None
+        if generation != self.generation:
+            with self.lock:
+                if generation != self.generation:
+                    try:
+                        self.snapshot = ColumnarSnapshot(os.path.join(root, generation))
+                    except FileNotFoundError:
+                        # Built before the NULL balance mask existed: PostgreSQL answers until the next build
+                        return None
+                    self.generation = generation
+        return self.snapshot
+
+
+engine = ColumnarEngine()
+
+
+def snapshot_for(report_date):
+    """The in-memory snapshot when the engine is enabled and holds report_date, else None."""
+    if not engine_enabled() or report_date is None:
+        return None
+    snapshot = engine.current()
+    if snapshot is not None and snapshot.report_date == report_date:
+        return snapshot
+    return None
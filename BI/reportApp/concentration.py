@@ -0,0 +1,66 @@
+# reportApp/concentration.py
+from django.db import connection
+
+# Top-k customer shares reported when the request does not ask for specific ones
+DEFAULT_TOP = [10, 100]
+MAX_TOP = 10000
+
+
+def concentration_metrics(queryset, group_by=None, top=DEFAULT_TOP):
+    """
+    Deposit concentration of queryset (already narrowed to one snapshot, the
+    list filters and the user's scope), overall or per group_by value.
+
+    Accounts are summed per customer_no in the database; customers without a
+    customer_no or with a net balance <= 0 are left out. Over the remaining
+    customer totals x (n customers) each group reports:
+      - top_shares: share of the group total held by its k largest customers
+      - hhi: Herfindahl index, sum of squared shares (1/n to 1)
+      - gini: 2 * sum(i * x_i) / (n * sum(x)) - (n + 1) / n with x ascending
+    Ranking and all metrics run in the same statement, so only one row per
+    group leaves PostgreSQL.
+    """
+    columns = [group_by, 'customer_no', 'working_balance'] if group_by else ['customer_no', 'working_balance']
+    rows_sql, params = queryset.order_by().values(*columns).query.sql_with_params()
+    group = group_by or 'NULL::text'
+    top_shares = ', '.join('SUM(balance) FILTER (WHERE rank <= %s) / MAX(total)' for _ in top)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            WITH customers AS (
+                SELECT {group} AS grp, customer_no, SUM(working_balance) AS balance
+                FROM ({rows_sql}) r
+                WHERE customer_no IS NOT NULL
+                GROUP BY 1, 2
+                HAVING SUM(working_balance) > 0
+            ),
+            ranked AS (
+                SELECT grp, balance,
+                       ROW_NUMBER() OVER (PARTITION BY grp ORDER BY balance DESC, customer_no) AS rank,
+                       COUNT(*) OVER (PARTITION BY grp) AS n,
+                       SUM(balance) OVER (PARTITION BY grp) AS total
+                FROM customers
+            )
+            SELECT grp,
+                   MAX(n),
+                   MAX(total),
+                   SUM((balance / total) ^ 2),
+                   2 * SUM((n - rank + 1) * balance) / (MAX(n) * MAX(total)) - (MAX(n) + 1)::numeric / MAX(n),
+                   {top_shares}
+            FROM ranked
+            GROUP BY grp
+            ORDER BY grp NULLS LAST
+        """, [*params, *top])
+        rows = cursor.fetchall()
+
+    return [
+        {
+            'group': value,
+            'customer_count': customer_count,
+            'total_balance': float(total),
+            'top_shares': {str(k): float(share) for k, share in zip(top, shares)},
+            'hhi': float(hhi),
+            'gini': float(gini),
+        }
+        for value, customer_count, total, hhi, gini, *shares in rows
+    ]
@@ -0,0 +1,46 @@
+# reportApp/customers.py
+from decimal import Decimal
+
+from .serializers import AccountBaseSummarySerializer
+
+
+def totals(accounts, keys):
+    """Account count and balance per distinct combination of keys, largest balance first."""
+    grouped = {}
+    for account in accounts:
+        key = tuple(getattr(account, name) for name in keys)
+        entry = grouped.setdefault(key, {'account_count': 0, 'total_balance': Decimal('0')})
+        entry['account_count'] += 1
+        entry['total_balance'] += account.working_balance or 0
+    return [
+        dict(zip(keys, key), account_count=entry['account_count'], total_balance=float(entry['total_balance']))
+        for key, entry in sorted(grouped.items(), key=lambda item: item[1]['total_balance'], reverse=True)
+    ]
+
+
+def customer_profiles(queryset, customer_nos):
+    """
+    360 view of each customer_no: its accounts in queryset (already narrowed
+    to one snapshot and the user's scope), balances per currency and per
+    product/currency, and the earliest opening_date. All customers are read
+    with one customer_no = ANY(...) query; results follow the request order.
+    """
+    accounts_by_customer = {customer_no: [] for customer_no in customer_nos}
+    for account in queryset.filter(customer_no__in=customer_nos).order_by('customer_no', 'account_number'):
+        accounts_by_customer[account.customer_no].append(account)
+
+    profiles = []
+    for customer_no in customer_nos:
+        accounts = accounts_by_customer[customer_no]
+        opening_dates = [account.opening_date for account in accounts if account.opening_date]
+        profiles.append({
+            'customer_no': customer_no,
+            'found': bool(accounts),
+            'customer_name': next((a.customer_name for a in accounts if a.customer_name), None),
+            'account_count': len(accounts),
+            'earliest_opening_date': min(opening_dates) if opening_dates else None,
+            'totals_by_currency': totals(accounts, ['currency']),
+            'totals_by_product': totals(accounts, ['product_name', 'currency']),
+            'accounts': AccountBaseSummarySerializer(accounts, many=True).data,
+        })
+    return profiles
@@ -0,0 +1,105 @@
+# reportApp/dashboard.py
+"""
+In-process dispatch of AccountBaseViewSet GET actions.
+
+The dashboard endpoint resolves many named widgets (stats, list,
+high_balance, ...) in one request: the caller is authenticated once, its
+scope is resolved once and shared by every widget, and each widget only
+re-runs the permission classes of its own action against the already
+authenticated user. Widgets run concurrently on a thread pool of at most
+REPORTS_DASHBOARD_CONCURRENCY threads (one DB connection each); a failing
+widget reports its own status and error without failing the others.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpRequest, QueryDict
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+from .coalescing import SingleFlightTimeout
+
+logger = logging.getLogger(__name__)
+
+# GET actions returning JSON; streaming (export, diff) and detail routes are left out
+DASHBOARD_ACTIONS = [
+    'list', 'stats', 'trend', 'distribution', 'concentration', 'facets', 'by_branch',
+    'high_balance', 'top_per_group', 'customer', 'search_customer', 'recent_accounts',
+    'permissions', 'health_check',
+]
+
+
+def query_pairs(params):
+    """(name, [values]) pairs of a widget's JSON params (lists repeat the parameter)."""
+    def as_text(value):
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        return str(value)
+
+    return [
+        (name, [as_text(v) for v in value] if isinstance(value, list) else [as_text(value)])
+        for name, value in sorted(params.items())
+    ]
+
+
+def run_action(action, query, scope, user=None, auth=None, warming=False):
+    """
+    Run one GET action on a synthetic request carrying query ((name, [values])
+    pairs) and the already resolved scope. With a user, the action's
+    permission classes are checked against it exactly as for a real request
+    (APIExceptions propagate); without one (cache warming) they are skipped.
+    """
+    from .views import AccountBaseViewSet
+
+    http_request = HttpRequest()
+    http_request.method = 'GET'
+    http_request.GET = QueryDict(urlencode([(name, value) for name, values in query for value in values]))
+    request = Request(http_request)
+    viewset = AccountBaseViewSet(
+        action=action, request=request, args=(), kwargs={}, format_kwarg=None, headers={}
+    )
+    viewset.warming = warming
+    viewset._scope = scope
+    if user is not None:
+        request.user, request.auth = user, auth
+        viewset.initial(request)
+    return getattr(viewset, action)(request)
+
+
+def resolve_widget(widget, scope, user, auth):
+    try:
+        response = run_action(widget['action'], query_pairs(widget['params']), scope, user=user, auth=auth)
+    except APIException as e:
+        return {'status': e.status_code, 'error': str(e.detail)}
+    except SingleFlightTimeout:
+        return {'status': 503, 'error': 'An identical report is still being computed; please retry shortly'}
+    except Exception:
+        logger.exception('Dashboard widget %s (%s) failed', widget['name'], widget['action'])
+        return {'status': 500, 'error': 'Internal error'}
+
+    if response.status_code >= 400:
+        data = response.data
+        error = data.get('error', data) if isinstance(data, dict) else data
+        return {'status': response.status_code, 'error': error}
+    return {'status': response.status_code, 'data': response.data}
+
+
+def resolve_widgets(widgets, scope, user, auth):
+    """Results of the validated widgets keyed by name, in request order."""
+    def resolve(widget):
+        try:
+            return resolve_widget(widget, scope, user, auth)
+        finally:
+            # Pool threads must not keep their connections open after the request
+            connection.close()
+
+    if len(widgets) == 1:
+        return {widgets[0]['name']: resolve_widget(widgets[0], scope, user, auth)}
+
+    workers = min(len(widgets), getattr(settings, 'REPORTS_DASHBOARD_CONCURRENCY', 4))
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='report-dashboard') as pool:
+        results = list(pool.map(resolve, widgets))
+    return {widget['name']: result for widget, result in zip(widgets, results)}
@@ -0,0 +1,80 @@
+# reportApp/distribution.py
+from django.db import connection
+
+# Percentiles reported when the request does not ask for specific ones
+DEFAULT_PERCENTILES = [1, 5, 10, 25, 50, 75, 90, 95, 99]
+
+# Positive balances are bucketed on a log10 scale between 1 and 10**MAX_DECADE
+MAX_DECADE = 12
+MAX_BUCKETS_PER_DECADE = 10
+
+
+def bucket_edges(per_decade=1):
+    """
+    Lower edges of the positive-balance buckets. Bucket i covers
+    [edges[i], edges[i + 1]); the first is (0, 1) and the last is open ended.
+    """
+    return [0] + [round(10 ** (step / per_decade), 2) for step in range(MAX_DECADE * per_decade + 1)]
+
+
+def balance_distribution(queryset, group_by=None, percentiles=DEFAULT_PERCENTILES, per_decade=1):
+    """
+    working_balance distribution of queryset (already narrowed to one
+    snapshot, the list filters and the user's scope), overall or per
+    group_by value: null, zero and negative counts, min/max/total,
+    percentile_cont percentiles and width_bucket counts of the positive
+    balances on the bucket_edges scale. Two grouped statements over the
+    filtered rows; groups come back ordered by value, NULL last.
+    """
+    columns = [group_by, 'working_balance'] if group_by else ['working_balance']
+    rows_sql, params = queryset.order_by().values(*columns).query.sql_with_params()
+    group = group_by or 'NULL::text'
+    steps = MAX_DECADE * per_decade
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT {group},
+                   COUNT(*),
+                   COUNT(*) FILTER (WHERE working_balance IS NULL),
+                   COUNT(*) FILTER (WHERE working_balance = 0),
+                   COUNT(*) FILTER (WHERE working_balance < 0),
+                   MIN(working_balance),
+                   MAX(working_balance),
+                   SUM(working_balance),
+                   percentile_cont(%s::float8[]) WITHIN GROUP (ORDER BY working_balance)
+            FROM ({rows_sql}) r
+            GROUP BY 1
+            ORDER BY 1 NULLS LAST
+        """, [[p / 100 for p in percentiles], *params])
+        summaries = cursor.fetchall()
+
+        cursor.execute(f"""
+            SELECT {group}, width_bucket(log(working_balance), 0, %s, %s), COUNT(*)
+            FROM ({rows_sql}) r
+            WHERE working_balance > 0
+            GROUP BY 1, 2
+        """, [MAX_DECADE, steps, *params])
+        buckets = {}
+        for value, bucket, count in cursor.fetchall():
+            buckets.setdefault(value, [0] * (steps + 2))[bucket] = count
+
+    as_float = lambda amount: float(amount) if amount is not None else None
+    groups = []
+    for value, count, null_count, zero_count, negative_count, low, high, total, quantiles in summaries:
+        groups.append({
+            'group': value,
+            'count': count,
+            'null_count': null_count,
+            'zero_count': zero_count,
+            'negative_count': negative_count,
+            'min': as_float(low),
+            'max': as_float(high),
+            'total_balance': float(total or 0),
+            'percentiles': quantiles or [None] * len(percentiles),
+            'buckets': buckets.get(value, [0] * (steps + 2)),
+        })
+    return {
+        'percentiles': percentiles,
+        'bucket_edges': bucket_edges(per_decade),
+        'groups': groups,
+    }
@@ -0,0 +1,56 @@
+# reportApp/facets.py
+from django.db import connection
+from django.db.models import Max
+
+from .models import AccountBaseRollup
+from .rollups import ROLLUP_DIMENSIONS
+from .scoping import UNRESTRICTED
+
+
+def latest_rollup_date():
+    return AccountBaseRollup.objects.aggregate(latest=Max('report_date'))['latest']
+
+
+def facet_counts(report_date=None, filters=None, scope=UNRESTRICTED):
+    """
+    Distinct values with account counts and balances for every rollup
+    dimension of one snapshot (the latest rolled-up one by default).
+
+    Each dimension is counted under all active filters except its own, so a
+    selected value does not hide its alternatives. The per-dimension groups
+    run as one UNION ALL statement over account_base_rollup.
+    """
+    filters = filters or {}
+    report_date = report_date or latest_rollup_date()
+    facets = {dimension: [] for dimension in ROLLUP_DIMENSIONS}
+    if report_date is None:
+        return {'report_date': None, 'facets': facets}
+
+    table = AccountBaseRollup._meta.db_table
+    scope_sql, scope_params = scope.sql()
+    parts = []
+    params = []
+    for dimension in ROLLUP_DIMENSIONS:
+        other_filters = [(field, value) for field, value in filters.items() if field != dimension]
+        filter_sql = ''.join(f" AND {field} = %s" for field, _ in other_filters)
+        parts.append(
+            f"SELECT %s AS dimension, {dimension}::text AS value,"
+            f" SUM(account_count) AS account_count, SUM(total_balance) AS total_balance"
+            f" FROM {table} WHERE report_date = %s{scope_sql}{filter_sql}"
+            f" GROUP BY {dimension}"
+        )
+        params += [dimension, report_date] + scope_params + [value for _, value in other_filters]
+
+    with connection.cursor() as cursor:
+        cursor.execute(' UNION ALL '.join(parts), params)
+        rows = cursor.fetchall()
+
+    for dimension, value, account_count, total_balance in rows:
+        facets[dimension].append({
+            'value': value,
+            'count': account_count,
+            'total_balance': float(total_balance or 0),
+        })
+    for values in facets.values():
+        values.sort(key=lambda item: (-item['count'], item['value'] is None, item['value'] or ''))
+    return {'report_date': report_date, 'facets': facets}
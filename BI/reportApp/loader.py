@@ -0,0 +1,267 @@
+# reportApp/loader.py
+import csv
+import io
+
+from django.db import connection, transaction
+
+from .models import AccountBase
+from .partitions import is_partitioned, ensure_partitions, partition_name
+from .signals import snapshot_loaded
+
+# Session-local (TEMP), so concurrent loads never share or drop each other's staging rows
+STAGING_TABLE = 'pg_temp.account_base_staging'
+
+# Finite decimal literals; mirrors what SafeDecimalField accepts
+BALANCE_PATTERN = r'^[-+]?([0-9]+(\.[0-9]*)?|\.[0-9]+)([eE][-+]?[0-9]{1,3})?$'
+# working_balance is numeric(15,2): rounded magnitudes from here on would overflow it
+BALANCE_LIMIT = '1e13'
+
+# Normalization runs inside PostgreSQL so raw extract bytes go straight to
+# COPY without a Python round trip per row. Like SafeDecimalField, blank,
+# malformed, non-finite or out-of-range balances become 0.00. Dates accept ISO
+# (YYYY-MM-DD, optionally followed by a time) and T24 (YYYYMMDD) forms;
+# anything else, including impossible calendar dates, becomes NULL.
+NORMALIZE_FUNCTIONS = f"""
+CREATE OR REPLACE FUNCTION pg_temp.load_balance(value text) RETURNS numeric
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE
+        WHEN btrim(value) !~ '{BALANCE_PATTERN}' THEN 0.00
+        ELSE (SELECT CASE WHEN abs(v) < {BALANCE_LIMIT} THEN v ELSE 0.00 END
+              FROM (SELECT round(btrim(value)::numeric, 2) AS v) AS r)
+    END
+$$;
+
+CREATE OR REPLACE FUNCTION pg_temp.load_date(value text) RETURNS date
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE
+        WHEN NOT (btrim(value) ~ '^[0-9]{{8}}$' OR btrim(value) ~ '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}') THEN NULL
+        WHEN substr(translate(btrim(value), '-', ''), 1, 4)::int < 1
+          OR substr(translate(btrim(value), '-', ''), 5, 2)::int NOT BETWEEN 1 AND 12
+          OR substr(translate(btrim(value), '-', ''), 7, 2)::int < 1 THEN NULL
+        WHEN substr(translate(btrim(value), '-', ''), 7, 2)::int > EXTRACT(DAY FROM make_date(
+                substr(translate(btrim(value), '-', ''), 1, 4)::int,
+                substr(translate(btrim(value), '-', ''), 5, 2)::int, 1) + INTERVAL '1 month - 1 day') THEN NULL
+        ELSE make_date(
+            substr(translate(btrim(value), '-', ''), 1, 4)::int,
+            substr(translate(btrim(value), '-', ''), 5, 2)::int,
+            substr(translate(btrim(value), '-', ''), 7, 2)::int)
+    END
+$$;
+
+CREATE OR REPLACE FUNCTION pg_temp.load_time(value text) RETURNS time
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT CASE
+        WHEN btrim(value) ~ '^([01]?[0-9]|2[0-3]):[0-5][0-9](:[0-5][0-9](\\.[0-9]{{1,6}})?)?$'
+        THEN btrim(value)::time
+    END
+$$;
+"""
+
+# Per-row normalization for high-cardinality columns
+NORMALIZERS = {
+    'working_balance': 'pg_temp.load_balance({})',
+}
+
+# Dates and times repeat heavily within a snapshot, so only their distinct
+# raw values are parsed and the result is joined back onto the staging rows
+LOOKUP_NORMALIZERS = {
+    'opening_date': 'pg_temp.load_date',
+    'report_date': 'pg_temp.load_date',
+    'report_time': 'pg_temp.load_time',
+}
+
+
+def quote_name(name):
+    return connection.ops.quote_name(name)
+
+
+def read_csv_header(path):
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        return [name.strip().lower() for name in next(csv.reader(handle))]
+
+
+class ParquetCsvStream(io.RawIOBase):
+    """Re-encode a Parquet extract batch by batch as CSV for COPY."""
+
+    def __init__(self, path, batch_size=65536):
+        try:
+            import pyarrow.csv as pa_csv
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError('Loading Parquet extracts requires pyarrow (pip install pyarrow)')
+
+        self.pa_csv = pa_csv
+        parquet_file = pq.ParquetFile(path)
+        self.header = [name.strip().lower() for name in parquet_file.schema_arrow.names]
+        self.batches = parquet_file.iter_batches(batch_size=batch_size)
+        self.buffer = b''
+        self.exhausted = False
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        while not self.exhausted and (size < 0 or len(self.buffer) < size):
+            batch = next(self.batches, None)
+            if batch is None:
+                self.exhausted = True
+                break
+            sink = io.BytesIO()
+            self.pa_csv.write_csv(
+                batch, sink, write_options=self.pa_csv.WriteOptions(include_header=False)
+            )
+            self.buffer += sink.getvalue()
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def readinto(self, target):
+        data = self.read(len(target))
+        target[:len(data)] = data
+        return len(data)
+
+
+def open_extract(path):
+    """Return (header, binary stream, COPY options) for a CSV or Parquet extract."""
+    if str(path).lower().endswith('.parquet'):
+        stream = ParquetCsvStream(path)
+        return stream.header, stream, 'FORMAT csv'
+    # A UTF-8 BOM only affects the header line, which COPY skips
+    return read_csv_header(path), open(path, 'rb'), 'FORMAT csv, HEADER true'
+
+
+def copy_into_staging(cursor, stream, header, options):
+    columns = ', '.join(quote_name(name) for name in header)
+    sql = f"COPY {STAGING_TABLE} ({columns}) FROM STDIN WITH ({options})"
+    raw_cursor = cursor.cursor
+    if hasattr(raw_cursor, 'copy_expert'):  # psycopg2
+        raw_cursor.copy_expert(sql, stream, size=1 << 20)
+    else:  # psycopg 3
+        with raw_cursor.copy(sql) as copy:
+            while True:
+                data = stream.read(1 << 20)
+                if not data:
+                    break
+                copy.write(data)
+
+
+def column_expression(column, header):
+    """SQL producing the normalized account_base value of a column from staging."""
+    if column not in header:
+        return 'NULL'
+    source = f"s.{quote_name(column)}"
+    if column in LOOKUP_NORMALIZERS:
+        return f"{column}_lookup.value"
+    if column in NORMALIZERS:
+        return NORMALIZERS[column].format(source)
+    return f"NULLIF(BTRIM({source}), '')"
+
+
+def lookup_join(column):
+    source = quote_name(column)
+    return (
+        f"LEFT JOIN (SELECT raw, {LOOKUP_NORMALIZERS[column]}(raw) AS value"
+        f" FROM (SELECT DISTINCT {source} AS raw FROM {STAGING_TABLE}) AS d) AS {column}_lookup"
+        f" ON {column}_lookup.raw = s.{source}"
+    )
+
+
+def load_snapshot(path, report_date=None, send_signal=True):
+    """
+    Stream an extract into a TEMP all-text staging table with COPY,
+    normalize it in SQL and replace the affected report_date snapshots of
+    account_base in one transaction. Returns a dict of load statistics.
+    On a partitioned account_base the day partitions are created on demand
+    and truncated instead of deleted from.
+    """
+    header, stream, copy_options = open_extract(path)
+    if 'account_number' not in header:
+        stream.close()
+        raise ValueError('Extract is missing the account_number column')
+
+    table = AccountBase._meta.db_table
+    columns = [field.column for field in AccountBase._meta.concrete_fields]
+    expressions = [column_expression(column, header) for column in columns]
+    lookups = [column for column in LOOKUP_NORMALIZERS if column in header]
+    params = []
+    if report_date is not None:
+        expressions[columns.index('report_date')] = '%s::date'
+        params.append(report_date)
+        lookups = [column for column in lookups if column != 'report_date']
+    joins = ' '.join(lookup_join(column) for column in lookups)
+    has_account = "NULLIF(BTRIM(s.account_number), '') IS NOT NULL"
+    if 'working_balance' in header:
+        invalid_balance = (
+            "NULLIF(BTRIM(s.working_balance), '') IS NOT NULL"
+            " AND CASE WHEN BTRIM(s.working_balance) !~ %s THEN TRUE"
+            " ELSE abs(round(BTRIM(s.working_balance)::numeric, 2)) >= %s::numeric END"
+        )
+        invalid_params = [BALANCE_PATTERN, BALANCE_LIMIT]
+    else:
+        invalid_balance, invalid_params = 'FALSE', []
+
+    with connection.cursor() as cursor:
+        cursor.execute(NORMALIZE_FUNCTIONS)
+        cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+        cursor.execute(
+            f"CREATE TEMP TABLE {STAGING_TABLE} ("
+            + ', '.join(f"{quote_name(name)} text" for name in header)
+            + ")"
+        )
+        try:
+            with stream:
+                copy_into_staging(cursor, stream, header, copy_options)
+
+            cursor.execute(
+                f"""
+                SELECT COUNT(*) FILTER (WHERE {has_account}),
+                       COUNT(*) FILTER (WHERE NOT {has_account}),
+                       COUNT(*) FILTER (WHERE {invalid_balance})
+                FROM {STAGING_TABLE} AS s
+                """,
+                invalid_params
+            )
+            row_count, skipped_rows, invalid_balances = cursor.fetchone()
+
+            if report_date is not None:
+                report_dates = [report_date]
+            elif 'report_date' in header:
+                cursor.execute(
+                    f"SELECT DISTINCT pg_temp.load_date(raw) FROM"
+                    f" (SELECT DISTINCT report_date AS raw FROM {STAGING_TABLE}) AS d"
+                )
+                report_dates = sorted(row[0] for row in cursor.fetchall() if row[0] is not None)
+            else:
+                report_dates = []
+
+            partitioned = is_partitioned()
+            if partitioned and report_dates:
+                ensure_partitions(report_dates)
+
+            with transaction.atomic():
+                if partitioned:
+                    # Emptying whole daily partitions is far cheaper than DELETE
+                    for loaded_date in report_dates:
+                        cursor.execute(f"TRUNCATE {partition_name(loaded_date)}")
+                elif report_dates:
+                    cursor.execute(
+                        f"DELETE FROM {table} WHERE report_date = ANY(%s)", [report_dates]
+                    )
+                cursor.execute(
+                    f"INSERT INTO {table} ({', '.join(columns)}) "
+                    f"SELECT {', '.join(expressions)} FROM {STAGING_TABLE} AS s {joins} "
+                    f"WHERE {has_account}",
+                    params
+                )
+        finally:
+            cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+
+    if send_signal:
+        snapshot_loaded.send(sender=AccountBase, report_dates=report_dates, row_count=row_count)
+    return {
+        'row_count': row_count,
+        'skipped_rows': skipped_rows,
+        'invalid_balances': invalid_balances,
+        'report_dates': report_dates,
+    }
@@ -0,0 +1,32 @@
+# reportApp/management/commands/build_columnar_snapshot.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from reportApp.columnar import build_snapshot, storage_dir
+
+
+class Command(BaseCommand):
+    help = 'Encode the latest account_base snapshot into the memory-mapped columnar engine files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Encode this report_date instead of the latest (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        report_date = None
+        if options['date']:
+            report_date = parse_date(options['date'])
+            if report_date is None:
+                raise CommandError('--date must be in YYYY-MM-DD format')
+
+        started = time.perf_counter()
+        try:
+            report_date, rows = build_snapshot(report_date)
+        except ImportError as e:
+            raise CommandError(str(e))
+        if report_date is None:
+            raise CommandError('account_base has no snapshots')
+        self.stdout.write(self.style.SUCCESS(
+            f'Encoded {rows} rows of {report_date} into {storage_dir()} in {time.perf_counter() - started:.2f}s'
+        ))
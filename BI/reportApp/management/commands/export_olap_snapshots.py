@@ -0,0 +1,33 @@
+# reportApp/management/commands/export_olap_snapshots.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from reportApp.olap import export_snapshots, storage_dir
+
+
+class Command(BaseCommand):
+    help = 'Export account_base snapshots to the Parquet files read by the DuckDB OLAP backend'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', action='append', dest='dates', help='Export a specific report_date (YYYY-MM-DD); repeatable')
+        parser.add_argument('--full', action='store_true', help='Re-export every snapshot')
+
+    def handle(self, *args, **options):
+        dates = None
+        if options['dates']:
+            dates = [parse_date(value) for value in options['dates']]
+            if None in dates:
+                raise CommandError('--date must be in YYYY-MM-DD format')
+
+        started = time.perf_counter()
+        try:
+            written = export_snapshots(dates=dates, full=options['full'])
+        except ImportError as e:
+            raise CommandError(str(e))
+        for report_date, rows in sorted(written.items()):
+            self.stdout.write(f'{report_date}: {rows} rows')
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {len(written)} snapshot(s) into {storage_dir()} in {time.perf_counter() - started:.2f}s'
+        ))
@@ -0,0 +1,48 @@
+# reportApp/management/commands/load_snapshot.py
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from reportApp.loader import load_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Bulk load a T24 account_base extract (CSV or Parquet) with COPY and swap the snapshot in'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or .parquet extract with account_base column headers')
+        parser.add_argument('--report-date', help='Override report_date for every row (YYYY-MM-DD)')
+        parser.add_argument('--skip-hooks', action='store_true', help='Do not refresh rollups, caches and statistics')
+
+    def handle(self, *args, **options):
+        report_date = None
+        if options['report_date']:
+            report_date = parse_date(options['report_date'])
+            if report_date is None:
+                raise CommandError('--report-date must be in YYYY-MM-DD format')
+
+        started = time.perf_counter()
+        try:
+            result = load_snapshot(
+                options['path'],
+                report_date=report_date,
+                send_signal=not options['skip_hooks']
+            )
+        except (OSError, ValueError, ImportError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - started
+
+        if result['skipped_rows']:
+            self.stdout.write(self.style.WARNING(f"Skipped {result['skipped_rows']} rows without account_number"))
+        if result['invalid_balances']:
+            self.stdout.write(self.style.WARNING(f"Normalized {result['invalid_balances']} invalid balances to 0.00"))
+
+        row_count = result['row_count']
+        dates = ', '.join(str(d) for d in result['report_dates']) or 'none'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Loaded {row_count} rows for report_date(s) {dates} '
+                f'in {elapsed:.1f}s ({row_count / max(elapsed, 1e-9):,.0f} rows/sec)'
+            )
+        )
@@ -0,0 +1,53 @@
+# reportApp/management/commands/partition_account_base.py
+from django.core.management.base import BaseCommand, CommandError
+
+from reportApp import partitions
+
+
+class Command(BaseCommand):
+    help = 'Manage range partitioning of account_base by report_date'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'operation', choices=['status', 'convert', 'ensure', 'prune'],
+            help='status: list partitions; convert: partition the table; '
+                 'ensure: pre-create future partitions; prune: detach old partitions'
+        )
+        parser.add_argument('--days-ahead', type=int, default=7, help='Partitions to pre-create (ensure)')
+        parser.add_argument('--retain-days', type=int, default=365, help='Retention window in days (prune)')
+        parser.add_argument('--archive-schema', help='Move pruned partitions to this schema')
+        parser.add_argument('--drop', action='store_true', help='Drop pruned partitions instead of keeping them')
+
+    def handle(self, *args, **options):
+        operation = options['operation']
+        if operation == 'convert':
+            try:
+                copied = partitions.convert_to_partitioned()
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f'Partitioned {partitions.TABLE} ({copied} rows copied); '
+                f'the original table is kept as {partitions.LEGACY_TABLE}'
+            ))
+            return
+
+        if not partitions.is_partitioned():
+            raise CommandError(f'{partitions.TABLE} is not partitioned; run "convert" first')
+
+        if operation == 'status':
+            for name, report_date, estimate in partitions.list_partitions():
+                self.stdout.write(f'{name}\t{report_date or "default"}\t~{estimate} rows')
+        elif operation == 'ensure':
+            created = partitions.precreate_partitions(days_ahead=options['days_ahead'])
+            self.stdout.write(self.style.SUCCESS(f'Created {len(created)} partition(s)'))
+        elif operation == 'prune':
+            if options['drop'] and options['archive_schema']:
+                raise CommandError('Use either --drop or --archive-schema, not both')
+            pruned = partitions.prune_partitions(
+                options['retain_days'],
+                archive_schema=options['archive_schema'],
+                drop=options['drop']
+            )
+            for name in pruned:
+                self.stdout.write(f'Detached {name}')
+            self.stdout.write(self.style.SUCCESS(f'Pruned {len(pruned)} partition(s)'))
@@ -0,0 +1,23 @@
+# reportApp/management/commands/precompute_saved_reports.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from reportApp.saved_reports import storage_dir
+from reportApp.scheduler import run_pending
+
+
+class Command(BaseCommand):
+    help = 'Precompute saved report artifacts for the latest snapshot (what the built-in scheduler does when something changed)'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = run_pending(force=True)
+        if result is None:
+            self.stdout.write('Another process is already precomputing saved reports')
+            return
+        written, fresh, failed = result
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {written} artifact(s) into {storage_dir()} in {time.perf_counter() - started:.2f}s'
+            f' ({fresh} already up to date' + (f', {failed} failed)' if failed else ')')
+        ))
@@ -0,0 +1,28 @@
+# reportApp/management/commands/refresh_rollups.py
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from reportApp.rollups import refresh_rollups
+
+
+class Command(BaseCommand):
+    help = 'Build per-snapshot account_base rollups (only missing snapshots by default)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', action='append', dest='dates', help='Rebuild a specific report_date (YYYY-MM-DD); repeatable')
+        parser.add_argument('--full', action='store_true', help='Rebuild every snapshot')
+
+    def handle(self, *args, **options):
+        dates = None
+        if options['dates']:
+            dates = [parse_date(value) for value in options['dates']]
+            if None in dates:
+                raise CommandError('--date must be in YYYY-MM-DD format')
+
+        written = refresh_rollups(dates=dates, full=options['full'])
+        for report_date, rows in written.items():
+            self.stdout.write(f'{report_date}: {rows} rollup rows')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Refreshed {len(written)} snapshot rollup(s)')
+        )
@@ -0,0 +1,57 @@
+# reportApp/management/commands/snapshot_diff.py
+import csv
+import sys
+from decimal import InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from reportApp.diff import SnapshotDiff, DIFF_COLUMNS
+
+
+class Command(BaseCommand):
+    help = 'Compare two account_base snapshots and write the differences as CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('from_date', help='Older report_date (YYYY-MM-DD)')
+        parser.add_argument('to_date', help='Newer report_date (YYYY-MM-DD)')
+        parser.add_argument('--threshold', default='0', help='Minimum absolute working_balance movement')
+        parser.add_argument('--fields', help='Comma separated attributes to compare')
+        parser.add_argument('--output', help='CSV file to write (defaults to stdout)')
+        parser.add_argument('--summary', action='store_true', help='Only print counts per change type')
+
+    def handle(self, *args, **options):
+        from_date = parse_date(options['from_date'])
+        to_date = parse_date(options['to_date'])
+        if from_date is None or to_date is None:
+            raise CommandError('Dates must be in YYYY-MM-DD format')
+
+        attributes = None
+        if options['fields']:
+            attributes = [f.strip() for f in options['fields'].split(',') if f.strip()]
+        try:
+            snapshot_diff = SnapshotDiff(from_date, to_date, options['threshold'], attributes)
+        except (ValueError, InvalidOperation) as e:
+            raise CommandError(str(e))
+
+        if options['summary']:
+            for change_type, count in snapshot_diff.summary().items():
+                self.stdout.write(f'{change_type}: {count}')
+            return
+
+        handle = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        try:
+            writer = csv.writer(handle)
+            writer.writerow(DIFF_COLUMNS)
+            written = 0
+            for row in snapshot_diff.iter_rows():
+                writer.writerow(row)
+                written += 1
+        finally:
+            if handle is not sys.stdout:
+                handle.close()
+
+        if options['output']:
+            self.stdout.write(
+                self.style.SUCCESS(f'Wrote {written} diff rows to {options["output"]}')
+            )
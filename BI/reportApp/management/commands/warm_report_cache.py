@@ -0,0 +1,27 @@
+# reportApp/management/commands/warm_report_cache.py
+from django.core.management.base import BaseCommand, CommandError
+
+from reportApp.warming import needs_warming, warm_caches
+
+
+class Command(BaseCommand):
+    help = 'Precompute the most requested report responses (from the access log) for the current snapshot'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--if-new', action='store_true', help='Only warm when a new report_date (or reload) appeared since the last run')
+        parser.add_argument('--limit', type=int, help='Number of access log entries to replay (default REPORTS_WARM_TOP_N)')
+        parser.add_argument('--workers', type=int, help='Concurrent DB connections (default REPORTS_WARM_DB_CONCURRENCY)')
+
+    def handle(self, *args, **options):
+        if options['if_new'] and not needs_warming():
+            self.stdout.write('Caches are already warm for the current snapshot')
+            return
+
+        result = warm_caches(limit=options['limit'], db_concurrency=options['workers'])
+        if result is None:
+            raise CommandError('CACHES is per process (e.g. LocMemCache); configure a shared cache to warm it')
+        warmed, failed, seconds = result
+        self.stdout.write(self.style.SUCCESS(
+            f'Warmed {warmed} response(s) in {seconds:.2f}s'
+            + (f', {failed} failed' if failed else '')
+        ))
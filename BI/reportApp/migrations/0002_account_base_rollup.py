@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportApp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountBaseRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('report_date', models.DateField()),
+                ('branch_code', models.CharField(blank=True, max_length=20, null=True)),
+                ('branch_name', models.CharField(blank=True, max_length=200, null=True)),
+                ('region', models.CharField(blank=True, max_length=100, null=True)),
+                ('currency', models.CharField(blank=True, max_length=10, null=True)),
+                ('category', models.CharField(blank=True, max_length=100, null=True)),
+                ('product_name', models.CharField(blank=True, max_length=200, null=True)),
+                ('sector', models.CharField(blank=True, max_length=100, null=True)),
+                ('industry', models.CharField(blank=True, max_length=100, null=True)),
+                ('cust_type', models.CharField(blank=True, max_length=50, null=True)),
+                ('account_count', models.IntegerField(default=0)),
+                ('total_balance', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('opened_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Account Base Rollup',
+                'verbose_name_plural': 'Account Base Rollups',
+                'db_table': 'account_base_rollup',
+                'indexes': [models.Index(fields=['report_date', 'branch_code'], name='rollup_date_branch_idx')],
+            },
+        ),
+    ]
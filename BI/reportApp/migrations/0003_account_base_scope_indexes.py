@@ -0,0 +1,30 @@
+from django.db import migrations
+
+# account_base is unmanaged (loaded from T24), so its indexes are created
+# with raw SQL and skipped where the table does not exist (e.g. test databases).
+CREATE_INDEXES = """
+DO $$
+BEGIN
+    IF to_regclass('account_base') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS account_base_branch_date_idx ON account_base (branch_code, report_date);
+        CREATE INDEX IF NOT EXISTS account_base_region_date_idx ON account_base (region, report_date);
+    END IF;
+END
+$$;
+"""
+
+DROP_INDEXES = """
+DROP INDEX IF EXISTS account_base_branch_date_idx;
+DROP INDEX IF EXISTS account_base_region_date_idx;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportApp', '0002_account_base_rollup'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEXES, DROP_INDEXES),
+    ]
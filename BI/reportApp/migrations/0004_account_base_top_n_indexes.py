@@ -0,0 +1,33 @@
+from django.db import migrations
+
+# Composite indexes for the top_per_group action: rows of one snapshot come
+# back already grouped and ranked, so ROW_NUMBER() needs no sort. Guarded
+# like 0003 because account_base is unmanaged.
+CREATE_INDEXES = """
+DO $$
+BEGIN
+    IF to_regclass('account_base') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS account_base_date_branch_balance_idx
+            ON account_base (report_date, branch_code, working_balance DESC NULLS LAST);
+        CREATE INDEX IF NOT EXISTS account_base_date_product_opened_idx
+            ON account_base (report_date, product_name, opening_date DESC NULLS LAST);
+    END IF;
+END
+$$;
+"""
+
+DROP_INDEXES = """
+DROP INDEX IF EXISTS account_base_date_branch_balance_idx;
+DROP INDEX IF EXISTS account_base_date_product_opened_idx;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportApp', '0003_account_base_scope_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEXES, DROP_INDEXES),
+    ]
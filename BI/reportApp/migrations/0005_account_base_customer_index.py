@@ -0,0 +1,29 @@
+from django.db import migrations
+
+# Customer 360 lookups (customer_no within a snapshot). Guarded like 0003
+# because account_base is unmanaged.
+CREATE_INDEXES = """
+DO $$
+BEGIN
+    IF to_regclass('account_base') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS account_base_customer_date_idx
+            ON account_base (customer_no, report_date);
+    END IF;
+END
+$$;
+"""
+
+DROP_INDEXES = """
+DROP INDEX IF EXISTS account_base_customer_date_idx;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportApp', '0004_account_base_top_n_indexes'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_INDEXES, DROP_INDEXES),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:10
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportApp', '0005_account_base_customer_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accountbaserollup',
+            name='customer_sketch',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, null=True, size=None),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportApp', '0006_account_base_rollup_customer_sketch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportAccess',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=32, unique=True)),
+                ('action', models.CharField(max_length=50)),
+                ('query', models.JSONField(default=list)),
+                ('scope', models.JSONField(default=dict)),
+                ('hits', models.PositiveBigIntegerField(default=0)),
+                ('last_seen', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Report Access',
+                'verbose_name_plural': 'Report Access Log',
+                'db_table': 'report_access',
+                'indexes': [models.Index(fields=['last_seen', 'hits'], name='report_access_recent_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportApp', '0007_report_access'),
+        ('userManagement', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('filters', models.JSONField(blank=True, default=dict)),
+                ('fields', models.JSONField(blank=True, default=list)),
+                ('ordering', models.JSONField(blank=True, default=list)),
+                ('format', models.CharField(choices=[('csv', 'CSV'), ('json', 'JSON')], default='csv', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='saved_reports', to=settings.AUTH_USER_MODEL)),
+                ('role', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='saved_reports', to='userManagement.role')),
+            ],
+            options={
+                'db_table': 'saved_report',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SavedReportArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope_digest', models.CharField(max_length=32)),
+                ('scope', models.JSONField(default=dict)),
+                ('report_date', models.DateField()),
+                ('path', models.CharField(max_length=500)),
+                ('row_count', models.IntegerField(default=0)),
+                ('size', models.BigIntegerField(default=0)),
+                ('generated_at', models.DateTimeField()),
+                ('saved_report', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='artifacts', to='reportApp.savedreport')),
+            ],
+            options={
+                'db_table': 'saved_report_artifact',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='savedreport',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('owner__isnull', False), ('role__isnull', True)), models.Q(('owner__isnull', True), ('role__isnull', False)), _connector='OR'), name='saved_report_single_owner'),
+        ),
+        migrations.AddConstraint(
+            model_name='savedreportartifact',
+            constraint=models.UniqueConstraint(fields=('saved_report', 'scope_digest'), name='saved_report_artifact_scope_uniq'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportApp', '0008_saved_report'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnapshotGeneration',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField()),
+                ('latest_report_date', models.DateField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'snapshot_generation',
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reportApp', '0009_snapshot_generation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavedReportPrecompute',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, primary_key=True, serialize=False)),
+                ('marker', models.JSONField(default=list)),
+                ('recorded_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'saved_report_precompute',
+            },
+        ),
+    ]
@@ -1,4 +1,6 @@
 # external_data/models.py
+from django.conf import settings
+from django.contrib.postgres.fields import ArrayField
 from django.db import models
 
 class AccountBase(models.Model):
@@ -30,4 +32,163 @@ class AccountBase(models.Model):
         verbose_name_plural = 'Account Base Records'
 
     def __str__(self):
-        return f"{self.account_number} - {self.customer_name}"
\ No newline at end of file
+        return f"{self.account_number} - {self.customer_name}"
+
+class AccountBaseRollup(models.Model):
+    """
+    Per-snapshot aggregate of account_base at the grain of the report filters.
+    One row per (report_date, dimension combination), refreshed incrementally
+    by reportApp.rollups so trend queries never touch the raw snapshots.
+    customer_sketch makes distinct-customer counts mergeable across rows.
+    """
+    report_date = models.DateField()
+    branch_code = models.CharField(max_length=20, blank=True, null=True)
+    branch_name = models.CharField(max_length=200, blank=True, null=True)
+    region = models.CharField(max_length=100, blank=True, null=True)
+    currency = models.CharField(max_length=10, blank=True, null=True)
+    category = models.CharField(max_length=100, blank=True, null=True)
+    product_name = models.CharField(max_length=200, blank=True, null=True)
+    sector = models.CharField(max_length=100, blank=True, null=True)
+    industry = models.CharField(max_length=100, blank=True, null=True)
+    cust_type = models.CharField(max_length=50, blank=True, null=True)
+    account_count = models.IntegerField(default=0)
+    total_balance = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    opened_count = models.IntegerField(default=0)
+    # Sparse HyperLogLog registers of customer_no (see reportApp.sketches)
+    customer_sketch = ArrayField(models.IntegerField(), blank=True, null=True)
+
+    class Meta:
+        db_table = 'account_base_rollup'
+        verbose_name = 'Account Base Rollup'
+        verbose_name_plural = 'Account Base Rollups'
+        indexes = [
+            models.Index(fields=['report_date', 'branch_code'], name='rollup_date_branch_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.report_date} - {self.branch_code}"
+
+
+class SnapshotGeneration(models.Model):
+    """
+    Single row (pk=1) moved forward by every account_base load, with the
+    latest report_date at that point. Cached report results are keyed by
+    it, so every worker stops serving pre-load results once it reads the
+    new generation (see reportApp.caching).
+    """
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1)
+    version = models.BigIntegerField()
+    latest_report_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'snapshot_generation'
+
+    def __str__(self):
+        return f"{self.version} ({self.latest_report_date})"
+
+
+class ReportAccess(models.Model):
+    """
+    How often each report endpoint was requested with the same query
+    parameters and scope. Hits are buffered per process and added up by
+    reportApp.warming; the cache warmer replays the most requested entries
+    after every snapshot load.
+    """
+    digest = models.CharField(max_length=32, unique=True)
+    action = models.CharField(max_length=50)
+    query = models.JSONField(default=list)
+    scope = models.JSONField(default=dict)
+    hits = models.PositiveBigIntegerField(default=0)
+    last_seen = models.DateTimeField()
+
+    class Meta:
+        db_table = 'report_access'
+        verbose_name = 'Report Access'
+        verbose_name_plural = 'Report Access Log'
+        indexes = [
+            models.Index(fields=['last_seen', 'hits'], name='report_access_recent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.action} ({self.hits})"
+
+
+class SavedReport(models.Model):
+    """
+    A named account_base listing (filters, projected fields, ordering and
+    format) owned by one user or shared with a role. reportApp.scheduler
+    precomputes it for the latest snapshot into a SavedReportArtifact per
+    viewer scope, so opening it reads a file instead of scanning the table.
+    """
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('json', 'JSON'),
+    ]
+
+    name = models.CharField(max_length=200)
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True, related_name='saved_reports'
+    )
+    role = models.ForeignKey(
+        'userManagement.Role', on_delete=models.CASCADE, null=True, blank=True, related_name='saved_reports'
+    )
+    filters = models.JSONField(default=dict, blank=True)
+    fields = models.JSONField(default=list, blank=True)
+    ordering = models.JSONField(default=list, blank=True)
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES, default='csv')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'saved_report'
+        ordering = ['name']
+        constraints = [
+            models.CheckConstraint(
+                condition=models.Q(owner__isnull=False, role__isnull=True) | models.Q(owner__isnull=True, role__isnull=False),
+                name='saved_report_single_owner',
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class SavedReportArtifact(models.Model):
+    """
+    Precomputed output of a saved report for one scope and snapshot; path is
+    relative to REPORTS_SAVED_REPORTS_DIR. Only the latest snapshot is kept.
+    """
+    saved_report = models.ForeignKey(SavedReport, on_delete=models.CASCADE, related_name='artifacts')
+    scope_digest = models.CharField(max_length=32)
+    scope = models.JSONField(default=dict)
+    report_date = models.DateField()
+    path = models.CharField(max_length=500)
+    row_count = models.IntegerField(default=0)
+    size = models.BigIntegerField(default=0)
+    generated_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'saved_report_artifact'
+        constraints = [
+            models.UniqueConstraint(fields=['saved_report', 'scope_digest'], name='saved_report_artifact_scope_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.saved_report} - {self.report_date}"
+
+
+class SavedReportPrecompute(models.Model):
+    """
+    Single row (pk=1) holding the marker of the last clean precomputation
+    pass, shared by every worker, so a tick in any process can tell nothing
+    changed since (see reportApp.saved_reports).
+    """
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1)
+    marker = models.JSONField(default=list)
+    recorded_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'saved_report_precompute'
+
+    def __str__(self):
+        return str(self.recorded_at)
@@ -0,0 +1,230 @@
+# reportApp/notifications.py
+"""
+Push notifications of newly loaded account_base snapshots.
+
+After a load, the snapshot_loaded receiver publishes a small JSON event
+(latest report_date, cache generation, and the first, last and number of
+dates loaded, so a backfill of any length fits pg_notify's 8000-byte
+payload limit) on the PostgreSQL channel REPORTS_SNAPSHOT_EVENTS_CHANNEL with pg_notify. Every
+ASGI worker holds one LISTEN connection, watched with loop.add_reader (no
+thread, no polling), and fans the event out to its Server-Sent Events
+subscribers, each of which is just an asyncio.Queue, so thousands of idle
+dashboards cost one coroutine apiece. With a non-PostgreSQL database the
+event is delivered in-process instead (loads in the same process only).
+
+Subscribers may ask for the stats payload of the new snapshot; it is
+computed (or read from the response cache the warmer filled) once per
+worker, event and scope, however many subscribers share that scope. A
+stream authenticated with a token ends when the token expires.
+"""
+import asyncio
+import json
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Max
+from rest_framework.utils.encoders import JSONEncoder
+
+from .caching import snapshot_version
+from .models import AccountBase
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 5
+
+
+def channel():
+    return getattr(settings, 'REPORTS_SNAPSHOT_EVENTS_CHANNEL', 'report_snapshots')
+
+
+def uses_listen():
+    return connection.vendor == 'postgresql'
+
+
+def current_snapshot(loaded=()):
+    latest = AccountBase.objects.aggregate(latest=Max('report_date'))['latest']
+    return {
+        'report_date': latest.isoformat() if latest else None,
+        'loaded': {
+            'first': loaded[0].isoformat() if loaded else None,
+            'last': loaded[-1].isoformat() if loaded else None,
+            'count': len(loaded),
+        },
+        'version': snapshot_version(),
+    }
+
+
+def initial_snapshot():
+    try:
+        return current_snapshot()
+    finally:
+        # Streams stay open for hours; only the stats computation touches the DB again
+        connection.close()
+
+
+def publish_snapshot(report_dates):
+    """
+    Announce loaded snapshots to every worker (pg_notify) or to this process.
+    A failure is logged, never raised: the load itself already succeeded.
+    """
+    try:
+        payload = json.dumps(current_snapshot(sorted(report_dates)))
+        if uses_listen():
+            # Savepoint, so a failed NOTIFY cannot break an enclosing transaction
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute("SELECT pg_notify(%s, %s)", [channel(), payload])
+        else:
+            hub.publish_threadsafe(payload)
+    except Exception:
+        logger.exception('Could not announce %s loaded snapshot(s)', len(report_dates))
+
+
+def snapshot_stats(event, scope):
+    """stats payload of the event's snapshot for scope (None when it cannot be computed)."""
+    from .dashboard import run_action
+
+    try:
+        response = run_action('stats', [('report_date', [event['report_date']])], scope, warming=True)
+        return response.data if response.status_code == 200 else None
+    finally:
+        connection.close()
+
+
+class SnapshotHub:
+    """Per-worker fan-out of snapshot events to SSE subscriber queues."""
+
+    def __init__(self):
+        self.subscribers = set()
+        self.loop = None
+        self.listener = None
+        self.latest = None
+        self.stats_tasks = {}
+
+    async def subscribe(self):
+        await self.start()
+        queue = asyncio.Queue(maxsize=1)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    def full(self):
+        return len(self.subscribers) >= getattr(settings, 'REPORTS_SNAPSHOT_EVENTS_MAX_SUBSCRIBERS', 5000)
+
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is loop:
+            return
+        self.loop = loop
+        if uses_listen():
+            await self.listen()
+
+    async def listen(self):
+        try:
+            self.listener = await asyncio.to_thread(self.connect)
+        except Exception:
+            logger.exception('Could not LISTEN for snapshot events; retrying in %ss', RECONNECT_DELAY)
+            self.loop.call_later(RECONNECT_DELAY, lambda: asyncio.ensure_future(self.listen()))
+            return
+        self.loop.add_reader(self.listener.fileno(), self.on_readable)
+
+    def connect(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        listener = psycopg2.connect(**connection.get_connection_params())
+        listener.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with listener.cursor() as cursor:
+            cursor.execute(f'LISTEN "{channel()}"')
+        return listener
+
+    def on_readable(self):
+        try:
+            self.listener.poll()
+        except Exception:
+            logger.exception('Lost the snapshot events connection; reconnecting')
+            self.loop.remove_reader(self.listener.fileno())
+            self.listener.close()
+            self.listener = None
+            self.loop.call_later(RECONNECT_DELAY, lambda: asyncio.ensure_future(self.listen()))
+            return
+        while self.listener.notifies:
+            self.publish(self.listener.notifies.pop(0).payload)
+
+    def publish_threadsafe(self, payload):
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.publish, payload)
+
+    def publish(self, payload):
+        event = self.latest = json.loads(payload)
+        self.stats_tasks.clear()
+        for queue in self.subscribers:
+            # Only the latest snapshot matters to a subscriber that fell behind
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def stats(self, event, scope):
+        key = (event['version'], event['report_date'], json.dumps(scope.as_dict(), sort_keys=True))
+        task = self.stats_tasks.get(key)
+        if task is None:
+            task = self.stats_tasks[key] = asyncio.ensure_future(
+                sync_to_async(snapshot_stats, thread_sensitive=False)(event, scope)
+            )
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            # Forget the failure so the next event or stream computes it again
+            if self.stats_tasks.get(key) is task:
+                del self.stats_tasks[key]
+                logger.exception('Computing snapshot stats for %s failed', scope.as_dict())
+            return None
+
+
+hub = SnapshotHub()
+
+
+def format_event(name, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id else []
+    lines += [f'event: {name}', f'data: {json.dumps(data, cls=JSONEncoder)}']
+    return '\n'.join(lines) + '\n\n'
+
+
+async def event_stream(scope, with_stats, expires_at=None):
+    """
+    SSE body: the current snapshot, then one event per load, with keep-alive
+    comments in between. With expires_at (a Unix timestamp) the stream ends
+    then with an `expired` event.
+    """
+    queue = await hub.subscribe()
+    heartbeat = getattr(settings, 'REPORTS_SNAPSHOT_EVENTS_HEARTBEAT', 25)
+    try:
+        # Known after the first stream (and every event): new streams skip the DB
+        if hub.latest is None:
+            hub.latest = await sync_to_async(initial_snapshot)()
+        event = hub.latest
+        yield f'retry: {RECONNECT_DELAY * 1000}\n\n'
+        while True:
+            if event['report_date'] is not None:
+                if with_stats:
+                    event = {**event, 'stats': await hub.stats(event, scope)}
+                yield format_event('snapshot', event, f"{event['report_date']}:{event['version']}")
+            while True:
+                timeout = heartbeat
+                if expires_at is not None:
+                    remaining = expires_at - time.time()
+                    if remaining <= 0:
+                        yield format_event('expired', {})
+                        return
+                    timeout = min(timeout, remaining)
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout)
+                    break
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+    finally:
+        hub.unsubscribe(queue)
@@ -0,0 +1,319 @@
+# reportApp/olap.py
+"""
+Optional DuckDB/Parquet backend for aggregate report queries.
+
+Every report_date snapshot of account_base is exported to its own Parquet
+file under REPORTS_OLAP_DIR: PostgreSQL streams the rows out with COPY and
+an embedded DuckDB re-encodes them with the model's column types. With
+REPORTS_OLAP_BACKEND on, stats, trend and diff run on a small pool of DuckDB
+connections whose `account_base` view reads those files, so long scans over
+many snapshots stay off PostgreSQL. Row-level actions (list, retrieve,
+batch, ...) always read PostgreSQL.
+
+A query is only routed here when every snapshot it needs has been exported,
+and each one returns the same payload as its PostgreSQL counterpart.
+"""
+import datetime
+import os
+import re
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+from .diff import SnapshotDiff
+from .models import AccountBase
+from .rollups import snapshot_dates, rolled_up_dates
+from .scoping import UNRESTRICTED
+
+TABLE = AccountBase._meta.db_table
+FILE_PATTERN = re.compile(rf'^{TABLE}_(\d{{8}})\.parquet$')
+
+
+def backend_enabled():
+    return getattr(settings, 'REPORTS_OLAP_BACKEND', False)
+
+
+def storage_dir():
+    return str(getattr(settings, 'REPORTS_OLAP_DIR', settings.BASE_DIR / 'olap'))
+
+
+def pool_size():
+    return getattr(settings, 'REPORTS_OLAP_POOL_SIZE', 4)
+
+
+def import_duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        raise ImportError('The OLAP backend requires duckdb (pip install duckdb)')
+    return duckdb
+
+
+def quote_literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def duckdb_type(field):
+    internal_type = field.get_internal_type()
+    if internal_type == 'DecimalField':
+        return f'DECIMAL({field.max_digits}, {field.decimal_places})'
+    return {'DateField': 'DATE', 'TimeField': 'TIME'}.get(internal_type, 'VARCHAR')
+
+
+def snapshot_path(report_date, root=None):
+    return os.path.join(root or storage_dir(), f'{TABLE}_{report_date:%Y%m%d}.parquet')
+
+
+def exported_dates():
+    """report_date values that have a Parquet file."""
+    try:
+        names = os.listdir(storage_dir())
+    except FileNotFoundError:
+        return set()
+    return {
+        datetime.datetime.strptime(match.group(1), '%Y%m%d').date()
+        for match in map(FILE_PATTERN.match, names) if match
+    }
+
+
+def copy_out(sql, handle):
+    with connection.cursor() as cursor:
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, 'copy_expert'):  # psycopg2
+            raw_cursor.copy_expert(sql, handle, size=1 << 20)
+        else:  # psycopg 3
+            with raw_cursor.copy(sql) as copy:
+                for data in copy:
+                    handle.write(data)
+
+
+def export_snapshot(report_date):
+    """
+    Write one snapshot to its Parquet file, ordered by account_number, and
+    publish it with an atomic rename. A snapshot without rows loses its
+    file. Returns the number of rows written.
+    """
+    duckdb = import_duckdb()
+    root = storage_dir()
+    os.makedirs(root, exist_ok=True)
+    fields = AccountBase._meta.concrete_fields
+    columns = ', '.join(field.column for field in fields)
+    types = ', '.join(f'{quote_literal(field.column)}: {quote_literal(duckdb_type(field))}' for field in fields)
+    path = snapshot_path(report_date, root)
+
+    handle, csv_path = tempfile.mkstemp(suffix='.csv', dir=root)
+    try:
+        with os.fdopen(handle, 'wb') as stream:
+            copy_out(
+                f"COPY (SELECT {columns} FROM {TABLE} WHERE report_date = DATE '{report_date.isoformat()}'"
+                f" ORDER BY account_number) TO STDOUT WITH (FORMAT csv)",
+                stream
+            )
+        database = duckdb.connect()
+        try:
+            # COPY writes NULL as an empty field and '' as "", so only unquoted empties are NULL
+            rows = database.execute(
+                f"COPY (SELECT * FROM read_csv({quote_literal(csv_path)}, header = false,"
+                f" columns = {{{types}}}, nullstr = '', allow_quoted_nulls = false))"
+                f" TO {quote_literal(f'{path}.tmp')} (FORMAT parquet, COMPRESSION zstd)"
+            ).fetchone()[0]
+        finally:
+            database.close()
+    finally:
+        os.remove(csv_path)
+
+    if rows:
+        os.replace(f'{path}.tmp', path)
+    else:
+        os.remove(f'{path}.tmp')
+        if os.path.exists(path):
+            os.remove(path)
+    return rows
+
+
+def export_snapshots(dates=None, full=False):
+    """
+    Export snapshots incrementally: only snapshots without a Parquet file
+    unless specific dates are requested or full=True. Files of snapshots no
+    longer in account_base are removed. Returns a {report_date: rows} mapping.
+    """
+    all_dates = snapshot_dates()
+    exported = exported_dates()
+    if dates is not None:
+        targets = [report_date for report_date in all_dates if report_date in set(dates)]
+    elif full:
+        targets = all_dates
+    else:
+        targets = [report_date for report_date in all_dates if report_date not in exported]
+
+    for report_date in exported - set(all_dates):
+        os.remove(snapshot_path(report_date))
+    return {report_date: export_snapshot(report_date) for report_date in targets}
+
+
+def serves(dates=None):
+    """
+    Whether a query over `dates` (every row when None) runs on DuckDB: the
+    backend is on and each of those snapshots has been exported. Rows
+    without a report_date are never exported, so while any exist a query
+    over every row stays on PostgreSQL, which counts them.
+    """
+    if not backend_enabled():
+        return False
+    exported = exported_dates()
+    if dates is None:
+        # NULL report_date rows all sit in the default partition: a cheap probe
+        return (
+            bool(exported) and exported == rolled_up_dates()
+            and not AccountBase.objects.filter(report_date__isnull=True).exists()
+        )
+    return bool(dates) and set(dates) <= exported
+
+
+class ConnectionPool:
+    """
+    One in-memory DuckDB database holding the account_base view over the
+    Parquet files, and up to REPORTS_OLAP_POOL_SIZE connections (cursors on
+    that database), each handed to one thread at a time. DuckDB parallelizes
+    every query itself, so the pool only bounds concurrent queries.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.root = None
+        self.database = None
+        self.idle = []
+        self.slots = None
+
+    def open(self):
+        root = storage_dir()
+        with self.lock:
+            if root != self.root:
+                database = import_duckdb().connect()
+                database.execute(
+                    f"CREATE VIEW {TABLE} AS SELECT * FROM read_parquet("
+                    f"{quote_literal(os.path.join(root, f'{TABLE}_*.parquet'))}, union_by_name = true)"
+                )
+                self.root, self.database, self.idle = root, database, []
+                self.slots = threading.BoundedSemaphore(pool_size())
+            return self.database, self.slots
+
+    @contextmanager
+    def connection(self):
+        database, slots = self.open()
+        with slots:
+            with self.lock:
+                conn = self.idle.pop() if self.idle and database is self.database else database.cursor()
+            try:
+                yield conn
+            finally:
+                with self.lock:
+                    if database is self.database:
+                        self.idle.append(conn)
+                    else:
+                        conn.close()
+
+
+pool = ConnectionPool()
+
+
+def to_duckdb(sql):
+    """Swap the DB-API %s placeholders used by the PostgreSQL queries for DuckDB's ?."""
+    return sql.replace('%s', '?')
+
+
+def where_clause(report_date=None, filters=None, scope=UNRESTRICTED, alias=None):
+    prefix = f'{alias}.' if alias else ''
+    clauses, params = ['TRUE'], []
+    if report_date is not None:
+        clauses.append(f'{prefix}report_date = %s')
+        params.append(report_date)
+    for field, value in (filters or {}).items():
+        clauses.append(f'{prefix}{field} = %s')
+        params.append(value)
+    scope_sql, scope_params = scope.sql(alias)
+    return ' WHERE ' + ' AND '.join(clauses) + scope_sql, params + scope_params
+
+
+def stats(report_date=None, filters=None, scope=UNRESTRICTED):
+    """Same payload as AccountBaseViewSet.stats, over one snapshot or all of them."""
+    where, params = where_clause(report_date, filters, scope)
+    with pool.connection() as conn:
+        total_accounts, total_balance = conn.execute(
+            to_duckdb(f"SELECT COUNT(*), SUM(working_balance) FROM {TABLE}{where}"), params
+        ).fetchone()
+
+        def grouped(column):
+            rows = conn.execute(to_duckdb(
+                f"SELECT {column}, COUNT(account_number), SUM(working_balance) FROM {TABLE}{where}"
+                f" GROUP BY {column} ORDER BY 3 DESC NULLS FIRST, 1 ASC NULLS LAST"
+            ), params).fetchall()
+            return [{column: value, 'count': count, 'total_balance': balance} for value, count, balance in rows]
+
+        return {
+            'total_accounts': total_accounts,
+            'total_balance': float(total_balance or 0),
+            'by_branch': grouped('branch_name'),
+            'by_product': grouped('product_name'),
+        }
+
+
+def trend_rows(date_from=None, date_to=None, filters=None, scope=UNRESTRICTED):
+    """
+    Per-report_date account_count, total_balance and opened_count, equal to
+    summing account_base_rollup: opened_count counts accounts opened since
+    the previous snapshot (or on report_date for the first one).
+    """
+    where, params = where_clause(None, filters, scope, alias='a')
+    for value, operator in ((date_from, '>='), (date_to, '<=')):
+        if value is not None:
+            where += f' AND a.report_date {operator} %s'
+            params.append(value)
+    sql = f"""
+        WITH snapshots AS (
+            SELECT report_date, LAG(report_date) OVER (ORDER BY report_date) AS previous_date
+            FROM (SELECT DISTINCT report_date FROM {TABLE} WHERE report_date IS NOT NULL) d
+        )
+        SELECT a.report_date,
+               COUNT(*),
+               COALESCE(SUM(a.working_balance), 0),
+               COUNT(*) FILTER (WHERE CASE WHEN s.previous_date IS NULL THEN a.opening_date = a.report_date
+                                           ELSE a.opening_date > s.previous_date
+                                            AND a.opening_date <= a.report_date END)
+        FROM {TABLE} a
+        JOIN snapshots s ON s.report_date = a.report_date
+        {where}
+        GROUP BY a.report_date
+        ORDER BY a.report_date
+    """
+    with pool.connection() as conn:
+        rows = conn.execute(to_duckdb(sql), params).fetchall()
+    return [
+        {'report_date': report_date, 'account_count': account_count,
+         'total_balance': total_balance, 'opened_count': opened_count}
+        for report_date, account_count, total_balance, opened_count in rows
+    ]
+
+
+class OlapSnapshotDiff(SnapshotDiff):
+    """SnapshotDiff running the same FULL OUTER JOIN on DuckDB over the Parquet snapshots."""
+
+    @staticmethod
+    def _without_nulls(array_sql):
+        return f"list_filter({array_sql}, field -> field IS NOT NULL)"
+
+    def _fetchall(self, sql, params):
+        with pool.connection() as conn:
+            return conn.execute(to_duckdb(sql), params).fetchall()
+
+    def _fetch_chunks(self, sql, params, chunk_size):
+        with pool.connection() as conn:
+            conn.execute(to_duckdb(sql), params)
+            while True:
+                rows = conn.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
@@ -0,0 +1,169 @@
+# reportApp/partitions.py
+import datetime
+
+from django.db import connection, transaction
+
+from .models import AccountBase
+
+TABLE = AccountBase._meta.db_table
+LEGACY_TABLE = f'{TABLE}_unpartitioned'
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+
+def partition_name(report_date):
+    return f"{TABLE}_p{report_date:%Y%m%d}"
+
+
+def is_partitioned():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relkind = 'p' FROM pg_class c "
+            "WHERE c.oid = to_regclass(%s)",
+            [TABLE]
+        )
+        row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+def list_partitions():
+    """
+    Daily partitions attached to account_base as (name, report_date, estimated_rows),
+    oldest first. The default partition is reported with report_date None.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname, pg_get_expr(child.relpartbound, child.oid), child.reltuples
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.oid = to_regclass(%s)
+            """,
+            [TABLE]
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound, estimate in rows:
+        report_date = None
+        if bound and bound.startswith('FOR VALUES FROM'):
+            report_date = datetime.date.fromisoformat(bound.split("'")[1])
+        partitions.append((name, report_date, max(int(estimate), 0)))
+    partitions.sort(key=lambda p: (p[1] is None, p[1] or datetime.date.min))
+    return partitions
+
+
+def create_partition(cursor, report_date):
+    """
+    Create the one-day partition holding report_date; no-op when it exists.
+    Rows for that day already sitting in the default partition are moved
+    into the new partition before it is attached.
+    """
+    name = partition_name(report_date)
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    if cursor.fetchone()[0]:
+        return False
+    upper = report_date + datetime.timedelta(days=1)
+    cursor.execute(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS)")
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [DEFAULT_PARTITION])
+    if cursor.fetchone()[0]:
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE report_date = %s RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved",
+            [report_date]
+        )
+    cursor.execute(
+        f"ALTER TABLE {TABLE} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{report_date.isoformat()}') TO ('{upper.isoformat()}')"
+    )
+    return True
+
+
+def ensure_partitions(report_dates):
+    """Create missing partitions for the given dates; returns the dates created."""
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for report_date in sorted(set(report_dates)):
+            if create_partition(cursor, report_date):
+                created.append(report_date)
+    return created
+
+
+def precreate_partitions(days_ahead=7, today=None):
+    """Create partitions from today through today + days_ahead."""
+    today = today or datetime.date.today()
+    return ensure_partitions(
+        today + datetime.timedelta(days=offset) for offset in range(days_ahead + 1)
+    )
+
+
+def convert_to_partitioned():
+    """
+    Turn account_base into a table range-partitioned by report_date, one
+    partition per day. The original table is kept as account_base_unpartitioned
+    for verification. Non-unique indexes are recreated on the new parent and
+    cascade to every partition; a primary key on account_number alone cannot
+    exist on a partitioned table and is not carried over.
+    Returns the number of rows copied.
+    """
+    if is_partitioned():
+        raise ValueError(f'{TABLE} is already partitioned')
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = %s "
+            "AND indexdef NOT LIKE 'CREATE UNIQUE%%'",
+            [TABLE]
+        )
+        indexes = cursor.fetchall()
+
+        cursor.execute(f"ALTER TABLE {TABLE} RENAME TO {LEGACY_TABLE}")
+        for name, _ in indexes:
+            cursor.execute(f"ALTER INDEX {name} RENAME TO {name}_unpartitioned")
+
+        cursor.execute(
+            f"CREATE TABLE {TABLE} (LIKE {LEGACY_TABLE} INCLUDING DEFAULTS) "
+            f"PARTITION BY RANGE (report_date)"
+        )
+        cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT")
+
+        cursor.execute(f"SELECT DISTINCT report_date FROM {LEGACY_TABLE} WHERE report_date IS NOT NULL")
+        for (report_date,) in cursor.fetchall():
+            create_partition(cursor, report_date)
+
+        cursor.execute(f"INSERT INTO {TABLE} SELECT * FROM {LEGACY_TABLE}")
+        copied = cursor.rowcount
+
+        # Definitions were read before the rename, so they target the new parent
+        for _, definition in indexes:
+            cursor.execute(definition)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {TABLE}")
+    return copied
+
+
+def prune_partitions(retain_days, archive_schema=None, drop=False, today=None):
+    """
+    Detach partitions older than the retention window. Detached partitions are
+    moved to archive_schema when given, dropped when drop=True, and otherwise
+    left as standalone tables. Returns the names of the pruned partitions.
+    """
+    today = today or datetime.date.today()
+    cutoff = today - datetime.timedelta(days=retain_days)
+    pruned = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        if archive_schema:
+            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {connection.ops.quote_name(archive_schema)}")
+        for name, report_date, _ in list_partitions():
+            if report_date is None or report_date >= cutoff:
+                continue
+            cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+            if drop:
+                cursor.execute(f"DROP TABLE {name}")
+            elif archive_schema:
+                cursor.execute(f"ALTER TABLE {name} SET SCHEMA {connection.ops.quote_name(archive_schema)}")
+            pruned.append(name)
+    return pruned
@@ -0,0 +1,101 @@
+# reportApp/rollups.py
+from django.db import connection, transaction
+
+from .models import AccountBase, AccountBaseRollup
+from .sketches import index_sql, rank_sql
+
+# Dimensions kept in account_base_rollup; mirrors AccountBaseViewSet.filterset_fields
+ROLLUP_DIMENSIONS = [
+    'branch_code',
+    'branch_name',
+    'region',
+    'currency',
+    'category',
+    'product_name',
+    'sector',
+    'industry',
+    'cust_type',
+]
+
+
+def snapshot_dates():
+    """All report_date values present in account_base, oldest first."""
+    return list(
+        AccountBase.objects.filter(report_date__isnull=False)
+        .values_list('report_date', flat=True)
+        .distinct()
+        .order_by('report_date')
+    )
+
+
+def rolled_up_dates():
+    return set(AccountBaseRollup.objects.values_list('report_date', flat=True).distinct())
+
+
+def refresh_rollup(report_date, previous_date=None):
+    """
+    Rebuild the rollup rows of a single snapshot with one grouped INSERT ... SELECT.
+
+    opened_count counts the accounts opened since the previous snapshot
+    (or on report_date itself when there is no previous snapshot).
+    Rows are first grouped per HyperLogLog register of customer_no, so the
+    outer group can collect each register's maximum rank into
+    customer_sketch.
+    """
+    dimensions = ', '.join(ROLLUP_DIMENSIONS)
+    if previous_date is None:
+        opened_filter = 'opening_date = %s'
+        opened_params = [report_date]
+    else:
+        opened_filter = 'opening_date > %s AND opening_date <= %s'
+        opened_params = [previous_date, report_date]
+
+    sql = f"""
+        INSERT INTO {AccountBaseRollup._meta.db_table}
+            (report_date, {dimensions}, account_count, total_balance, opened_count, customer_sketch)
+        SELECT report_date, {dimensions},
+               SUM(account_count),
+               COALESCE(SUM(total_balance), 0),
+               SUM(opened_count),
+               COALESCE(ARRAY_AGG(((register << 6) | rank)::integer) FILTER (WHERE register IS NOT NULL), '{{}}')
+        FROM (
+            SELECT report_date, {dimensions},
+                   {index_sql('customer_no')} AS register,
+                   MAX({rank_sql('customer_no')}) AS rank,
+                   COUNT(*) AS account_count,
+                   SUM(working_balance) AS total_balance,
+                   COUNT(*) FILTER (WHERE {opened_filter}) AS opened_count
+            FROM {AccountBase._meta.db_table}
+            WHERE report_date = %s
+            GROUP BY report_date, {dimensions}, register
+        ) registers
+        GROUP BY report_date, {dimensions}
+    """
+    with transaction.atomic():
+        AccountBaseRollup.objects.filter(report_date=report_date).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, opened_params + [report_date])
+            return cursor.rowcount
+
+
+def refresh_rollups(dates=None, full=False):
+    """
+    Roll up snapshots incrementally: only snapshots without rollup rows are
+    computed unless specific dates are requested or full=True.
+    Returns a {report_date: rows_written} mapping.
+    """
+    all_dates = snapshot_dates()
+    if dates is not None:
+        targets = set(dates)
+    elif full:
+        targets = set(all_dates)
+    else:
+        targets = set(all_dates) - rolled_up_dates()
+
+    written = {}
+    previous_date = None
+    for report_date in all_dates:
+        if report_date in targets:
+            written[report_date] = refresh_rollup(report_date, previous_date)
+        previous_date = report_date
+    return written
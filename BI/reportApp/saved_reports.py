@@ -0,0 +1,279 @@
+# reportApp/saved_reports.py
+"""
+Saved report definitions rendered to files.
+
+A saved report is rendered for one scope (the rows its viewer may see) and
+one snapshot with a single server-side cursor over account_base, written to
+a temporary file and published with os.replace, so readers never see a
+partial artifact. Artifacts live under REPORTS_SAVED_REPORTS_DIR and are
+recorded in SavedReportArtifact; each (report, scope) keeps only the
+artifact of its latest snapshot. A precomputation pass records the marker
+of what it depended on in SavedReportPrecompute, so scheduler ticks in any
+worker that find it unchanged skip the walk over every report.
+"""
+import csv
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+from .caching import snapshot_version
+from .models import AccountBase, SavedReport, SavedReportArtifact, SavedReportPrecompute
+from .scoping import compute_scope
+from .serializers import AccountBaseSerializer, AccountBaseSummarySerializer
+
+logger = logging.getLogger(__name__)
+
+# Same filters as the account-base listing, plus a balance range
+FILTER_FIELDS = [
+    'branch_code', 'branch_name', 'region', 'currency', 'category',
+    'product_name', 'sector', 'industry', 'cust_type',
+]
+BALANCE_FILTERS = {
+    'min_balance': 'working_balance__gte',
+    'max_balance': 'working_balance__lte',
+}
+PROJECTION_FIELDS = [field.name for field in AccountBase._meta.concrete_fields]
+DEFAULT_FIELDS = AccountBaseSummarySerializer.Meta.fields
+ORDER_FIELDS = ['account_number', 'customer_name', 'working_balance', 'opening_date']
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'json': 'application/json',
+}
+
+
+def storage_dir():
+    return str(getattr(settings, 'REPORTS_SAVED_REPORTS_DIR', settings.BASE_DIR / 'saved_reports'))
+
+
+def scope_digest(scope):
+    return hashlib.md5(json.dumps(scope.as_dict(), sort_keys=True).encode()).hexdigest()
+
+
+def latest_report_date():
+    return AccountBase.objects.aggregate(latest=Max('report_date'))['latest']
+
+
+def report_queryset(report, scope, report_date):
+    """Rows of report for scope and report_date, as value tuples of its projected fields."""
+    queryset = scope.apply(AccountBase.objects.filter(report_date=report_date))
+    for name, value in report.filters.items():
+        if name in BALANCE_FILTERS:
+            queryset = queryset.filter(**{BALANCE_FILTERS[name]: Decimal(str(value))})
+        elif isinstance(value, list):
+            queryset = queryset.filter(**{f'{name}__in': value})
+        else:
+            queryset = queryset.filter(**{name: value})
+    # account_number breaks ties so artifacts are reproducible
+    ordering = list(report.ordering) + ['account_number']
+    return queryset.order_by(*ordering).values_list(*(report.fields or DEFAULT_FIELDS))
+
+
+class ArtifactEncoder(JSONEncoder):
+    """DRF's encoder, except decimals are written as exact strings rather than floats."""
+
+    def default(self, obj):
+        if isinstance(obj, Decimal):
+            return str(obj)
+        return super().default(obj)
+
+
+def write_rows(report, rows, out):
+    fields = report.fields or DEFAULT_FIELDS
+    count = 0
+    if report.format == 'csv':
+        writer = csv.writer(out)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow(['' if value is None else value for value in row])
+            count += 1
+        return count
+
+    # Same field representations as the account-base API
+    serializer_fields = AccountBaseSerializer().fields
+    represent = [serializer_fields[name].to_representation for name in fields]
+    out.write('[')
+    encoder = ArtifactEncoder()
+    for row in rows:
+        values = [
+            None if value is None else to_representation(value)
+            for to_representation, value in zip(represent, row)
+        ]
+        out.write(('\n' if not count else ',\n') + encoder.encode(dict(zip(fields, values))))
+        count += 1
+    out.write('\n]\n')
+    return count
+
+
+def artifact_path(artifact):
+    return os.path.join(storage_dir(), artifact.path)
+
+
+def write_artifact(report, scope, report_date):
+    """Render report for scope and report_date and record it, replacing the scope's previous artifact."""
+    digest = scope_digest(scope)
+    relative = os.path.join(str(report.pk), f'{digest}-{report_date:%Y%m%d}.{report.format}')
+    path = os.path.join(storage_dir(), relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Unique per writer: an on-demand open may race the scheduler for the same artifact
+    temporary = f'{path}.{uuid.uuid4().hex}.tmp'
+    rows = report_queryset(report, scope, report_date).iterator(chunk_size=2000)
+    try:
+        with open(temporary, 'w', newline='', encoding='utf-8') as out:
+            row_count = write_rows(report, rows, out)
+        os.replace(temporary, path)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+    previous = report.artifacts.filter(scope_digest=digest).first()
+    artifact, _ = SavedReportArtifact.objects.update_or_create(
+        saved_report=report,
+        scope_digest=digest,
+        defaults={
+            'scope': scope.as_dict(),
+            'report_date': report_date,
+            'path': relative,
+            'row_count': row_count,
+            'size': os.path.getsize(path),
+            'generated_at': timezone.now(),
+        }
+    )
+    if previous is not None and previous.path != relative:
+        remove_file(artifact_path(previous))
+    return artifact
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def discard_artifacts(artifacts):
+    """Delete artifact rows and their files (definition changed, report deleted or snapshot reloaded)."""
+    for artifact in artifacts:
+        remove_file(artifact_path(artifact))
+    artifacts.delete()
+
+
+def discard_report(report):
+    discard_artifacts(report.artifacts.all())
+    shutil.rmtree(os.path.join(storage_dir(), str(report.pk)), ignore_errors=True)
+
+
+def current_artifact(report, scope, report_date):
+    """The artifact serving report to scope for report_date, if it is up to date and on disk."""
+    artifact = report.artifacts.filter(
+        scope_digest=scope_digest(scope),
+        report_date=report_date,
+        generated_at__gte=report.updated_at,
+    ).first()
+    if artifact is None or not os.path.exists(artifact_path(artifact)):
+        return None
+    return artifact
+
+
+def role_representatives(role_id):
+    """
+    One active member of the role per (branch, superuser, direct permissions)
+    combination: members sharing those share a scope.
+    """
+    from userManagement.models import CustomUser
+
+    members = (
+        CustomUser.objects.filter(role_id=role_id, is_active=True)
+        .select_related('role')
+        .prefetch_related('role__permissions', 'user_permissions')
+    )
+    representatives = {}
+    for user in members:
+        codenames = frozenset(permission.codename for permission in user.user_permissions.all())
+        representatives.setdefault((user.branch_id, user.is_superuser, codenames), user)
+    return list(representatives.values())
+
+
+def report_scopes(report):
+    """Scopes to precompute: the owner's, or every distinct scope among the role's active users."""
+    users = [report.owner] if report.owner_id else role_representatives(report.role_id)
+    scopes = {}
+    for user in users:
+        scope = compute_scope(user)
+        scopes.setdefault(scope_digest(scope), scope)
+    return list(scopes.values())
+
+
+def precompute_marker():
+    """
+    What a precomputation pass depends on: the latest snapshot, the
+    permission version and the users with their auth versions (which decide
+    role scopes), the saved report definitions, and the artifact count
+    (reloads discard artifacts, possibly from another process).
+    """
+    from userManagement.models import CustomUser
+    from userManagement.tokens import permission_version
+
+    latest = latest_report_date()
+    users = CustomUser.objects.aggregate(count=Count('pk'), version=Max('auth_version'))
+    reports = SavedReport.objects.aggregate(count=Count('pk'), updated=Max('updated_at'))
+    return [
+        latest.isoformat() if latest else None,
+        snapshot_version(),
+        permission_version(),
+        users['count'],
+        users['version'],
+        reports['count'],
+        reports['updated'].isoformat() if reports['updated'] else None,
+        SavedReportArtifact.objects.count(),
+    ]
+
+
+def needs_precomputing(marker):
+    """Whether anything a pass depends on changed since the last clean one."""
+    recorded = SavedReportPrecompute.objects.filter(pk=1).values_list('marker', flat=True).first()
+    return recorded != marker
+
+
+def mark_precomputed(before):
+    """
+    Record a clean pass that started at marker `before`. Its own artifacts
+    may have changed the artifact count; any other change made meanwhile
+    leaves the marker unrecorded so the next tick runs again.
+    """
+    after = precompute_marker()
+    if after[:-1] == before[:-1]:
+        SavedReportPrecompute.objects.update_or_create(pk=1, defaults={'marker': after})
+
+
+def precompute_saved_reports(report_date=None):
+    """
+    Bring every saved report's artifacts up to date for the latest snapshot.
+    Returns (written, up to date, failed) artifact counts.
+    """
+    report_date = report_date or latest_report_date()
+    written = fresh = failed = 0
+    if report_date is None:
+        return written, fresh, failed
+    for report in SavedReport.objects.select_related('owner'):
+        for scope in report_scopes(report):
+            if current_artifact(report, scope, report_date) is not None:
+                fresh += 1
+                continue
+            try:
+                write_artifact(report, scope, report_date)
+                written += 1
+            except Exception:
+                logger.exception('Precomputing saved report %s for %s failed', report.pk, scope.as_dict())
+                failed += 1
+    return written, fresh, failed
@@ -0,0 +1,106 @@
+# reportApp/scheduler.py
+"""
+Built-in scheduler precomputing saved reports, with no broker or extra
+process.
+
+Every web worker runs one daemon thread (started from BI.wsgi / BI.asgi
+when REPORTS_SAVED_REPORTS_SCHEDULER is on). It wakes every
+REPORTS_SAVED_REPORTS_POLL_INTERVAL seconds, or right away when a load
+happens in the same process, and brings the saved report artifacts up to
+date for the latest snapshot. A tick whose precompute marker (snapshot,
+permissions, report definitions, artifacts) matches the last clean pass
+does nothing more than read it. Loads from `manage.py load_snapshot` discard
+the reloaded dates' artifacts, so the next tick picks them up. A
+PostgreSQL advisory lock lets one worker of the deployment do the work
+while the others skip the tick. Under `gunicorn --preload`, call
+start_scheduler() from a post_fork hook: threads do not survive fork().
+"""
+import logging
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+from .saved_reports import mark_precomputed, needs_precomputing, precompute_marker, precompute_saved_reports
+
+logger = logging.getLogger(__name__)
+
+LOCK_ID = zlib.crc32(b'reportApp.saved_reports')
+
+
+@contextmanager
+def advisory_lock():
+    """Yield whether this session took the deployment-wide precompute lock."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", [LOCK_ID])
+        locked = cursor.fetchone()[0]
+    try:
+        yield locked
+    finally:
+        if locked:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [LOCK_ID])
+
+
+def run_pending(force=False):
+    """
+    Precompute outstanding artifacts unless another worker is already at it
+    (None) or, without force, nothing changed since the last clean pass
+    ((0, 0, 0)).
+    """
+    with advisory_lock() as locked:
+        if not locked:
+            return None
+        marker = precompute_marker()
+        if not force and not needs_precomputing(marker):
+            return 0, 0, 0
+        result = precompute_saved_reports()
+        if not result[2]:
+            mark_precomputed(marker)
+        return result
+
+
+class SavedReportScheduler(threading.Thread):
+    def __init__(self, interval):
+        super().__init__(name='saved-report-scheduler', daemon=True)
+        self.interval = interval
+        self.wakeup = threading.Event()
+        self.pid = os.getpid()
+
+    def wake(self):
+        self.wakeup.set()
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            try:
+                result = run_pending()
+                if result and (result[0] or result[2]):
+                    logger.info('Saved reports: %s written, %s up to date, %s failed', *result)
+            except Exception:
+                logger.exception('Saved report precomputation failed')
+            finally:
+                # Idle between ticks without holding a connection
+                connection.close()
+
+
+scheduler = None
+
+
+def start_scheduler():
+    global scheduler
+    if not getattr(settings, 'REPORTS_SAVED_REPORTS_SCHEDULER', True):
+        return None
+    if scheduler is None or scheduler.pid != os.getpid():
+        scheduler = SavedReportScheduler(getattr(settings, 'REPORTS_SAVED_REPORTS_POLL_INTERVAL', 60))
+        scheduler.start()
+    return scheduler
+
+
+def wake_scheduler():
+    if scheduler is not None and scheduler.pid == os.getpid():
+        scheduler.wake()
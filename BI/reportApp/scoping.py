@@ -0,0 +1,98 @@
+# reportApp/scoping.py
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import AccountBase
+
+BANK_WIDE_PERMISSION = 'userManagement.view_all_branches'
+REGION_PERMISSION = 'userManagement.view_region_accounts'
+
+
+class AccountScope:
+    """
+    Rows of account_base (or its rollups) a user may see. An unrestricted
+    scope applies no filter; otherwise rows must match one of the allowed
+    values of `field` (branch_code or region), which rides the
+    (branch_code, report_date) / (region, report_date) indexes.
+    """
+
+    def __init__(self, field=None, values=()):
+        self.field = field
+        self.values = tuple(sorted(values))
+
+    @property
+    def unrestricted(self):
+        return self.field is None
+
+    def apply(self, queryset):
+        if self.unrestricted:
+            return queryset
+        return queryset.filter(**{f'{self.field}__in': self.values})
+
+    def sql(self, alias=None):
+        """(sql, params) fragment restricting a raw account_base query; starts with AND."""
+        if self.unrestricted:
+            return '', []
+        column = f'{alias}.{self.field}' if alias else self.field
+        return f' AND {column} = ANY(%s)', [list(self.values)]
+
+    def as_dict(self):
+        if self.unrestricted:
+            return {'type': 'bank'}
+        return {'type': self.field, 'values': list(self.values)}
+
+    @classmethod
+    def from_dict(cls, data):
+        if data['type'] == 'bank':
+            return cls()
+        return cls(data['type'], data['values'])
+
+
+UNRESTRICTED = AccountScope()
+
+
+def scope_cache_key(user):
+    return f'reportApp:scope:{user.pk}'
+
+
+def compute_scope(user):
+    if user.is_superuser or user.has_perm(BANK_WIDE_PERMISSION):
+        return UNRESTRICTED
+    branch_code = getattr(user, 'branch_id', None)
+    if not branch_code:
+        # No branch assigned: nothing is visible
+        return AccountScope('branch_code', ())
+    if user.has_perm(REGION_PERMISSION):
+        regions = (
+            AccountBase.objects.filter(branch_code=branch_code, region__isnull=False)
+            .values_list('region', flat=True)
+            .distinct()
+        )
+        return AccountScope('region', regions)
+    return AccountScope('branch_code', [branch_code])
+
+
+def resolve_scope(user):
+    """Resolve (and cache per user) the account_base scope of a request user."""
+    if not user or not user.is_authenticated:
+        # Only reachable with permission checks disabled in DEVELOPMENT
+        if getattr(settings, 'DEVELOPMENT', False):
+            return UNRESTRICTED
+        return AccountScope('branch_code', ())
+
+    key = scope_cache_key(user)
+    cached = cache.get(key)
+    if cached is not None:
+        return AccountScope.from_dict(cached)
+
+    scope = compute_scope(user)
+    cache.set(key, scope.as_dict(), getattr(settings, 'REPORTS_SCOPE_CACHE_TIMEOUT', 300))
+    return scope
+
+
+def invalidate_scope(user):
+    cache.delete(scope_cache_key(user))
+
+
+def invalidate_scopes(users):
+    cache.delete_many([scope_cache_key(user) for user in users])
@@ -1,6 +1,6 @@
 # reportApp/serializers.py
 from rest_framework import serializers
-from .models import AccountBase
+from .models import AccountBase, SavedReport
 from decimal import Decimal, InvalidOperation
 
 class SafeDecimalField(serializers.DecimalField):
@@ -55,4 +55,53 @@ class AccountBaseSummarySerializer(serializers.ModelSerializer):
 "ultimate_ben",
 "cust_type",
 "report_date",
-"report_time"]
\ No newline at end of file
+"report_time"]
+
+class SavedReportSerializer(serializers.ModelSerializer):
+    owner = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta:
+        model = SavedReport
+        fields = ['id', 'name', 'owner', 'role', 'filters', 'fields', 'ordering', 'format', 'created_at', 'updated_at']
+        read_only_fields = ['created_at', 'updated_at']
+
+    def validate_filters(self, value):
+        from .saved_reports import FILTER_FIELDS, BALANCE_FILTERS
+
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('filters must be an object')
+        for name, filter_value in value.items():
+            if name in BALANCE_FILTERS:
+                try:
+                    Decimal(str(filter_value))
+                except InvalidOperation:
+                    raise serializers.ValidationError(f'{name} must be a number')
+            elif name not in FILTER_FIELDS:
+                raise serializers.ValidationError(
+                    f"Unknown filter {name}; use {', '.join(FILTER_FIELDS + list(BALANCE_FILTERS))}"
+                )
+            elif not (isinstance(filter_value, str) or (
+                isinstance(filter_value, list) and filter_value and all(isinstance(v, str) for v in filter_value)
+            )):
+                raise serializers.ValidationError(f'{name} must be a string or a non-empty list of strings')
+        return value
+
+    def validate_fields(self, value):
+        from .saved_reports import PROJECTION_FIELDS
+
+        if not isinstance(value, list) or not all(isinstance(name, str) for name in value):
+            raise serializers.ValidationError('fields must be a list of column names')
+        unknown = [name for name in value if name not in PROJECTION_FIELDS]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown fields: {', '.join(unknown)}")
+        return value
+
+    def validate_ordering(self, value):
+        from .saved_reports import ORDER_FIELDS
+
+        if not isinstance(value, list) or not all(isinstance(name, str) for name in value):
+            raise serializers.ValidationError('ordering must be a list of field names')
+        unknown = [name for name in value if name.lstrip('-') not in ORDER_FIELDS]
+        if unknown:
+            raise serializers.ValidationError(f"Cannot order by {', '.join(unknown)}; use {', '.join(ORDER_FIELDS)}")
+        return value
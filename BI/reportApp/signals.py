@@ -0,0 +1,100 @@
+# reportApp/signals.py
+from django.conf import settings
+from django.db import connection
+from django.db.models.signals import post_save
+from django.dispatch import Signal, receiver
+
+from .caching import invalidate_snapshot_cache
+from .models import AccountBase
+from userManagement.signals import users_auth_changed
+
+# Sent after account_base snapshots are (re)loaded.
+# Arguments: report_dates (list of dates replaced), row_count
+snapshot_loaded = Signal()
+
+
+@receiver(snapshot_loaded)
+def refresh_snapshot_rollups(sender, report_dates, **kwargs):
+    from .rollups import snapshot_dates, refresh_rollups
+
+    # The following snapshot's opening cohort depends on the reloaded one
+    all_dates = snapshot_dates()
+    targets = set(report_dates)
+    for report_date in report_dates:
+        later = [d for d in all_dates if d > report_date]
+        if later:
+            targets.add(later[0])
+    refresh_rollups(dates=targets)
+
+
+@receiver(snapshot_loaded)
+def export_olap_snapshots(sender, report_dates, **kwargs):
+    from . import olap
+
+    # Runs before the cache generation moves so no result is cached from a stale file
+    if olap.backend_enabled():
+        olap.export_snapshots(dates=report_dates)
+
+
+@receiver(snapshot_loaded)
+def invalidate_snapshot_caches(sender, **kwargs):
+    invalidate_snapshot_cache()
+
+
+@receiver(snapshot_loaded)
+def analyze_account_base(sender, **kwargs):
+    # Refresh planner statistics so the new snapshot gets index scans right away
+    with connection.cursor() as cursor:
+        cursor.execute(f"ANALYZE {AccountBase._meta.db_table}")
+
+
+@receiver(snapshot_loaded)
+def rebuild_columnar_snapshot(sender, **kwargs):
+    from . import columnar
+
+    # The engine only holds the latest snapshot; rebuilding is idempotent
+    if columnar.engine_enabled():
+        columnar.build_snapshot()
+
+
+@receiver(snapshot_loaded)
+def warm_report_caches(sender, **kwargs):
+    from .warming import warm_caches
+
+    # Last receiver: rollups, exports and the new cache generation are in place
+    if getattr(settings, 'REPORTS_WARM_ON_LOAD', False):
+        warm_caches()
+
+
+@receiver(snapshot_loaded)
+def announce_snapshot(sender, report_dates, **kwargs):
+    from .notifications import publish_snapshot
+
+    # After warming, so subscribers asking for stats are served from the cache
+    publish_snapshot(report_dates)
+
+
+@receiver(snapshot_loaded)
+def expire_saved_report_artifacts(sender, report_dates, **kwargs):
+    from .models import SavedReportArtifact
+    from .saved_reports import discard_artifacts
+    from .scheduler import wake_scheduler
+
+    # Reloaded snapshots: the scheduler re-renders them on its next tick
+    discard_artifacts(SavedReportArtifact.objects.filter(report_date__in=report_dates))
+    wake_scheduler()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def reset_user_scope(sender, instance, **kwargs):
+    # Branch or role changes must not wait for the scope cache to expire
+    from .scoping import invalidate_scope
+
+    invalidate_scope(instance)
+
+
+@receiver(users_auth_changed)
+def reset_users_scopes(sender, users, **kwargs):
+    from .scoping import invalidate_scopes
+
+    invalidate_scopes(users)
@@ -0,0 +1,113 @@
+# reportApp/sketches.py
+"""
+HyperLogLog sketches of customer_no, stored per rollup row.
+
+Every account_base_rollup row keeps the non-empty registers of its
+snapshot/dimension combination as a sparse int[] (register index << 6 |
+rank). Registers merge by taking the maximum rank per index, so any set of
+rollup rows (several branches, products or snapshots) yields the sketch of
+their union without touching account_base. The hash is PostgreSQL's 64-bit
+hashtextextended(customer_no, 0).
+
+Counts are estimated from the histogram of register ranks with Ertl's
+improved estimator ("New cardinality estimation algorithms for
+HyperLogLog sketches", 2017), which has no bias bump in the range where the
+raw estimator hands over to linear counting, so no empirical bias tables
+are needed. With PRECISION = 14 (16384 registers) the relative standard
+error is 1.04 / sqrt(16384) ~= 0.81%: about 68% of estimates are within
+0.81% of the true count and 99.7% within 2.4%. Small counts are close to
+exact.
+"""
+import math
+
+from django.db import connection
+
+PRECISION = 14
+REGISTERS = 1 << PRECISION
+RELATIVE_ERROR = 1.04 / math.sqrt(REGISTERS)
+
+# Bits of the hash left for the rank once the sign bit and index are dropped
+RANK_BITS = 63 - PRECISION
+
+
+def index_sql(column):
+    return f"(hashtextextended({column}, 0) & {REGISTERS - 1})"
+
+
+def rank_sql(column):
+    """Position of the leftmost 1 in the rank bits (RANK_BITS + 1 when they are all zero)."""
+    bits = f"((hashtextextended({column}, 0) >> {PRECISION}) & {(1 << RANK_BITS) - 1})"
+    return f"({RANK_BITS + 1} - length(ltrim({bits}::bit(64)::text, '0')))"
+
+
+def sigma(x):
+    if x == 1:
+        return math.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous, z = z, z + x * y
+        y += y
+        if z == previous:
+            return z
+
+
+def tau(x):
+    if x == 0 or x == 1:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = math.sqrt(x)
+        y *= 0.5
+        previous, z = z, z - (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+
+def estimate(rank_counts):
+    """
+    Cardinality from the merged registers, given as {rank: number of
+    registers}; registers missing from it are empty (rank 0).
+    """
+    counts = [0] * (RANK_BITS + 2)
+    for rank, registers in rank_counts.items():
+        counts[rank] += registers
+    counts[0] = REGISTERS - sum(counts[1:])
+    if counts[0] == REGISTERS:
+        return 0
+    z = REGISTERS * tau(1 - counts[RANK_BITS + 1] / REGISTERS)
+    for rank in range(RANK_BITS, 0, -1):
+        z = 0.5 * (z + counts[rank])
+    z += REGISTERS * sigma(counts[0] / REGISTERS)
+    return round(REGISTERS * REGISTERS / (2 * math.log(2)) / z)
+
+
+def merged_estimates(rollups, group_by=None):
+    """
+    Estimated distinct customer_no per group_by value over a rollup queryset
+    (already filtered by snapshot, dimensions and scope); a single None key
+    without group_by. Returns None when some matching rollup row has not
+    been sketched yet, so callers can fall back to an exact count.
+    """
+    if rollups.filter(customer_sketch__isnull=True).exists():
+        return None
+    columns = [group_by, 'customer_sketch'] if group_by else ['customer_sketch']
+    rows_sql, params = rollups.order_by().values(*columns).query.sql_with_params()
+    group = group_by or 'NULL::text'
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            SELECT grp, rank, COUNT(*)
+            FROM (
+                SELECT {group} AS grp, register >> 6 AS idx, MAX(register & 63) AS rank
+                FROM ({rows_sql}) r, unnest(r.customer_sketch) AS register
+                GROUP BY 1, 2
+            ) merged
+            GROUP BY grp, rank
+        """, params)
+        histograms = {}
+        for value, rank, registers in cursor.fetchall():
+            histograms.setdefault(value, {})[rank] = registers
+    estimates = {value: estimate(rank_counts) for value, rank_counts in histograms.items()}
+    if not group_by:
+        estimates.setdefault(None, 0)
+    return estimates
@@ -1,3 +1,701 @@
-from django.test import TestCase
+import asyncio
+import csv
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+from userManagement.authentication import ClaimsUser
+from userManagement.models import AppPermission, Branch, CustomUser, Role
+from userManagement.tokens import ClaimsRefreshToken
+
+from . import columnar, olap
+from .caching import SNAPSHOT_GENERATION_KEY, latest_snapshot_date, snapshot_cache_key, snapshot_version
+from .coalescing import SingleFlight, SingleFlightError, SingleFlightTimeout, coalesce, shared_result
+from .diff import SnapshotDiff
+from .loader import load_snapshot
+from .models import AccountBase, SavedReport, SnapshotGeneration
+from .notifications import SnapshotHub, event_stream, hub, publish_snapshot
+from .rollups import refresh_rollups
+from .saved_reports import artifact_path, write_artifact
+from .scheduler import run_pending
+from .scoping import UNRESTRICTED, AccountScope
+from .sketches import RELATIVE_ERROR, estimate, index_sql, rank_sql
+from .views import AccountBaseViewSet, SavedReportViewSet
+from .warming import access_log, hottest_entries, warm_entry
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+SNAPSHOTS = [datetime.date(2025, 3, 1), datetime.date(2025, 3, 2), datetime.date(2025, 3, 5)]
+
+
+def snapshot_rows(report_date, index):
+    """Deterministic accounts: some open, close or move branch between snapshots."""
+    rows = []
+    for number in range(60):
+        if (number + index) % 17 == 0:
+            continue
+        branch = number % 4 if number % 11 else (number + index) % 4
+        balance = None if number % 13 == 0 else Decimal(number * 1000 + index * 37) / 100
+        rows.append(AccountBase(
+            account_number=f'{1000 + number}',
+            customer_no=f'C{number % 25:03d}',
+            customer_name=f'Customer {number % 25}' if number % 9 else '',
+            category='SAV' if number % 3 else 'CUR',
+            product_name=f'Product {number % 5}',
+            currency='USD' if number % 7 else None,
+            working_balance=balance,
+            opening_date=report_date - datetime.timedelta(days=number % 6),
+            branch_code=f'B{branch:02d}',
+            branch_name=f'Branch {branch}',
+            region=f'R{branch % 2}',
+            cust_type='IND' if number % 2 else 'CORP',
+            report_date=report_date,
+            report_time=datetime.time(18, 30),
+        ))
+    return rows
+
+
+def write_extract(path, rows):
+    """Write rows as a snapshot extract that load_snapshot accepts."""
+    columns = [field.column for field in AccountBase._meta.concrete_fields]
+    with open(path, 'w', newline='') as out:
+        writer = csv.writer(out)
+        writer.writerow(columns)
+        for row in rows:
+            writer.writerow(['' if getattr(row, column) is None else getattr(row, column) for column in columns])
+
+
+def get(action, params=None):
+    return AccountBaseViewSet.as_view({'get': action})(APIRequestFactory().get('/', params or {}))
+
+
+class AccountBaseTestCase(TestCase):
+    """TestCase with the account_base table created for the duration of the class."""
+
+    @classmethod
+    def setUpClass(cls):
+        # account_base is unmanaged, so the test database does not have it; like
+        # the real table it holds each account once per snapshot, without a key
+        with connection.schema_editor() as editor:
+            editor.create_model(AccountBase)
+            editor.execute(f'ALTER TABLE {AccountBase._meta.db_table} DROP CONSTRAINT {AccountBase._meta.db_table}_pkey')
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.schema_editor() as editor:
+            editor.delete_model(AccountBase)
+
+    def setUp(self):
+        cache.clear()
+
+
+@unittest.skipUnless(duckdb, 'duckdb is not installed')
+@override_settings(DEVELOPMENT=True, REPORTS_OLAP_BACKEND=False)
+class OlapBackendTests(AccountBaseTestCase):
+    """Actions routed to the DuckDB/Parquet backend return the PostgreSQL payloads unchanged."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.olap_dir = tempfile.mkdtemp()
+        cls.settings_override = override_settings(REPORTS_OLAP_DIR=cls.olap_dir)
+        cls.settings_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.settings_override.disable()
+        shutil.rmtree(cls.olap_dir, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        for index, report_date in enumerate(SNAPSHOTS):
+            AccountBase.objects.bulk_create(snapshot_rows(report_date, index))
+        refresh_rollups()
+        olap.export_snapshots(full=True)
+
+    def get(self, action, params, backend):
+        cache.clear()
+        with override_settings(REPORTS_OLAP_BACKEND=backend):
+            self.assertEqual(olap.serves(), backend)
+            request = APIRequestFactory().get('/', params)
+            response = AccountBaseViewSet.as_view({'get': action})(request)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assertSamePayload(self, action, params):
+        self.assertEqual(self.get(action, params, False).data, self.get(action, params, True).data)
+
+    def test_export_writes_one_file_per_snapshot(self):
+        self.assertEqual(olap.exported_dates(), set(SNAPSHOTS))
+
+    def test_stats(self):
+        self.assertSamePayload('stats', {})
+        self.assertSamePayload('stats', {'report_date': '2025-03-02'})
+        self.assertSamePayload('stats', {'report_date': 'latest', 'region': 'R1', 'currency': 'USD'})
+
+    def test_trend(self):
+        self.assertSamePayload('trend', {})
+        self.assertSamePayload('trend', {'date_from': '2025-03-02', 'branch_code': 'B01'})
+        self.assertSamePayload('trend', {'date_to': '2025-03-02', 'cust_type': 'CORP'})
+
+    def test_diff(self):
+        self.assertSamePayload('diff', {'from': '2025-03-01', 'to': '2025-03-05'})
+        self.assertSamePayload('diff', {
+            'from': '2025-03-01', 'to': '2025-03-02', 'threshold': '5',
+            'fields': 'branch_code,currency', 'after': '1010', 'limit': '7',
+        })
+
+    def test_diff_rows_under_scope(self):
+        scope = AccountScope('branch_code', ['B01', 'B02'])
+        postgres = SnapshotDiff(SNAPSHOTS[0], SNAPSHOTS[2], scope=scope)
+        with override_settings(REPORTS_OLAP_BACKEND=True):
+            duck = olap.OlapSnapshotDiff(SNAPSHOTS[0], SNAPSHOTS[2], scope=scope)
+            self.assertEqual(postgres.summary(), duck.summary())
+            self.assertEqual(list(postgres.iter_rows(chunk_size=5)), list(duck.iter_rows(chunk_size=5)))
+
+    def test_missing_snapshot_falls_back_to_postgres(self):
+        with override_settings(REPORTS_OLAP_BACKEND=True):
+            self.assertFalse(olap.serves([SNAPSHOTS[0], datetime.date(2025, 3, 3)]))
+            self.assertTrue(olap.serves(SNAPSHOTS[:2]))
+
+
+@unittest.skipUnless(numpy, 'numpy is not installed')
+@override_settings(DEVELOPMENT=True, REPORTS_COLUMNAR_ENGINE=False)
+class ColumnarEngineTests(AccountBaseTestCase):
+    """stats and facets served by the columnar engine return the PostgreSQL payloads unchanged."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.columnar_dir = tempfile.mkdtemp()
+        cls.settings_override = override_settings(REPORTS_COLUMNAR_DIR=cls.columnar_dir)
+        cls.settings_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.settings_override.disable()
+        shutil.rmtree(cls.columnar_dir, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        rows = snapshot_rows(SNAPSHOTS[0], 0)
+        # A branch with only NULL balances, and two branches tied on their total
+        for number, (branch, balance) in enumerate([('B07', None), ('B07', None), ('B08', 5), ('B09', 5)]):
+            rows.append(AccountBase(
+                account_number=f'{2000 + number}', branch_code=branch, branch_name=f'Branch {branch[1:]}',
+                product_name='Product 9', working_balance=balance, region='R0', report_date=SNAPSHOTS[0],
+            ))
+        AccountBase.objects.bulk_create(rows)
+        refresh_rollups()
+        columnar.build_snapshot()
+
+    def get(self, action, params, engine):
+        cache.clear()
+        with override_settings(REPORTS_COLUMNAR_ENGINE=engine):
+            self.assertEqual(columnar.snapshot_for(SNAPSHOTS[0]) is not None, engine)
+            response = get(action, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def assertSamePayload(self, action, params):
+        self.assertEqual(self.get(action, params, False).data, self.get(action, params, True).data)
+
+    def test_stats(self):
+        self.assertSamePayload('stats', {'report_date': 'latest'})
+        self.assertSamePayload('stats', {'report_date': 'latest', 'region': 'R0'})
+        self.assertSamePayload('stats', {'report_date': 'latest', 'branch_code': 'B07'})
+
+    def test_all_null_group_has_no_total_and_sorts_first(self):
+        by_branch = self.get('stats', {'report_date': 'latest'}, True).data['by_branch']
+        self.assertEqual(by_branch[0], {'branch_name': 'Branch 07', 'count': 2, 'total_balance': None})
+
+    def test_facets(self):
+        self.assertSamePayload('facets', {})
+        self.assertSamePayload('facets', {'region': 'R0'})
+
+
+@override_settings(DEVELOPMENT=True, REPORTS_ACCESS_LOG=False)
+class ResponseCacheTests(AccountBaseTestCase):
+    """Warmable responses are cached per snapshot generation and dropped by a load."""
+
+    @classmethod
+    def setUpTestData(cls):
+        for index, report_date in enumerate(SNAPSHOTS[:2]):
+            AccountBase.objects.bulk_create(snapshot_rows(report_date, index))
+        refresh_rollups()
+
+    def test_repeated_request_is_served_from_cache(self):
+        first = get('stats', {'report_date': 'latest'})
+        self.assertEqual(first.status_code, 200)
+        with self.assertNumQueries(0):
+            second = get('stats', {'report_date': 'latest'})
+        self.assertEqual(second.data, first.data)
+
+    def test_load_moves_the_generation_and_drops_cached_responses(self):
+        before = get('stats', {'report_date': 'latest'}).data
+        version = snapshot_version()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'extract.csv')
+        write_extract(path, snapshot_rows(SNAPSHOTS[2], 2)[:10])
+        load_snapshot(path)
+
+        self.assertNotEqual(snapshot_version(), version)
+        after = get('stats', {'report_date': 'latest'}).data
+        self.assertEqual(after['total_accounts'], 10)
+        self.assertNotEqual(after, before)
+
+    def test_load_in_another_process_is_seen_once_the_generation_expires(self):
+        cached = get('stats', {}).data
+        # Another process's load only moves the shared row; this process still holds the old generation
+        AccountBase.objects.filter(report_date=SNAPSHOTS[1]).delete()
+        SnapshotGeneration.objects.filter(pk=1).update(version=F('version') + 1)
+        self.assertEqual(get('stats', {}).data, cached)
+
+        cache.delete(SNAPSHOT_GENERATION_KEY)  # REPORTS_SNAPSHOT_GENERATION_TTL ran out
+        self.assertEqual(get('stats', {}).data['total_accounts'], AccountBase.objects.count())
+
+    @override_settings(REPORTS_ACCESS_LOG=True)
+    def test_warm_entry_replays_into_the_cache(self):
+        params = {'report_date': 'latest', 'region': 'R1'}
+        expected = get('stats', params).data
+        access_log.flush()
+        cache.clear()
+
+        query = [[name, [value]] for name, value in sorted(params.items())]
+        entry = next(entry for entry in hottest_entries() if entry['action'] == 'stats' and entry['query'] == query)
+        # Warmer threads close their connection; this one holds the test transaction
+        with mock.patch('reportApp.warming.connection'):
+            self.assertEqual(warm_entry(entry), 200)
+        with override_settings(REPORTS_ACCESS_LOG=False), self.assertNumQueries(0):
+            self.assertEqual(get('stats', params).data, expected)
+
+    def test_stats_takes_a_single_lease(self):
+        with mock.patch('reportApp.coalescing.shared_result', wraps=shared_result) as leases:
+            self.assertEqual(get('stats', {'region': 'R0'}).status_code, 200)
+        self.assertEqual(leases.call_count, 1)
+
+    @override_settings(REPORTS_SINGLE_FLIGHT_TIMEOUT=0.2)
+    def test_lease_held_elsewhere_times_out_with_503(self):
+        key = snapshot_cache_key(
+            'response:stats', query=[('region', ['R1'])], scope=UNRESTRICTED.as_dict(), latest=latest_snapshot_date()
+        )
+        cache.add(f'{key}:lease', 'another-worker', 60)
+        response = get('stats', {'region': 'R1'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+
+
+class SingleFlightTests(SimpleTestCase):
+    """Coalescing across workers, each simulated by its own SingleFlight over the shared cache."""
+
+    def setUp(self):
+        cache.clear()
+
+    def run_workers(self, leader_compute, waiter_compute):
+        """Start the leader, then a second worker once the leader holds the lease; returns both outcomes."""
+        outcomes = {}
+
+        def worker(name, compute):
+            try:
+                outcomes[name] = ('result', SingleFlight().run('report', compute))
+            except Exception as e:
+                outcomes[name] = ('error', e)
+
+        leader = threading.Thread(target=worker, args=('leader', leader_compute))
+        leader.start()
+        while cache.get('report:lease') is None:
+            time.sleep(0.01)
+        waiter = threading.Thread(target=worker, args=('waiter', waiter_compute))
+        waiter.start()
+        leader.join()
+        waiter.join()
+        return outcomes
+
+    def test_waiter_reads_the_leaders_result(self):
+        release = threading.Event()
+
+        def leader_compute():
+            release.wait(5)
+            return {'total': 42}
+
+        waiter_compute = mock.Mock(return_value={'total': 0})
+        timer = threading.Timer(0.2, release.set)
+        timer.start()
+        outcomes = self.run_workers(leader_compute, waiter_compute)
+        timer.join()
+
+        self.assertEqual(outcomes['leader'], ('result', {'total': 42}))
+        self.assertEqual(outcomes['waiter'], ('result', {'total': 42}))
+        waiter_compute.assert_not_called()
+        self.assertIsNone(cache.get('report:lease'))
+
+    def test_leader_error_reaches_the_waiter(self):
+        def leader_compute():
+            time.sleep(0.2)
+            raise ValueError('boom')
+
+        waiter_compute = mock.Mock()
+        outcomes = self.run_workers(leader_compute, waiter_compute)
+
+        self.assertIsInstance(outcomes['leader'][1], ValueError)
+        _, error = outcomes['waiter']
+        self.assertIsInstance(error, SingleFlightError)
+        self.assertEqual(str(error), 'ValueError: boom')
+        waiter_compute.assert_not_called()
+
+    @override_settings(REPORTS_SINGLE_FLIGHT_TIMEOUT=0.2)
+    def test_waiter_gives_up_after_the_timeout(self):
+        cache.add('report:lease', 'stuck-worker', 60)
+        started = time.monotonic()
+        with self.assertRaises(SingleFlightTimeout):
+            coalesce('report', mock.Mock())
+        self.assertLess(time.monotonic() - started, 2)
+
+    @override_settings(REPORTS_SINGLE_FLIGHT_TIMEOUT=5)
+    def test_expired_lease_of_a_crashed_worker_is_taken_over(self):
+        cache.add('report:lease', 'crashed-worker', 0.3)
+        self.assertEqual(coalesce('report', lambda: 'fresh'), 'fresh')
+
+
+def snapshot_event(report_date, version=1):
+    return {'report_date': report_date, 'loaded': {'first': report_date, 'last': report_date, 'count': 1}, 'version': version}
+
+
+@mock.patch('reportApp.notifications.uses_listen', return_value=False)
+class SnapshotEventTests(SimpleTestCase):
+    """Per-worker fan-out of snapshot events and the SSE stream built on it."""
+
+    def test_publish_reaches_every_subscriber_with_the_latest_event_only(self, uses_listen):
+        async def scenario():
+            fanout = SnapshotHub()
+            queues = [await fanout.subscribe() for _ in range(3)]
+            fanout.unsubscribe(queues.pop())
+            fanout.publish(json.dumps(snapshot_event('2025-03-01')))
+            fanout.publish(json.dumps(snapshot_event('2025-03-02', version=2)))
+            return [queue.get_nowait() for queue in queues], [queue.empty() for queue in queues], fanout
+
+        received, drained, fanout = asyncio.run(scenario())
+        self.assertEqual(received, [snapshot_event('2025-03-02', version=2)] * 2)
+        self.assertEqual(drained, [True, True])
+        self.assertEqual(len(fanout.subscribers), 2)
+
+    def collect(self, stream):
+        async def drain():
+            return [chunk async for chunk in stream]
+        return asyncio.run(drain())
+
+    def test_stream_ends_with_an_expired_event_at_token_expiry(self, uses_listen):
+        with mock.patch.object(hub, 'latest', snapshot_event('2025-03-02')):
+            chunks = self.collect(event_stream(UNRESTRICTED, False, time.time() + 0.2))
+        self.assertTrue(chunks[0].startswith('retry: '))
+        self.assertIn('event: snapshot\n', chunks[1])
+        self.assertEqual(chunks[-1], 'event: expired\ndata: {}\n\n')
+        self.assertFalse(hub.subscribers)
+
+    def test_failed_stats_are_sent_as_null_and_retried(self, uses_listen):
+        failures = iter([RuntimeError('database unavailable')])
+
+        def flaky_stats(event, scope):
+            for error in failures:
+                raise error
+            return {'total_accounts': 1}
+
+        event = snapshot_event('2025-03-02')
+        with mock.patch('reportApp.notifications.snapshot_stats', flaky_stats), \
+                mock.patch.object(hub, 'stats_tasks', {}), self.assertLogs('reportApp.notifications', 'ERROR'):
+            self.assertIsNone(asyncio.run(hub.stats(event, UNRESTRICTED)))
+            self.assertEqual(asyncio.run(hub.stats(event, UNRESTRICTED)), {'total_accounts': 1})
+
+
+@override_settings(DEVELOPMENT=True)
+class PublishSnapshotTests(AccountBaseTestCase):
+    """Announcing a load never fails it."""
+
+    def test_backfill_announcement_fits_the_notify_payload(self):
+        dates = [datetime.date(2020, 1, 1) + datetime.timedelta(days=day) for day in range(700)]
+        with self.assertNoLogs('reportApp.notifications', 'ERROR'):
+            publish_snapshot(dates)
+
+    def test_publish_failure_is_logged_not_raised(self):
+        oversized = {'padding': 'x' * 9000}
+        with mock.patch('reportApp.notifications.current_snapshot', return_value=oversized), \
+                self.assertLogs('reportApp.notifications', 'ERROR'):
+            publish_snapshot([SNAPSHOTS[0]])
+        # The failed NOTIFY did not break the surrounding transaction
+        self.assertEqual(AccountBase.objects.count(), 0)
+
+
+class SketchAccuracyTests(TestCase):
+    """HyperLogLog estimates from the SQL hash stay within the documented error, without bias."""
+
+    def estimate_series(self, count, prefix=''):
+        with connection.cursor() as cursor:
+            cursor.execute(f"""
+                SELECT rank, COUNT(*) FROM (
+                    SELECT {index_sql('value')}, MAX({rank_sql('value')}) AS rank
+                    FROM (SELECT %s || n::text AS value FROM generate_series(1, %s) n) series
+                    GROUP BY 1
+                ) registers
+                GROUP BY rank
+            """, [prefix, count])
+            return estimate(dict(cursor.fetchall()))
+
+    def test_error_within_three_standard_errors(self):
+        for count in [1000, 10000, 40000, 45000, 50000, 60000, 100000, 1000000]:
+            with self.subTest(count=count):
+                self.assertLessEqual(abs(self.estimate_series(count) / count - 1), 3 * RELATIVE_ERROR)
+
+    def test_no_bias_where_linear_counting_used_to_hand_over(self):
+        # Eight disjoint sets of 45k values; their mean error shrinks like 1/sqrt(8) unless biased
+        errors = [self.estimate_series(45000, f'{prefix}-') / 45000 - 1 for prefix in 'abcdefgh']
+        self.assertLess(abs(sum(errors) / len(errors)), RELATIVE_ERROR)
+
+    def test_empty_sketch(self):
+        self.assertEqual(estimate({}), 0)
+
+
+@override_settings(DEVELOPMENT=True, REPORTS_ACCESS_LOG=False)
+class DistinctCustomerTests(AccountBaseTestCase):
+    """stats?distinct_customers=true estimates agree with exact=true within the sketch error."""
+
+    @classmethod
+    def setUpTestData(cls):
+        AccountBase.objects.bulk_create([
+            AccountBase(
+                account_number=f'{number}', customer_no=f'C{number % 7000}', product_name=f'Product {number % 3}',
+                branch_code=f'B{number % 4:02d}', branch_name=f'Branch {number % 4}', region=f'R{number % 2}',
+                working_balance=Decimal(number), report_date=SNAPSHOTS[0],
+            )
+            for number in range(12000)
+        ])
+        refresh_rollups()
+
+    def test_estimates_match_exact_counts(self):
+        params = {'report_date': 'latest', 'distinct_customers': 'true'}
+        estimated = get('stats', params).data
+        exact = get('stats', dict(params, exact='true')).data
+        self.assertEqual(estimated['distinct_customers_method'], 'hll')
+        self.assertEqual(exact['distinct_customers_method'], 'exact')
+
+        def assertClose(estimate, actual):
+            self.assertLessEqual(abs(estimate - actual), 3 * RELATIVE_ERROR * actual)
+
+        assertClose(estimated['distinct_customers'], exact['distinct_customers'])
+        for section, column in (('by_branch', 'branch_name'), ('by_product', 'product_name')):
+            actual = {entry[column]: entry['distinct_customers'] for entry in exact[section]}
+            for entry in estimated[section]:
+                with self.subTest(section=section, group=entry[column]):
+                    assertClose(entry['distinct_customers'], actual[entry[column]])
+
+
+class SavedReportTestCase(AccountBaseTestCase):
+    """Saved reports of a teller role over one snapshot, with artifacts in a temporary directory."""
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        storage = override_settings(REPORTS_SAVED_REPORTS_DIR=directory)
+        storage.enable()
+        self.addCleanup(storage.disable)
+
+        AccountBase.objects.bulk_create(snapshot_rows(SNAPSHOTS[0], 0))
+        self.role = Role.objects.create(name='Tellers')
+        self.role.permissions.add(AppPermission.objects.create(name='View reports', codename='view_reports'))
+        branch = Branch.objects.create(branchCode='B01', branchName='Branch 1')
+        self.teller = CustomUser.objects.create_user('teller@example.com', role=self.role, branch=branch)
+        self.report = SavedReport.objects.create(name='Branch savings', role=self.role, filters={'category': 'SAV'})
+
+
+class SavedReportTests(SavedReportTestCase):
+    def test_clean_pass_is_recorded_for_every_worker(self):
+        self.assertEqual(run_pending()[:2], (1, 0))
+        # Another worker has its own (empty) cache but reads the same marker
+        cache.clear()
+        self.assertEqual(run_pending(), (0, 0, 0))
+
+        SavedReport.objects.create(name='Branch current', role=self.role, filters={'category': 'CUR'})
+        self.assertEqual(run_pending()[:2], (1, 1))
+
+    def test_json_artifact_keeps_decimal_balances(self):
+        report = SavedReport.objects.create(
+            name='Balances', owner=self.teller, format='json',
+            fields=['account_number', 'working_balance', 'opening_date'], ordering=['account_number'],
+        )
+        artifact = write_artifact(report, UNRESTRICTED, SNAPSHOTS[0])
+        with open(artifact_path(artifact), encoding='utf-8') as artifact_file:
+            rows = json.load(artifact_file)
+
+        expected = AccountBase.objects.order_by('account_number')
+        self.assertEqual(len(rows), expected.count())
+        for row, account in zip(rows, expected):
+            balance = account.working_balance
+            self.assertEqual(row['working_balance'], None if balance is None else f'{balance:.2f}')
+            self.assertEqual(row['opening_date'], account.opening_date.isoformat())
+
+
+def saved_report_request(user, method, action, pk=None, data=None):
+    actions = {
+        'list': {'get': 'list', 'post': 'create'},
+        'detail': {'patch': 'partial_update', 'delete': 'destroy'},
+        'open': {'get': 'open_report'},
+    }[action]
+    request = getattr(APIRequestFactory(), method)('/', data, format='json')
+    force_authenticate(request, user=user)
+    return SavedReportViewSet.as_view(actions)(request, pk=pk)
+
+
+@override_settings(DEVELOPMENT=False)
+class SavedReportViewSetTests(SavedReportTestCase):
+    def setUp(self):
+        super().setUp()
+        self.teller.user_permissions.add(self.grant('export_reports'))
+        self.colleague = CustomUser.objects.create_user('colleague@example.com', role=self.role, branch=self.teller.branch)
+        self.colleague.user_permissions.add(self.grant('manage_role'))
+        self.own = SavedReport.objects.create(name='My accounts', owner=self.teller, format='json')
+
+    def grant(self, codename):
+        return Permission.objects.create(
+            codename=codename, name=codename, content_type=ContentType.objects.get_for_model(CustomUser)
+        )
+
+    def open(self, user, report):
+        response = saved_report_request(user, 'get', 'open', report.pk)
+        if response.status_code == 200:
+            b''.join(response.streaming_content)
+            # Not response.close(): that signals request_finished, which closes the test connection
+            response.file_to_stream.close()
+        return response
+
+    def test_lists_own_and_role_reports(self):
+        response = saved_report_request(self.colleague, 'get', 'list')
+        self.assertEqual([report['name'] for report in response.data], ['Branch savings'])
+        response = saved_report_request(self.teller, 'get', 'list')
+        self.assertEqual([report['name'] for report in response.data], ['Branch savings', 'My accounts'])
+
+    def test_only_the_owner_changes_an_owned_report(self):
+        superuser = CustomUser.objects.create_superuser('admin@example.com')
+        response = saved_report_request(superuser, 'patch', 'detail', self.own.pk, {'name': 'Renamed'})
+        self.assertEqual(response.status_code, 403)
+        response = saved_report_request(self.teller, 'patch', 'detail', self.own.pk, {'name': 'Renamed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['owner'], self.teller.pk)
+
+    def test_role_reports_require_manage_role(self):
+        response = saved_report_request(self.teller, 'delete', 'detail', self.report.pk)
+        self.assertEqual(response.status_code, 403)
+        shared = {'name': 'Shared', 'role': str(self.role.pk)}
+        response = saved_report_request(self.teller, 'post', 'list', data=shared)
+        self.assertEqual(response.status_code, 403)
+
+        response = saved_report_request(self.colleague, 'post', 'list', data=shared)
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNone(response.data['owner'])
+        response = saved_report_request(self.colleague, 'delete', 'detail', self.report.pk)
+        self.assertEqual(response.status_code, 204)
+
+    def test_csv_reports_require_export_reports(self):
+        self.assertEqual(self.open(self.colleague, self.report).status_code, 403)
+        self.assertEqual(self.open(self.colleague, self.own).status_code, 404)
+        self.assertEqual(self.open(self.teller, self.report).status_code, 200)
+
+    def test_serves_precomputed_artifacts_and_computes_missing_ones(self):
+        response = self.open(self.teller, self.own)
+        self.assertEqual(response['X-Report-Artifact'], 'computed')
+        self.assertEqual(response['X-Report-Date'], SNAPSHOTS[0].isoformat())
+        self.assertEqual(self.open(self.teller, self.own)['X-Report-Artifact'], 'precomputed')
+
+        run_pending()
+        self.assertEqual(self.open(self.teller, self.report)['X-Report-Artifact'], 'precomputed')
+
+        # A changed definition never serves the old artifact
+        saved_report_request(self.teller, 'patch', 'detail', self.own.pk, {'filters': {'region': 'R0'}})
+        self.assertEqual(self.open(self.teller, self.own)['X-Report-Artifact'], 'computed')
+
+
+@override_settings(DEVELOPMENT=False)
+class DashboardTests(AccountBaseTestCase):
+    """Widgets run on pool threads with their own connections, so they see none of the test rows."""
+
+    def setUp(self):
+        super().setUp()
+        role = Role.objects.create(name='Clerks')
+        role.permissions.add(AppPermission.objects.create(name='View accounts', codename='view_accountbase'))
+        branch = Branch.objects.create(branchCode='B01', branchName='Branch 1')
+        clerk = CustomUser.objects.create_user('clerk@example.com', role=role, branch=branch)
+        # Claims-backed like a real request, so permission checks need no query from the pool threads
+        self.principal = ClaimsUser(ClaimsRefreshToken.for_user(clerk).access_token)
+
+    def dashboard(self, widgets):
+        request = APIRequestFactory().post('/', {'widgets': widgets}, format='json')
+        force_authenticate(request, user=self.principal)
+        return AccountBaseViewSet.as_view({'post': 'dashboard'})(request)
+
+    def test_denied_widget_fails_alone(self):
+        response = self.dashboard([
+            {'name': 'me', 'action': 'permissions'},
+            {'name': 'totals', 'action': 'stats'},
+            {'name': 'health', 'action': 'health_check'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        widgets = response.data['widgets']
+        self.assertEqual(list(widgets), ['me', 'totals', 'health'])
+        self.assertEqual(widgets['me']['status'], 200)
+        self.assertEqual(widgets['me']['data']['scope'], AccountScope('branch_code', ['B01']).as_dict())
+        self.assertEqual(widgets['totals']['status'], 403)
+        self.assertIn('error', widgets['totals'])
+        self.assertEqual(widgets['health']['status'], 403)
+
+        response = self.dashboard([{'name': 'totals', 'action': 'stats'}])
+        self.assertEqual(response.data['widgets']['totals']['status'], 403)
+
+    def test_rejects_unknown_actions_and_duplicate_names(self):
+        for widgets, error in (
+            ([{'name': 'rows', 'action': 'export'}], 'Widget rows: action must be one of'),
+            ([{'name': 'rows', 'action': 'drop_table'}], 'Widget rows: action must be one of'),
+            ([{'name': 'me', 'action': 'permissions'}, {'name': 'me', 'action': 'list'}], 'Duplicate widget name: me'),
+        ):
+            with self.subTest(widgets=widgets):
+                response = self.dashboard(widgets)
+                self.assertEqual(response.status_code, 400)
+                self.assertTrue(response.data['error'].startswith(error))
+
+    def test_failing_widget_reports_500_without_failing_the_batch(self):
+        with mock.patch.object(AccountBaseViewSet, 'customer', side_effect=RuntimeError('boom')), \
+                self.assertLogs('reportApp.dashboard', 'ERROR') as logs:
+            response = self.dashboard([
+                {'name': 'me', 'action': 'permissions'},
+                {'name': 'profile', 'action': 'customer', 'params': {'customer_no': 'C001'}},
+            ])
+        self.assertEqual(response.status_code, 200)
+        widgets = response.data['widgets']
+        self.assertEqual(widgets['me']['status'], 200)
+        self.assertEqual(widgets['profile'], {'status': 500, 'error': 'Internal error'})
+        self.assertIn('Dashboard widget profile (customer) failed', logs.output[0])
@@ -1,11 +1,13 @@
 # reportApp/urls.py
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AccountBaseViewSet
+from .views import AccountBaseViewSet, SavedReportViewSet, snapshot_events
 
 router = DefaultRouter()
 router.register(r'account-base', AccountBaseViewSet, basename='account-base')
+router.register(r'saved-reports', SavedReportViewSet, basename='saved-reports')
 
 urlpatterns = [
+    path('snapshot-events/', snapshot_events, name='snapshot-events'),
     path('', include(router.urls)),
 ]
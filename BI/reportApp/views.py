@@ -4,15 +4,76 @@ from rest_framework.response import Response
 from rest_framework.permissions import BasePermission, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
-from django.db.models import Sum, Count, Q
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from django.db import connection
+from django.db.models import Sum, Count, Q, F, Max, Window
+from django.db.models.functions import RowNumber
+from BI.apidocs import swagger_auto_schema, openapi
+from django.http import StreamingHttpResponse, JsonResponse, FileResponse
+from django.utils.text import slugify
+from django.contrib.auth.models import AnonymousUser
+from django.core.handlers.asgi import ASGIRequest
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied, ValidationError
 from django.utils import timezone
+from django.utils.dateparse import parse_date
 from django.conf import settings
+from decimal import Decimal, InvalidOperation
 
-from .models import AccountBase
-from .serializers import AccountBaseSerializer, AccountBaseSummarySerializer
+from .models import AccountBase, AccountBaseRollup, SavedReport
+from .rollups import ROLLUP_DIMENSIONS
+from .diff import SnapshotDiff, DIFF_ATTRIBUTES, DIFF_COLUMNS
+from .caching import cached_snapshot_result
+from .coalescing import SingleFlightTimeout
+from .facets import facet_counts, latest_rollup_date
+from .distribution import balance_distribution, DEFAULT_PERCENTILES, MAX_BUCKETS_PER_DECADE
+from .concentration import concentration_metrics, DEFAULT_TOP, MAX_TOP
+from . import columnar, olap
+from .customers import customer_profiles
+from .sketches import merged_estimates, RELATIVE_ERROR
+from .scoping import resolve_scope
+from .warming import warmable
+from .dashboard import resolve_widgets, DASHBOARD_ACTIONS
+from .notifications import hub, event_stream
+from .serializers import AccountBaseSerializer, AccountBaseSummarySerializer, SavedReportSerializer
+from .saved_reports import (
+    artifact_path, current_artifact, discard_artifacts, discard_report, latest_report_date, write_artifact,
+    CONTENT_TYPES as SAVED_REPORT_CONTENT_TYPES,
+)
 from userManagement.permissions import CanViewAccountBase, CanViewReports, CanExportReports
+from userManagement.authentication import ClaimsJWTAuthentication
+
+
+def parse_flag(value):
+    """Interpret a boolean query parameter ('true', '1', 'yes'; anything else is false)."""
+    return (value or '').lower() in ('true', '1', 'yes')
+
+
+def parse_date_param(value):
+    """Parse a YYYY-MM-DD query parameter, returning None when it is invalid."""
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+# Columns top_per_group may partition and rank by
+TOP_N_GROUP_FIELDS = ROLLUP_DIMENSIONS
+TOP_N_ORDER_FIELDS = ['working_balance', 'opening_date', 'account_number']
+
+DISTINCT_CUSTOMER_PARAMETERS = [
+    openapi.Parameter('distinct_customers', openapi.IN_QUERY, description="Add distinct customer_no counts, merged from the rollup "
+                      "HyperLogLog sketches (relative standard error ~0.8%)", type=openapi.TYPE_BOOLEAN, default=False),
+    openapi.Parameter('exact', openapi.IN_QUERY, description="Count distinct customers exactly with COUNT(DISTINCT)", type=openapi.TYPE_BOOLEAN, default=False),
+]
+
+# Columns the balance distribution and concentration metrics may be split by
+DISTRIBUTION_GROUP_FIELDS = ROLLUP_DIMENSIONS
+
+
+class Echo:
+    """File-like object whose write() hands the row back for streaming CSV."""
+    def write(self, value):
+        return value
 
 
 # Custom OR permission
@@ -76,14 +137,53 @@ class AccountBaseViewSet(ReadOnlyModelViewSet):
         if getattr(settings, "DEVELOPMENT", False):
             # Development mode: allow everything
             return []
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'batch', 'facets', 'customer']:
             return [CanViewAccountBaseOrReports()]
-        elif self.action in ['stats', 'by_branch', 'high_balance', 'search_customer', 'recent_accounts', 'health_check']:
+        elif self.action in ['stats', 'trend', 'distribution', 'concentration', 'diff', 'by_branch', 'high_balance', 'top_per_group', 'search_customer', 'recent_accounts', 'health_check']:
             return [IsAuthenticated(), CanViewReports()]
-        elif self.action in ['export', 'permissions']:
+        elif self.action in ['export', 'permissions', 'dashboard']:
             return [IsAuthenticated()]
         return super().get_permissions()
 
+    def get_scope(self):
+        """Branch/region scope of the requesting user, resolved once per request."""
+        if not hasattr(self, '_scope'):
+            self._scope = resolve_scope(self.request.user)
+        return self._scope
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            # Schema generation (export_openapi_schema) runs without a request
+            return AccountBase.objects.none()
+        # Scope is applied in SQL before filtering, pagination, aggregation and export
+        return self.get_scope().apply(super().get_queryset())
+
+    def get_report_date(self, request):
+        """
+        Snapshot selected by the report_date query parameter, defaulting to the
+        latest one ('latest' selects it explicitly). Returns (report_date, error_response).
+        """
+        value = request.query_params.get('report_date')
+        if not value or value == 'latest':
+            return AccountBase.objects.aggregate(latest=Max('report_date'))['latest'], None
+        report_date = parse_date_param(value)
+        if report_date is None:
+            return None, Response(
+                {'error': 'report_date must be a valid date (YYYY-MM-DD)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return report_date, None
+
+    def handle_exception(self, exc):
+        if isinstance(exc, SingleFlightTimeout):
+            response = Response(
+                {'error': 'An identical report is still being computed; please retry shortly'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+            response['Retry-After'] = '5'
+            return response
+        return super().handle_exception(exc)
+
     def get_serializer_class(self):
         if self.action == 'list':
             return AccountBaseSummarySerializer
@@ -96,7 +196,8 @@ class AccountBaseViewSet(ReadOnlyModelViewSet):
     @action(detail=False, methods=['get'], url_path='health')
     def health_check(self, request):
         try:
-            count = AccountBase.objects.count()
+            # exists() stops at the first row instead of counting every snapshot
+            AccountBase.objects.exists()
             return  Response({"status": "ok"})
             # Response({
             #     'status': 'healthy',
@@ -132,6 +233,7 @@ class AccountBaseViewSet(ReadOnlyModelViewSet):
                 'role': user.role.name if user.role else None
             },
             'permissions': permissions_status,
+            'scope': self.get_scope().as_dict(),
             'accessible_endpoints': self.get_accessible_endpoints(permissions_status)
         })
 
@@ -145,11 +247,21 @@ class AccountBaseViewSet(ReadOnlyModelViewSet):
             'basic': {
                 'list': f'{base_url}' if accessible else None,
                 'detail': f'{base_url}{{account_number}}/' if accessible else None,
+                'batch': f'{base_url}batch/' if accessible else None,
+                'facets': f'{base_url}facets/' if accessible else None,
+                'customer': f'{base_url}customer/' if accessible else None,
+                'snapshot_events': '/api/reports/snapshot-events/' if accessible else None,
+                'saved_reports': '/api/reports/saved-reports/' if accessible else None,
             },
             'advanced': {
                 'stats': f'{base_url}stats/' if advanced else None,
+                'trend': f'{base_url}trend/' if advanced else None,
+                'distribution': f'{base_url}distribution/' if advanced else None,
+                'concentration': f'{base_url}concentration/' if advanced else None,
+                'diff': f'{base_url}diff/' if advanced else None,
                 'by_branch': f'{base_url}by_branch/' if advanced else None,
                 'high_balance': f'{base_url}high_balance/' if advanced else None,
+                'top_per_group': f'{base_url}top_per_group/' if advanced else None,
                 'search_customer': f'{base_url}search_customer/' if advanced else None,
                 'recent_accounts': f'{base_url}recent_accounts/' if advanced else None,
             },
@@ -158,36 +270,429 @@ class AccountBaseViewSet(ReadOnlyModelViewSet):
             },
             'system': {
                 'permissions': f'{base_url}permissions/',
+                'dashboard': f'{base_url}dashboard/',
                 'health': f'{base_url}health/',
             }
         }
 
     @swagger_auto_schema(
-        operation_description="Get account statistics",
+        operation_description="Get account statistics. With report_date (a date or 'latest') only that snapshot is "
+                              "aggregated, served from the in-memory columnar engine when it holds the snapshot. "
+                              "distinct_customers=true adds distinct customer counts merged from the rollup sketches.",
+        manual_parameters=[
+            openapi.Parameter('report_date', openapi.IN_QUERY, description="Snapshot (YYYY-MM-DD or 'latest'); all rows when omitted", type=openapi.TYPE_STRING),
+        ] + DISTINCT_CUSTOMER_PARAMETERS + [
+            openapi.Parameter(dimension, openapi.IN_QUERY, description=f"Filter by {dimension}", type=openapi.TYPE_STRING)
+            for dimension in ROLLUP_DIMENSIONS
+        ],
         responses={200: 'Statistics data'}
     )
     @action(detail=False, methods=['get'])
+    @warmable()
     def stats(self, request):
-        total_accounts = self.get_queryset().count()
-        total_balance = self.get_queryset().aggregate(
-            total=Sum('working_balance')
-        )['total'] or 0
-        
-        branch_stats = self.get_queryset().values('branch_name').annotate(
-            count=Count('account_number'),
-            total_balance=Sum('working_balance')
-        ).order_by('-total_balance')
-        
-        product_stats = self.get_queryset().values('product_name').annotate(
-            count=Count('account_number'),
-            total_balance=Sum('working_balance')
-        ).order_by('-total_balance')
-        
+        filters_applied = {
+            dimension: request.query_params[dimension]
+            for dimension in ROLLUP_DIMENSIONS
+            if request.query_params.get(dimension)
+        }
+        queryset = self.get_queryset().filter(**filters_applied)
+        rollups = self.get_scope().apply(AccountBaseRollup.objects.filter(**filters_applied))
+
+        report_date = None
+        if request.query_params.get('report_date'):
+            report_date, error = self.get_report_date(request)
+            if error:
+                return error
+            queryset = queryset.filter(report_date=report_date)
+            rollups = rollups.filter(report_date=report_date)
+
+        # Identical concurrent requests share one computation through @warmable
+        snapshot = columnar.snapshot_for(report_date)
+        if snapshot is not None:
+            result = snapshot.stats(filters_applied, self.get_scope())
+        elif olap.serves([report_date] if report_date else None):
+            result = olap.stats(report_date, filters_applied, self.get_scope())
+        else:
+            total_accounts = queryset.count()
+            total_balance = queryset.aggregate(
+                total=Sum('working_balance')
+            )['total'] or 0
+
+            branch_stats = queryset.values('branch_name').annotate(
+                count=Count('account_number'),
+                total_balance=Sum('working_balance')
+            ).order_by('-total_balance', 'branch_name')
+
+            product_stats = queryset.values('product_name').annotate(
+                count=Count('account_number'),
+                total_balance=Sum('working_balance')
+            ).order_by('-total_balance', 'product_name')
+
+            result = {
+                'total_accounts': total_accounts,
+                'total_balance': float(total_balance),
+                'by_branch': list(branch_stats),
+                'by_product': list(product_stats)
+            }
+
+        if parse_flag(request.query_params.get('distinct_customers')):
+            exact = parse_flag(request.query_params.get('exact'))
+            totals, method = self.distinct_customer_counts(queryset, rollups, exact=exact)
+            result['distinct_customers'] = totals.get(None, 0)
+            for section, column in (('by_branch', 'branch_name'), ('by_product', 'product_name')):
+                counts, _ = self.distinct_customer_counts(queryset, rollups, column, exact=exact or method == 'exact')
+                for entry in result[section]:
+                    entry['distinct_customers'] = counts.get(entry[column], 0)
+            self.describe_distinct_customers(result, method)
+
+        return Response(result)
+
+    def distinct_customer_counts(self, queryset, rollups, group_by=None, exact=False):
+        """
+        Distinct customer_no per group_by value (a single None key without
+        group_by) and the method used: merged HyperLogLog sketches of the
+        matching rollup rows, or COUNT(DISTINCT) over queryset when exact is
+        requested or some rollup rows have no sketch yet.
+        """
+        if not exact:
+            estimates = merged_estimates(rollups, group_by)
+            if estimates is not None:
+                return estimates, 'hll'
+        if group_by:
+            counts = queryset.order_by().values_list(group_by).annotate(customers=Count('customer_no', distinct=True))
+            return dict(counts), 'exact'
+        return {None: queryset.aggregate(customers=Count('customer_no', distinct=True))['customers']}, 'exact'
+
+    @staticmethod
+    def describe_distinct_customers(result, method):
+        result['distinct_customers_method'] = method
+        # Relative standard error of the sketches; see reportApp.sketches
+        result['distinct_customers_error'] = RELATIVE_ERROR if method == 'hll' else 0
+
+    @swagger_auto_schema(
+        operation_description="Balance and account-count series per report_date, served from the snapshot rollups",
+        manual_parameters=[
+            openapi.Parameter('date_from', openapi.IN_QUERY, description="First report_date (YYYY-MM-DD)", type=openapi.TYPE_STRING),
+            openapi.Parameter('date_to', openapi.IN_QUERY, description="Last report_date (YYYY-MM-DD)", type=openapi.TYPE_STRING),
+        ] + DISTINCT_CUSTOMER_PARAMETERS + [
+            openapi.Parameter(dimension, openapi.IN_QUERY, description=f"Filter by {dimension}", type=openapi.TYPE_STRING)
+            for dimension in ROLLUP_DIMENSIONS
+        ],
+        responses={200: 'Trend series'}
+    )
+    @action(detail=False, methods=['get'])
+    @warmable()
+    def trend(self, request):
+        queryset = self.get_scope().apply(AccountBaseRollup.objects.all())
+
+        date_range = {}
+        for param, lookup in (('date_from', 'report_date__gte'), ('date_to', 'report_date__lte')):
+            value = request.query_params.get(param)
+            if value:
+                parsed = parse_date_param(value)
+                if parsed is None:
+                    return Response(
+                        {'error': f'{param} must be a valid date (YYYY-MM-DD)'},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                queryset = queryset.filter(**{lookup: parsed})
+                date_range[param] = parsed
+
+        filters_applied = {}
+        for dimension in ROLLUP_DIMENSIONS:
+            value = request.query_params.get(dimension)
+            if value:
+                queryset = queryset.filter(**{dimension: value})
+                filters_applied[dimension] = value
+
+        if olap.serves():
+            rows = olap.trend_rows(filters=filters_applied, scope=self.get_scope(), **date_range)
+        else:
+            rows = queryset.values('report_date').annotate(
+                account_count=Sum('account_count'),
+                total_balance=Sum('total_balance'),
+                opened_count=Sum('opened_count')
+            ).order_by('report_date')
+
+        series = []
+        previous = None
+        for row in rows:
+            total_balance = row['total_balance'] or 0
+            point = {
+                'report_date': row['report_date'],
+                'account_count': row['account_count'],
+                'total_balance': float(total_balance),
+                'opened_count': row['opened_count'],
+                'account_change': None,
+                'balance_change': None,
+            }
+            if previous is not None:
+                point['account_change'] = row['account_count'] - previous['account_count']
+                point['balance_change'] = float(total_balance - (previous['total_balance'] or 0))
+            series.append(point)
+            previous = row
+
+        result = {
+            'filters': filters_applied,
+            'series': series
+        }
+        if parse_flag(request.query_params.get('distinct_customers')):
+            accounts = self.get_queryset().filter(report_date__isnull=False, **filters_applied)
+            for param, lookup in (('date_from', 'report_date__gte'), ('date_to', 'report_date__lte')):
+                if param in date_range:
+                    accounts = accounts.filter(**{lookup: date_range[param]})
+            counts, method = self.distinct_customer_counts(
+                accounts, queryset, 'report_date', exact=parse_flag(request.query_params.get('exact'))
+            )
+            for point in series:
+                point['distinct_customers'] = counts.get(point['report_date'], 0)
+            self.describe_distinct_customers(result, method)
+
+        return Response(result)
+
+    @swagger_auto_schema(
+        operation_description="working_balance distribution of one snapshot, overall or per group: percentiles "
+                              "(percentile_cont), log-scale bucket counts (width_bucket) and null/zero/negative counts. "
+                              "Accepts the same filters and search as list.",
+        manual_parameters=[
+            openapi.Parameter('group_by', openapi.IN_QUERY, description=f"One of: {', '.join(DISTRIBUTION_GROUP_FIELDS)}", type=openapi.TYPE_STRING),
+            openapi.Parameter('percentiles', openapi.IN_QUERY, description="Comma separated percentiles between 0 and 100", type=openapi.TYPE_STRING),
+            openapi.Parameter('buckets_per_decade', openapi.IN_QUERY, description=f"Log-scale buckets per power of ten (1-{MAX_BUCKETS_PER_DECADE})", type=openapi.TYPE_INTEGER, default=1),
+            openapi.Parameter('report_date', openapi.IN_QUERY, description="Snapshot (YYYY-MM-DD); defaults to the latest", type=openapi.TYPE_STRING),
+        ],
+        responses={200: 'Balance distribution per group'}
+    )
+    @action(detail=False, methods=['get'])
+    @warmable(cache_response=False)
+    def distribution(self, request):
+        group_by = request.query_params.get('group_by') or None
+        if group_by and group_by not in DISTRIBUTION_GROUP_FIELDS:
+            return Response(
+                {'error': f"group_by must be one of: {', '.join(DISTRIBUTION_GROUP_FIELDS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        percentiles = DEFAULT_PERCENTILES
+        if request.query_params.get('percentiles'):
+            try:
+                percentiles = [float(value) for value in request.query_params['percentiles'].split(',')]
+            except ValueError:
+                percentiles = None
+            if not percentiles or not all(0 <= value <= 100 for value in percentiles):
+                return Response(
+                    {'error': 'percentiles must be comma separated numbers between 0 and 100'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        try:
+            per_decade = int(request.query_params.get('buckets_per_decade', 1))
+        except ValueError:
+            per_decade = 0
+        if not 1 <= per_decade <= MAX_BUCKETS_PER_DECADE:
+            return Response(
+                {'error': f'buckets_per_decade must be an integer between 1 and {MAX_BUCKETS_PER_DECADE}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        report_date, error = self.get_report_date(request)
+        if error:
+            return error
+
+        queryset = self.filter_queryset(self.get_queryset()).filter(report_date=report_date)
+        result = cached_snapshot_result(
+            'distribution',
+            {
+                'report_date': report_date,
+                'query': sorted(request.query_params.lists()),
+                'scope': self.get_scope().as_dict(),
+            },
+            lambda: balance_distribution(queryset, group_by, percentiles, per_decade)
+        )
+        return Response(dict(result, report_date=report_date, group_by=group_by))
+
+    @swagger_auto_schema(
+        operation_description="Deposit concentration of one snapshot, overall or per group: share of the top k customers, "
+                              "Herfindahl index and Gini over customer-level balances (summed per customer_no). "
+                              "Accepts the same filters and search as list.",
+        manual_parameters=[
+            openapi.Parameter('group_by', openapi.IN_QUERY, description=f"One of: {', '.join(DISTRIBUTION_GROUP_FIELDS)}", type=openapi.TYPE_STRING),
+            openapi.Parameter('top', openapi.IN_QUERY, description=f"Comma separated customer counts for top-k shares (1-{MAX_TOP})", type=openapi.TYPE_STRING, default='10,100'),
+            openapi.Parameter('report_date', openapi.IN_QUERY, description="Snapshot (YYYY-MM-DD); defaults to the latest", type=openapi.TYPE_STRING),
+        ],
+        responses={200: 'Concentration metrics per group'}
+    )
+    @action(detail=False, methods=['get'])
+    @warmable(cache_response=False)
+    def concentration(self, request):
+        group_by = request.query_params.get('group_by') or None
+        if group_by and group_by not in DISTRIBUTION_GROUP_FIELDS:
+            return Response(
+                {'error': f"group_by must be one of: {', '.join(DISTRIBUTION_GROUP_FIELDS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        top = DEFAULT_TOP
+        if request.query_params.get('top'):
+            try:
+                top = sorted({int(value) for value in request.query_params['top'].split(',')})
+            except ValueError:
+                top = None
+            if not top or len(top) > 10 or not all(1 <= k <= MAX_TOP for k in top):
+                return Response(
+                    {'error': f'top must be up to 10 comma separated integers between 1 and {MAX_TOP}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        report_date, error = self.get_report_date(request)
+        if error:
+            return error
+
+        queryset = self.filter_queryset(self.get_queryset()).filter(report_date=report_date)
+        groups = cached_snapshot_result(
+            'concentration',
+            {
+                'report_date': report_date,
+                'query': sorted(request.query_params.lists()),
+                'scope': self.get_scope().as_dict(),
+            },
+            lambda: concentration_metrics(queryset, group_by, top)
+        )
+        return Response({'report_date': report_date, 'group_by': group_by, 'top': top, 'groups': groups})
+
+    @swagger_auto_schema(
+        operation_description="Distinct values and account counts of every filter dimension, served from the snapshot rollups. "
+                              "Each dimension is counted under the other active filters.",
+        manual_parameters=[
+            openapi.Parameter('report_date', openapi.IN_QUERY, description="Snapshot (YYYY-MM-DD); defaults to the latest", type=openapi.TYPE_STRING),
+        ] + [
+            openapi.Parameter(dimension, openapi.IN_QUERY, description=f"Filter by {dimension}", type=openapi.TYPE_STRING)
+            for dimension in ROLLUP_DIMENSIONS
+        ],
+        responses={200: 'Facet values and counts'}
+    )
+    @action(detail=False, methods=['get'])
+    @warmable(cache_response=False)
+    def facets(self, request):
+        report_date = None
+        if request.query_params.get('report_date'):
+            report_date = parse_date_param(request.query_params.get('report_date'))
+            if report_date is None:
+                return Response(
+                    {'error': 'report_date must be a valid date (YYYY-MM-DD)'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        filters_applied = {
+            dimension: request.query_params[dimension]
+            for dimension in ROLLUP_DIMENSIONS
+            if request.query_params.get(dimension)
+        }
+        scope = self.get_scope()
+
+        def compute():
+            snapshot = columnar.snapshot_for(report_date or latest_rollup_date())
+            if snapshot is not None:
+                return snapshot.facets(filters_applied, scope)
+            return facet_counts(report_date, filters_applied, scope)
+
+        result = cached_snapshot_result(
+            'facets',
+            {'report_date': report_date, 'filters': filters_applied, 'scope': scope.as_dict()},
+            compute
+        )
+        return Response(dict(result, filters=filters_applied))
+
+    @swagger_auto_schema(
+        operation_description="Compare two report_date snapshots: new, closed and changed accounts",
+        manual_parameters=[
+            openapi.Parameter('from', openapi.IN_QUERY, description="Older report_date (YYYY-MM-DD)", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('to', openapi.IN_QUERY, description="Newer report_date (YYYY-MM-DD)", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('threshold', openapi.IN_QUERY, description="Minimum absolute working_balance movement", type=openapi.TYPE_NUMBER, default=0),
+            openapi.Parameter('fields', openapi.IN_QUERY, description="Comma separated attributes to compare", type=openapi.TYPE_STRING),
+            openapi.Parameter('after', openapi.IN_QUERY, description="Return rows after this account_number", type=openapi.TYPE_STRING),
+            openapi.Parameter('limit', openapi.IN_QUERY, description="Page size", type=openapi.TYPE_INTEGER),
+            openapi.Parameter('output', openapi.IN_QUERY, description="'csv' streams every row", type=openapi.TYPE_STRING),
+        ],
+        responses={200: 'Snapshot diff'}
+    )
+    @action(detail=False, methods=['get'])
+    def diff(self, request):
+        from_date = parse_date_param(request.query_params.get('from'))
+        to_date = parse_date_param(request.query_params.get('to'))
+        if from_date is None or to_date is None:
+            return Response(
+                {'error': 'Please provide valid from and to report dates (YYYY-MM-DD)'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            threshold = Decimal(request.query_params.get('threshold', '0'))
+        except InvalidOperation:
+            threshold = None
+        if threshold is None or not threshold.is_finite() or threshold < 0:
+            return Response(
+                {'error': 'threshold must be a finite, non-negative number'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        fields = request.query_params.get('fields')
+        attributes = [f.strip() for f in fields.split(',') if f.strip()] if fields else DIFF_ATTRIBUTES
+        diff_class = olap.OlapSnapshotDiff if olap.serves([from_date, to_date]) else SnapshotDiff
+        try:
+            snapshot_diff = diff_class(from_date, to_date, threshold, attributes, scope=self.get_scope())
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.query_params.get('output') == 'csv':
+            if not request.user.has_perm('userManagement.export_reports'):
+                return Response(
+                    {'error': 'You do not have permission to export reports'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
+            import csv
+
+            writer = csv.writer(Echo())
+            rows = (writer.writerow(row) for row in snapshot_diff.iter_rows())
+            header = (writer.writerow(DIFF_COLUMNS),)
+            response = StreamingHttpResponse(
+                (line for chunk in (header, rows) for line in chunk),
+                content_type='text/csv'
+            )
+            response['Content-Disposition'] = (
+                f'attachment; filename="account_base_diff_{from_date}_{to_date}.csv"'
+            )
+            return response
+
+        default_limit = getattr(settings, 'REPORTS_DIFF_PAGE_SIZE', 500)
+        max_limit = getattr(settings, 'REPORTS_DIFF_MAX_PAGE_SIZE', 5000)
+        try:
+            limit = min(int(request.query_params.get('limit', default_limit)), max_limit)
+        except ValueError:
+            return Response(
+                {'error': 'limit must be a valid integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if limit < 1:
+            return Response(
+                {'error': 'limit must be a positive integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        after = request.query_params.get('after')
+
+        params = snapshot_diff.cache_params()
+        summary = cached_snapshot_result('diff_summary', params, snapshot_diff.summary)
+        results = cached_snapshot_result(
+            'diff_page', dict(params, after=after, limit=limit),
+            lambda: snapshot_diff.page(after=after, limit=limit)
+        )
+
         return Response({
-            'total_accounts': total_accounts,
-            'total_balance': float(total_balance),
-            'by_branch': list(branch_stats),
-            'by_product': list(product_stats)
+            'from': from_date,
+            'to': to_date,
+            'threshold': float(threshold),
+            'summary': summary,
+            'next_after': results[-1]['account_number'] if len(results) == limit else None,
+            'results': results
         })
 
     @swagger_auto_schema(
@@ -199,6 +704,7 @@ class AccountBaseViewSet(ReadOnlyModelViewSet):
         responses={200: AccountBaseSummarySerializer(many=True)}
     )
     @action(detail=False, methods=['get'])
+    @warmable()
     def by_branch(self, request):
         branch_code = request.query_params.get('branch_code')
         branch_name = request.query_params.get('branch_name')
@@ -252,6 +758,108 @@ class AccountBaseViewSet(ReadOnlyModelViewSet):
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
 
+    @swagger_auto_schema(
+        operation_description="Top N accounts within each group of one snapshot (e.g. top 20 balances per branch), "
+                              "ranked in the database with ROW_NUMBER() OVER (PARTITION BY ...)",
+        manual_parameters=[
+            openapi.Parameter('group_by', openapi.IN_QUERY, description=f"One of: {', '.join(TOP_N_GROUP_FIELDS)}", type=openapi.TYPE_STRING, default='branch_code'),
+            openapi.Parameter('order_by', openapi.IN_QUERY, description=f"One of: {', '.join(TOP_N_ORDER_FIELDS)}; prefix with '-' for descending", type=openapi.TYPE_STRING, default='-working_balance'),
+            openapi.Parameter('n', openapi.IN_QUERY, description="Accounts per group", type=openapi.TYPE_INTEGER, default=10),
+            openapi.Parameter('report_date', openapi.IN_QUERY, description="Snapshot (YYYY-MM-DD); defaults to the latest", type=openapi.TYPE_STRING),
+        ],
+        responses={200: 'Accounts grouped by the group_by value'}
+    )
+    @action(detail=False, methods=['get'])
+    def top_per_group(self, request):
+        group_by = request.query_params.get('group_by', 'branch_code')
+        if group_by not in TOP_N_GROUP_FIELDS:
+            return Response(
+                {'error': f"group_by must be one of: {', '.join(TOP_N_GROUP_FIELDS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        order_by = request.query_params.get('order_by', '-working_balance')
+        if order_by.lstrip('-') not in TOP_N_ORDER_FIELDS:
+            return Response(
+                {'error': f"order_by must be one of: {', '.join(TOP_N_ORDER_FIELDS)} (optionally prefixed with '-')"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        max_n = getattr(settings, 'REPORTS_TOP_N_MAX', 100)
+        try:
+            n = int(request.query_params.get('n', 10))
+        except ValueError:
+            return Response({'error': 'n must be a valid integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= n <= max_n:
+            return Response({'error': f'n must be between 1 and {max_n}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        report_date, error = self.get_report_date(request)
+        if error:
+            return error
+
+        # NULLS LAST matches the (report_date, group, column DESC NULLS LAST) indexes
+        field = order_by.lstrip('-')
+        rank_order = F(field).desc(nulls_last=True) if order_by.startswith('-') else F(field).asc(nulls_last=True)
+        queryset = self.filter_queryset(self.get_queryset()).filter(report_date=report_date).annotate(
+            rank=Window(
+                RowNumber(),
+                partition_by=[F(group_by)],
+                order_by=[rank_order, F('account_number').asc()]
+            )
+        ).filter(rank__lte=n).order_by(F(group_by).asc(nulls_last=True), 'rank')
+
+        groups = []
+        for account in queryset:
+            value = getattr(account, group_by)
+            if not groups or groups[-1]['group'] != value:
+                groups.append({'group': value, 'accounts': []})
+            groups[-1]['accounts'].append(AccountBaseSummarySerializer(account).data)
+
+        return Response({
+            'report_date': report_date,
+            'group_by': group_by,
+            'order_by': order_by,
+            'n': n,
+            'groups': groups
+        })
+
+    @swagger_auto_schema(
+        operation_description="Customer 360: every account of one or more customer_no values in a snapshot, "
+                              "with balances per currency and product and the earliest opening date",
+        manual_parameters=[
+            openapi.Parameter('customer_no', openapi.IN_QUERY, description="Customer number(s); comma separated or repeated", type=openapi.TYPE_STRING, required=True),
+            openapi.Parameter('report_date', openapi.IN_QUERY, description="Snapshot (YYYY-MM-DD); defaults to the latest", type=openapi.TYPE_STRING),
+        ],
+        responses={200: 'Customer profiles in request order'}
+    )
+    @action(detail=False, methods=['get'])
+    def customer(self, request):
+        customer_nos = []
+        for value in request.query_params.getlist('customer_no'):
+            for customer_no in value.split(','):
+                customer_no = customer_no.strip()
+                if customer_no and customer_no not in customer_nos:
+                    customer_nos.append(customer_no)
+        if not customer_nos:
+            return Response(
+                {'error': 'Please provide at least one customer_no'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        max_customers = getattr(settings, 'REPORTS_CUSTOMER_BATCH_MAX', 100)
+        if len(customer_nos) > max_customers:
+            return Response(
+                {'error': f'At most {max_customers} customers per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        report_date, error = self.get_report_date(request)
+        if error:
+            return error
+
+        queryset = self.get_queryset().filter(report_date=report_date)
+        return Response({
+            'report_date': report_date,
+            'customers': customer_profiles(queryset, customer_nos)
+        })
+
     @swagger_auto_schema(
         operation_description="Search customers by name or phone",
         manual_parameters=[
@@ -286,7 +894,7 @@ class AccountBaseViewSet(ReadOnlyModelViewSet):
     @swagger_auto_schema(
         operation_description="Get recently opened accounts",
         manual_parameters=[
-            openapi.Parameter('limit', openapi.IN_QUERY, description="Number of records", type=openapi.TYPE_INTEGER, default=100),
+            openapi.Parameter('limit', openapi.IN_QUERY, description="Number of records (capped at REPORTS_RECENT_MAX_LIMIT)", type=openapi.TYPE_INTEGER, default=100),
         ],
         responses={200: AccountBaseSummarySerializer(many=True)}
     )
@@ -299,6 +907,12 @@ class AccountBaseViewSet(ReadOnlyModelViewSet):
                 {'error': 'limit must be a valid integer'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        if limit < 1:
+            return Response(
+                {'error': 'limit must be a positive integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limit = min(limit, getattr(settings, 'REPORTS_RECENT_MAX_LIMIT', 1000))
         
         queryset = self.get_queryset().order_by('-opening_date')[:limit]
         serializer = self.get_serializer(queryset, many=True)
@@ -359,12 +973,322 @@ class AccountBaseViewSet(ReadOnlyModelViewSet):
         operation_description="List all accounts with filtering and pagination",
         responses={200: AccountBaseSummarySerializer(many=True)}
     )
+    @warmable()
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @swagger_auto_schema(
+        operation_description="Retrieve many accounts of one snapshot by account number in a single query; "
+                              "results follow the request order and missing accounts are marked found=false",
+        manual_parameters=[
+            openapi.Parameter('report_date', openapi.IN_QUERY, description="Snapshot (YYYY-MM-DD); defaults to the latest", type=openapi.TYPE_STRING),
+        ],
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'account_numbers': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING))
+            },
+            required=['account_numbers']
+        ),
+        responses={200: 'Accounts in request order'}
+    )
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        account_numbers = request.data.get('account_numbers') if hasattr(request.data, 'get') else None
+        if not isinstance(account_numbers, list) or not account_numbers:
+            return Response(
+                {'error': 'account_numbers must be a non-empty list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        max_accounts = getattr(settings, 'REPORTS_BATCH_MAX_ACCOUNTS', 1000)
+        if len(account_numbers) > max_accounts:
+            return Response(
+                {'error': f'At most {max_accounts} account numbers per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        account_numbers = [str(number) for number in account_numbers]
+
+        report_date, error = self.get_report_date(request)
+        if error:
+            return error
+
+        # Same scoped queryset as retrieve; accounts outside the scope read as not found
+        accounts = {
+            account.account_number: account
+            for account in self.get_queryset().filter(
+                report_date=report_date, account_number__in=set(account_numbers)
+            )
+        }
+        serializer_class = self.get_serializer_class()
+        results = []
+        for account_number in account_numbers:
+            account = accounts.get(account_number)
+            if account is None:
+                results.append({'account_number': account_number, 'found': False})
+            else:
+                results.append({
+                    'account_number': account_number,
+                    'found': True,
+                    'account': serializer_class(account).data
+                })
+
+        return Response({
+            'report_date': report_date,
+            'requested': len(account_numbers),
+            'found': sum(1 for result in results if result['found']),
+            'results': results
+        })
+
+    @swagger_auto_schema(
+        operation_description="Resolve many dashboard widgets (named GET sub-queries of this endpoint) in one "
+                              "request; widgets run concurrently and each reports its own status and data or error",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'widgets': openapi.Schema(
+                    type=openapi.TYPE_ARRAY,
+                    items=openapi.Schema(
+                        type=openapi.TYPE_OBJECT,
+                        properties={
+                            'name': openapi.Schema(type=openapi.TYPE_STRING),
+                            'action': openapi.Schema(type=openapi.TYPE_STRING, enum=DASHBOARD_ACTIONS),
+                            'params': openapi.Schema(type=openapi.TYPE_OBJECT, description="Query parameters of the action"),
+                        },
+                        required=['name', 'action']
+                    )
+                )
+            },
+            required=['widgets']
+        ),
+        responses={200: 'Widget results keyed by name'}
+    )
+    @action(detail=False, methods=['post'])
+    def dashboard(self, request):
+        widgets = request.data.get('widgets') if hasattr(request.data, 'get') else None
+        if not isinstance(widgets, list) or not widgets:
+            return Response(
+                {'error': 'widgets must be a non-empty list'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        max_widgets = getattr(settings, 'REPORTS_DASHBOARD_MAX_WIDGETS', 20)
+        if len(widgets) > max_widgets:
+            return Response(
+                {'error': f'At most {max_widgets} widgets per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        names = set()
+        for widget in widgets:
+            if not isinstance(widget, dict) or not isinstance(widget.get('name'), str) or not widget['name']:
+                return Response(
+                    {'error': 'Every widget needs a name'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if widget['name'] in names:
+                return Response(
+                    {'error': f"Duplicate widget name: {widget['name']}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            names.add(widget['name'])
+            if widget.get('action') not in DASHBOARD_ACTIONS:
+                return Response(
+                    {'error': f"Widget {widget['name']}: action must be one of {', '.join(DASHBOARD_ACTIONS)}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            widget.setdefault('params', {})
+            if not isinstance(widget['params'], dict):
+                return Response(
+                    {'error': f"Widget {widget['name']}: params must be an object"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        # Authenticated once for the whole batch; scope is resolved once and shared
+        results = resolve_widgets(widgets, self.get_scope(), request.user, request.auth)
+        return Response({'widgets': results})
+
     @swagger_auto_schema(
         operation_description="Retrieve account details",
         responses={200: AccountBaseSerializer}
     )
     def retrieve(self, request, *args, **kwargs):
         return super().retrieve(request, *args, **kwargs)
+
+
+class SavedReportViewSet(viewsets.ModelViewSet):
+    """
+    Saved report definitions visible to the user: their own and those shared
+    with their role. Opening one serves the artifact precomputed for the
+    user's scope and the latest snapshot (reportApp.scheduler), computing
+    and storing it first when it is missing.
+    """
+    serializer_class = SavedReportSerializer
+    http_method_names = ['get', 'post', 'put', 'patch', 'delete']
+
+    def get_permissions(self):
+        if getattr(settings, "DEVELOPMENT", False):
+            return []
+        return [CanViewAccountBaseOrReports()]
+
+    def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return SavedReport.objects.none()
+        queryset = SavedReport.objects.all()
+        user = self.request.user
+        if not user.is_authenticated or user.is_superuser:
+            # Anonymous only with permission checks disabled in DEVELOPMENT
+            return queryset
+        visible = Q(owner_id=user.pk)
+        if getattr(user, 'role', None):
+            visible |= Q(role_id=user.role.id)
+        return queryset.filter(visible)
+
+    def can_manage_roles(self):
+        user = self.request.user
+        return not user.is_authenticated or user.has_perm('userManagement.manage_role')
+
+    def check_manage(self, report):
+        user = self.request.user
+        if report.owner_id is not None and user.is_authenticated and str(report.owner_id) != str(user.pk):
+            raise PermissionDenied('Only the owner can change this saved report')
+        if report.role_id is not None and not self.can_manage_roles():
+            raise PermissionDenied('Changing a report shared with a role requires manage_role')
+
+    def save_with_owner(self, serializer):
+        role = serializer.validated_data.get('role')
+        user = self.request.user
+        if role is not None:
+            if not self.can_manage_roles():
+                raise PermissionDenied('Sharing a report with a role requires manage_role')
+            return serializer.save(owner=None)
+        if not user.is_authenticated:
+            raise ValidationError({'role': 'A role is required when the report has no authenticated owner'})
+        return serializer.save(owner_id=user.pk)
+
+    def perform_create(self, serializer):
+        self.save_with_owner(serializer)
+
+    def perform_update(self, serializer):
+        self.check_manage(serializer.instance)
+        if 'role' in serializer.validated_data:
+            report = self.save_with_owner(serializer)
+        else:
+            report = serializer.save()
+        # Artifacts of the old definition must never be served again
+        discard_artifacts(report.artifacts.all())
+
+    def perform_destroy(self, instance):
+        self.check_manage(instance)
+        discard_report(instance)
+        instance.delete()
+
+    @swagger_auto_schema(
+        operation_description="Download a saved report for the latest snapshot and the user's scope; "
+                              "X-Report-Artifact tells whether it was precomputed or computed on demand",
+        responses={200: 'CSV or JSON file'}
+    )
+    @action(detail=True, methods=['get'], url_path='open')
+    def open_report(self, request, pk=None):
+        report = self.get_object()
+        if (report.format == 'csv' and not getattr(settings, 'DEVELOPMENT', False)
+                and not request.user.has_perm('userManagement.export_reports')):
+            return Response(
+                {'error': 'You do not have permission to export reports'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        report_date = latest_report_date()
+        if report_date is None:
+            return Response({'error': 'No snapshot has been loaded yet'}, status=status.HTTP_404_NOT_FOUND)
+        scope = resolve_scope(request.user)
+        artifact, source = current_artifact(report, scope, report_date), 'precomputed'
+        if artifact is None:
+            artifact, source = write_artifact(report, scope, report_date), 'computed'
+
+        response = FileResponse(
+            open(artifact_path(artifact), 'rb'),
+            content_type=SAVED_REPORT_CONTENT_TYPES[report.format],
+            as_attachment=True,
+            filename=f"{slugify(report.name) or 'report'}-{report_date:%Y%m%d}.{report.format}"
+        )
+        response['X-Report-Date'] = report_date.isoformat()
+        response['X-Report-Artifact'] = source
+        return response
+
+
+def authenticate_stream(request):
+    """
+    (user, expires_at, error_response) of an event stream request, with the
+    checks of CanViewAccountBaseOrReports; expires_at is the access token's
+    `exp` (None in development). EventSource cannot send headers, so the
+    access token may also come as the access_token query parameter.
+    """
+    if getattr(settings, 'DEVELOPMENT', False):
+        return AnonymousUser(), None, None
+    authentication = ClaimsJWTAuthentication()
+    try:
+        token = request.GET.get('access_token')
+        if token:
+            validated_token = authentication.get_validated_token(token)
+            user = authentication.get_user(validated_token)
+        else:
+            user, validated_token = authentication.authenticate(request) or (None, None)
+    except AuthenticationFailed:
+        return None, None, JsonResponse({'error': 'Token is invalid or expired'}, status=status.HTTP_401_UNAUTHORIZED)
+    if user is None:
+        return None, None, JsonResponse({'error': 'Authentication credentials were not provided'}, status=status.HTTP_401_UNAUTHORIZED)
+    if not (user.has_perm('userManagement.view_accountbase') or user.has_perm('userManagement.view_reports')):
+        return None, None, JsonResponse({'error': 'You do not have permission to perform this action'}, status=status.HTTP_403_FORBIDDEN)
+    return user, validated_token.get('exp'), None
+
+
+def prepare_stream(request):
+    """
+    (scope, with_stats, expires_at, error_response) of an event stream
+    request. The DB connection is closed afterwards: idle streams must not
+    hold one each.
+    """
+    try:
+        user, expires_at, error = authenticate_stream(request)
+        if error:
+            return None, False, None, error
+        with_stats = parse_flag(request.GET.get('stats')) and (
+            getattr(settings, 'DEVELOPMENT', False) or user.has_perm('userManagement.view_reports')
+        )
+        return resolve_scope(user), with_stats, expires_at, None
+    finally:
+        connection.close()
+
+
+async def snapshot_events(request):
+    """
+    Server-Sent Events stream announcing newly loaded snapshots, so clients
+    stop polling for a new report_date. With ?stats=true (view_reports) each
+    event carries the stats payload of the new snapshot for the user's scope.
+    The stream ends with an `expired` event when the access token expires;
+    the client reconnects with a fresh token. Idle connections are held on the event loop, which needs the ASGI
+    application (e.g. uvicorn BI.asgi:application).
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'error': 'Snapshot events are only served by the ASGI application'},
+            status=status.HTTP_501_NOT_IMPLEMENTED
+        )
+    if hub.full():
+        response = JsonResponse(
+            {'error': 'Too many open event streams; please retry shortly'},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        response['Retry-After'] = '30'
+        return response
+
+    scope, with_stats, expires_at, error = await sync_to_async(prepare_stream)(request)
+    if error:
+        return error
+
+    response = StreamingHttpResponse(
+        event_stream(scope, with_stats, expires_at), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Keep reverse proxies from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
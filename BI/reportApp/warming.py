@@ -0,0 +1,220 @@
+# reportApp/warming.py
+"""
+Snapshot-triggered cache warming for the report endpoints.
+
+Warmable actions record every request (action, query parameters, scope) in
+an access log and cache their 200 responses per snapshot generation. When
+a new snapshot is loaded, the most requested entries are replayed on a
+small thread pool, so the first dashboard of the day is served from cache.
+The pool never uses more than REPORTS_WARM_DB_CONCURRENCY database
+connections at once.
+
+Warming runs at the end of every snapshot load with REPORTS_WARM_ON_LOAD,
+or from `manage.py warm_report_cache --if-new`, which only warms when a new
+report_date (or reload) appeared since the last run. Either way the warmer
+must share CACHES with the web workers (e.g. Redis or Memcached): with a
+per-process cache (LocMemCache) warming is refused, since it would only
+fill the warmer's own memory.
+"""
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connection, DatabaseError
+from django.db.models import Max
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .caching import latest_snapshot_date, snapshot_cache_key, snapshot_version
+from .coalescing import coalesce
+from .dashboard import run_action
+from .models import AccountBase, ReportAccess
+from .scoping import AccountScope
+
+logger = logging.getLogger(__name__)
+
+WARMED_KEY = 'reportApp:warmed_snapshot'
+
+
+def access_log_enabled():
+    return getattr(settings, 'REPORTS_ACCESS_LOG', True)
+
+
+def access_digest(action, query, scope):
+    return hashlib.md5(json.dumps([action, query, scope], sort_keys=True).encode()).hexdigest()
+
+
+class AccessLog:
+    """
+    Per-process hit counters, added to report_access with one upsert at most
+    every REPORTS_ACCESS_LOG_FLUSH_INTERVAL seconds.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.flushed_at = time.monotonic()
+
+    def flush_interval(self):
+        return getattr(settings, 'REPORTS_ACCESS_LOG_FLUSH_INTERVAL', 60)
+
+    def record(self, action, query, scope):
+        digest = access_digest(action, query, scope)
+        with self.lock:
+            entry = self.pending.setdefault(digest, {'action': action, 'query': query, 'scope': scope, 'hits': 0})
+            entry['hits'] += 1
+            due = time.monotonic() - self.flushed_at >= self.flush_interval()
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.flushed_at = time.monotonic()
+        if not pending:
+            return 0
+        now = timezone.now()
+        table = ReportAccess._meta.db_table
+        try:
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f"INSERT INTO {table} (digest, action, query, scope, hits, last_seen)"
+                    f" VALUES (%s, %s, %s, %s, %s, %s)"
+                    f" ON CONFLICT (digest) DO UPDATE"
+                    f" SET hits = {table}.hits + EXCLUDED.hits, last_seen = EXCLUDED.last_seen",
+                    [
+                        (digest, entry['action'], json.dumps(entry['query']), json.dumps(entry['scope']), entry['hits'], now)
+                        for digest, entry in pending.items()
+                    ]
+                )
+        except DatabaseError:
+            # Losing a minute of hit counts must never fail the request that flushed them
+            logger.exception('Could not flush the report access log')
+            return 0
+        return len(pending)
+
+
+access_log = AccessLog()
+
+
+def cache_is_shared():
+    """Whether CACHES reaches other processes, i.e. warming it helps the web workers."""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def max_cached_items():
+    return getattr(settings, 'REPORTS_RESPONSE_CACHE_MAX_ITEMS', 5000)
+
+
+def warmable(cache_response=True):
+    """
+    Mark a GET action as warmable: requests are counted in the access log
+    and, with cache_response, 200 responses are cached per snapshot
+    generation, query parameters and scope (concurrent misses coalesce).
+    Queries for the latest snapshot (report_date=latest or no date) are
+    keyed by the report_date it resolved to.
+    Actions that already cache their own results pass cache_response=False.
+    """
+    def decorator(view_method):
+        action = view_method.__name__
+
+        @functools.wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            query = sorted(request.query_params.lists())
+            scope = self.get_scope().as_dict()
+            if access_log_enabled() and not getattr(self, 'warming', False):
+                access_log.record(action, query, scope)
+            if not cache_response:
+                return view_method(self, request, *args, **kwargs)
+
+            latest = None
+            if request.query_params.get('report_date') in (None, '', 'latest'):
+                latest = latest_snapshot_date()
+            key = snapshot_cache_key(f'response:{action}', query=query, scope=scope, latest=latest)
+            cached = cache.get(key)
+            if cached is not None:
+                return Response(cached)
+
+            def compute():
+                response = view_method(self, request, *args, **kwargs)
+                return response.data, response.status_code
+
+            data, status_code = coalesce(key, compute)
+            if status_code == 200 and not (isinstance(data, list) and len(data) > max_cached_items()):
+                cache.set(key, data, getattr(settings, 'REPORTS_CACHE_TIMEOUT', 3600))
+            return Response(data, status=status_code)
+        return wrapper
+    return decorator
+
+
+def hottest_entries(limit=None, lookback_days=None):
+    """Most requested (action, query, scope) entries seen within the lookback window."""
+    limit = limit or getattr(settings, 'REPORTS_WARM_TOP_N', 50)
+    lookback_days = lookback_days or getattr(settings, 'REPORTS_WARM_LOOKBACK_DAYS', 7)
+    since = timezone.now() - timedelta(days=lookback_days)
+    return list(
+        ReportAccess.objects.filter(last_seen__gte=since)
+        .order_by('-hits', '-last_seen')
+        .values('action', 'query', 'scope', 'hits')[:limit]
+    )
+
+
+def warm_entry(entry):
+    """Replay one access log entry through its action so the response lands in the cache."""
+    try:
+        return run_action(
+            entry['action'], entry['query'], AccountScope.from_dict(entry['scope']), warming=True
+        ).status_code
+    finally:
+        # Pool threads must not keep their connections open after warming
+        connection.close()
+
+
+def warm_caches(limit=None, db_concurrency=None):
+    """
+    Replay the hottest access log entries on a thread pool no wider than
+    REPORTS_WARM_DB_CONCURRENCY (each thread holds one DB connection).
+    Returns (entries warmed, entries failed, seconds), or None when CACHES
+    is per process and warming would be lost.
+    """
+    access_log.flush()
+    if not cache_is_shared():
+        logger.warning('Not warming report caches: CACHES is per process, so the web workers would not see them')
+        return None
+    entries = hottest_entries(limit)
+    workers = db_concurrency or getattr(settings, 'REPORTS_WARM_DB_CONCURRENCY', 2)
+    started = time.perf_counter()
+    warmed = failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='report-warmer') as pool:
+        for entry, future in [(entry, pool.submit(warm_entry, entry)) for entry in entries]:
+            try:
+                status_code = future.result()
+            except Exception:
+                logger.exception('Warming %s %s failed', entry['action'], entry['query'])
+                failed += 1
+                continue
+            if status_code == 200:
+                warmed += 1
+            else:
+                failed += 1
+    cache.set(WARMED_KEY, current_snapshot_marker(), None)
+    return warmed, failed, time.perf_counter() - started
+
+
+def current_snapshot_marker():
+    latest = AccountBase.objects.aggregate(latest=Max('report_date'))['latest']
+    return [latest.isoformat() if latest else None, snapshot_version()]
+
+
+def needs_warming():
+    """Whether a new report_date (or a reload) appeared since the last warming run."""
+    return cache.get(WARMED_KEY) != current_snapshot_marker()
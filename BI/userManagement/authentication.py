@@ -0,0 +1,90 @@
+# userManagement/authentication.py
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import CustomUser
+from .tokens import PERMISSION_VERSION_CLAIM, USER_VERSION_CLAIM, permission_version, user_version
+
+
+class ClaimsRole:
+    def __init__(self, data):
+        self.id = data['id']
+        self.name = data['name']
+
+    def __str__(self):
+        return self.name
+
+
+class ClaimsUser(TokenUser):
+    """
+    Authenticated principal backed by the access token claims, so permission
+    checks never touch the database. Views that need the full CustomUser row
+    load it explicitly via `get_user()`.
+    """
+
+    @cached_property
+    def id(self):
+        return CustomUser._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def pk(self):
+        return self.id
+
+    @cached_property
+    def email(self):
+        return self.token.get('email', '')
+
+    @cached_property
+    def branch_id(self):
+        return self.token.get('branch')
+
+    @cached_property
+    def role(self):
+        role = self.token.get('role')
+        return ClaimsRole(role) if role else None
+
+    @cached_property
+    def permission_codenames(self):
+        return frozenset(self.token.get('perms', ()))
+
+    def get_all_permissions(self, obj=None):
+        return set(self.permission_codenames)
+
+    def has_perm(self, perm, obj=None):
+        if self.is_superuser:
+            return True
+        return perm.split('.')[-1] in self.permission_codenames
+
+    def has_perms(self, perm_list, obj=None):
+        return all(self.has_perm(perm, obj) for perm in perm_list)
+
+    def get_user(self):
+        return CustomUser.objects.get(pk=self.pk)
+
+    def __str__(self):
+        return self.email
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the role/permission claims of tokens minted
+    by ClaimsRefreshToken while both the global permission version and the
+    user's own auth_version are current. Tokens without claims, or minted
+    before a role/permission change or a change to the user, fall back to
+    loading the user row.
+
+    Both versions are read through the cache (PERMISSION_VERSION_TTL), so a
+    warm request runs no query; a change made by another worker is noticed
+    within that many seconds.
+    """
+
+    def get_user(self, validated_token):
+        version = validated_token.get(PERMISSION_VERSION_CLAIM)
+        if version is None or version != permission_version():
+            return super().get_user(validated_token)
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if validated_token.get(USER_VERSION_CLAIM) != user_version(user_id):
+            return super().get_user(validated_token)
+        return ClaimsUser(validated_token)
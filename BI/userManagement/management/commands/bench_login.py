@@ -0,0 +1,74 @@
+# userManagement/management/commands/bench_login.py
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+from userManagement.models import CustomUser
+from userManagement.throttling import local_buckets
+from userManagement.views import AuthViewSet
+
+
+class Command(BaseCommand):
+    help = 'Measure login throughput under a mixed valid / wrong-password / unknown-email load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True, help='Existing active user')
+        parser.add_argument('--password', required=True, help='Their password')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--invalid-ratio', type=float, default=0.5, help='Share of failing attempts (half wrong password, half unknown email)')
+        parser.add_argument('--concurrency', type=int, default=1)
+        parser.add_argument('--throttle', action='store_true', help='Keep LOGIN_THROTTLE_RATES active (all requests share one IP)')
+
+    def attempts(self, options):
+        rng = random.Random(0)
+        for i in range(options['requests']):
+            roll = rng.random()
+            if roll >= options['invalid_ratio']:
+                yield 'valid', options['email'], options['password']
+            elif roll < options['invalid_ratio'] / 2:
+                yield 'wrong_password', options['email'], options['password'] + 'x'
+            else:
+                yield 'unknown_email', f'bench-{i}@unknown.invalid', options['password']
+
+    def login(self, attempt):
+        kind, email, password = attempt
+        request = APIRequestFactory().post(
+            '/api/user-management/auth/login/', {'email': email, 'password': password}, format='json'
+        )
+        try:
+            started = time.perf_counter()
+            response = AuthViewSet.as_view({'post': 'login'}, **AuthViewSet.login.kwargs)(request)
+            return kind, response.status_code, time.perf_counter() - started
+        finally:
+            connection.close()
+
+    def handle(self, *args, **options):
+        if not CustomUser.objects.filter(email=options['email']).exists():
+            raise CommandError(f"No user with email {options['email']}")
+
+        rates = None if options['throttle'] else {'ip': None, 'email': None}
+        local_buckets.clear()
+        with override_settings(**({'LOGIN_THROTTLE_RATES': rates} if rates else {})):
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                results = list(pool.map(self.login, self.attempts(options)))
+            elapsed = time.perf_counter() - started
+
+        self.stdout.write(f'{len(results)} attempts in {elapsed:.2f}s ({len(results) / elapsed:.1f} logins/sec)')
+        for kind in ('valid', 'wrong_password', 'unknown_email'):
+            timings = [duration for k, _, duration in results if k == kind]
+            if timings:
+                codes = sorted({code for k, code, _ in results if k == kind})
+                self.stdout.write(
+                    f'  {kind}: {len(timings)} attempts, median {statistics.median(timings) * 1000:.1f}ms, '
+                    f'status {codes}'
+                )
+        throttled = sum(1 for _, code, _ in results if code == 429)
+        if throttled:
+            self.stdout.write(f'  throttled before hashing: {throttled}')
@@ -0,0 +1,17 @@
+# userManagement/management/commands/export_openapi_schema.py
+from django.core.management.base import BaseCommand, CommandError
+
+from BI.apidocs import docs_enabled, write_schema
+
+
+class Command(BaseCommand):
+    help = 'Precompute the OpenAPI schema served at swagger.json (run at deploy time)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Destination file (default API_SCHEMA_FILE)')
+
+    def handle(self, *args, **options):
+        if not docs_enabled():
+            raise CommandError('API_DOCS_ENABLED is off; the schema would have no operation details')
+        path, size = write_schema(options['output'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {size} bytes to {path}'))
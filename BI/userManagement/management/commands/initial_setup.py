@@ -20,6 +20,8 @@ class Command(BaseCommand):
             {'name': 'Manage Branches', 'codename': 'manage_branch'},
             {'name': 'View Departments', 'codename': 'view_department'},
             {'name': 'Manage Departments', 'codename': 'manage_department'},
+            {'name': 'View All Branches', 'codename': 'view_all_branches'},
+            {'name': 'View Region Accounts', 'codename': 'view_region_accounts'},
         ]
 
         for perm_data in permissions_data:
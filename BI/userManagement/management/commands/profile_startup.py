@@ -0,0 +1,41 @@
+# userManagement/management/commands/profile_startup.py
+from django.core.management.base import BaseCommand, CommandError
+
+from BI.startup import ENTRY_POINTS, measure_startup, package_totals, startup_budget
+
+
+class Command(BaseCommand):
+    help = 'Report import time and app-ready time of a cold BI.wsgi / BI.asgi worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--module', action='append', dest='modules', help=f'Entry point to profile (default: {", ".join(ENTRY_POINTS)}); repeatable')
+        parser.add_argument('--top', type=int, default=15, help='Slowest modules / packages to list')
+        parser.add_argument('--repeat', type=int, default=3, help='Cold starts per entry point; the fastest is reported')
+        parser.add_argument('--check', action='store_true', help='Fail when ready + URLconf time exceeds STARTUP_BUDGET_SECONDS')
+
+    def handle(self, *args, **options):
+        budget = startup_budget()
+        over_budget = []
+        for module in options['modules'] or ENTRY_POINTS:
+            runs = [measure_startup(module) for _ in range(max(options['repeat'], 1))]
+            best = min(runs, key=lambda run: run['total'])
+
+            self.stdout.write(self.style.MIGRATE_HEADING(module))
+            self.stdout.write(
+                f"  app ready {best['ready'] * 1000:.0f}ms, URLconf/views {best['urlconf'] * 1000:.0f}ms, "
+                f"total {best['total'] * 1000:.0f}ms (best of {len(runs)})"
+            )
+            self.stdout.write('  slowest packages (self time):')
+            for package, seconds in package_totals(best['imports'])[:options['top']]:
+                self.stdout.write(f'    {seconds * 1000:8.1f}ms  {package}')
+            self.stdout.write('  slowest modules (self time):')
+            for entry in sorted(best['imports'], key=lambda e: e['self'], reverse=True)[:options['top']]:
+                self.stdout.write(
+                    f"    {entry['self'] * 1000:8.1f}ms  {entry['module']} (cumulative {entry['cumulative'] * 1000:.1f}ms)"
+                )
+
+            if budget is not None and best['total'] > budget:
+                over_budget.append(f"{module}: {best['total']:.2f}s")
+
+        if options['check'] and over_budget:
+            raise CommandError(f'Startup budget of {budget}s exceeded by ' + ', '.join(over_budget))
@@ -0,0 +1,29 @@
+# userManagement/management/commands/prune_tokens.py
+from django.core.management.base import BaseCommand
+
+from userManagement.revocation import prune_expired_tokens, token_table_metrics
+
+
+class Command(BaseCommand):
+    help = 'Delete expired outstanding/blacklisted JWT rows in batches (schedule e.g. hourly from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, help='Rows deleted per transaction (default TOKEN_PRUNE_BATCH_SIZE)')
+        parser.add_argument('--stats', action='store_true', help='Only report token table metrics')
+
+    def write_metrics(self, label):
+        metrics = token_table_metrics()
+        self.stdout.write(f'{label}:')
+        for name, value in metrics.items():
+            self.stdout.write(f'  {name}: {"n/a" if value is None else value}')
+
+    def handle(self, *args, **options):
+        self.write_metrics('Token tables')
+        if options['stats']:
+            return
+
+        outstanding, blacklisted = prune_expired_tokens(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Pruned {outstanding} outstanding and {blacklisted} blacklisted token(s)')
+        )
+        self.write_metrics('After pruning')
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 10:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('userManagement', '0002_permissionversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='auth_version',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -58,6 +58,19 @@ class Role(models.Model):
     def __str__(self):
         return self.name
 
+# ------------------ Permission Version ------------------
+class PermissionVersion(models.Model):
+    """
+    Single row (pk=1) counting role/permission changes, shared by every
+    worker. Tokens carry the version they were minted under; their claims are
+    only trusted while it is current.
+    """
+    id = models.PositiveSmallIntegerField(primary_key=True, default=1)
+    version = models.BigIntegerField()
+
+    def __str__(self):
+        return str(self.version)
+
 # ------------------ Branch ------------------
 class Branch(models.Model):
     branchCode = models.CharField(primary_key=True, max_length=100)
@@ -88,6 +101,9 @@ class CustomUser(AbstractBaseUser, PermissionsMixin):
     is_superuser = models.BooleanField(default=False)
     date_joined = models.DateTimeField(auto_now_add=True)
     last_login = models.DateTimeField(auto_now=True)
+    # Moved on every change to this user's role, branch, flags or permissions;
+    # token claims minted under an older value are no longer trusted
+    auth_version = models.BigIntegerField(default=0, editable=False)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
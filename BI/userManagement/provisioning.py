@@ -0,0 +1,141 @@
+# userManagement/provisioning.py
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from .models import Branch, CustomUser, Role
+from .serializers import BulkRoleAssignmentSerializer, BulkUserSerializer
+from .signals import users_auth_changed
+
+# Below this many passwords a pool costs more to start than it saves
+POOL_THRESHOLD = 8
+
+
+def hash_passwords(passwords):
+    """
+    make_password for each password, spread across a thread pool for larger
+    batches. The hashers spend their time in hashlib/bcrypt/argon2 code that
+    releases the GIL, so threads run in parallel without forking the web
+    worker (and its DB connections and scheduler thread).
+    """
+    workers = getattr(settings, 'USER_BULK_HASH_WORKERS', None) or os.cpu_count() or 1
+    if workers == 1 or len(passwords) < POOL_THRESHOLD:
+        return [make_password(password) for password in passwords]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(make_password, passwords))
+
+
+def error_result(index, errors):
+    return {'index': index, 'status': 'error', 'errors': errors}
+
+
+def validate_rows(rows, serializer_class):
+    """Run the row serializer over every row; returns (valid (index, data) pairs, results list)."""
+    results = [None] * len(rows)
+    valid = []
+    for index, row in enumerate(rows):
+        serializer = serializer_class(data=row)
+        if serializer.is_valid():
+            valid.append((index, dict(serializer.validated_data)))
+        else:
+            results[index] = error_result(index, serializer.errors)
+    return valid, results
+
+
+def bulk_create_users(rows):
+    """
+    Create users from a list of row dicts in one transaction. Uniqueness and
+    role/branch references are checked with one query each for the whole
+    batch, and passwords are hashed in parallel. Invalid rows are skipped;
+    returns one result dict per input row, in input order.
+    """
+    valid, results = validate_rows(rows, BulkUserSerializer)
+
+    emails = [data['email'] for _, data in valid]
+    taken = set(CustomUser.objects.filter(email__in=emails).values_list('email', flat=True))
+    role_ids = set(
+        Role.objects.filter(id__in={data['role'] for _, data in valid if data['role']})
+        .values_list('id', flat=True)
+    )
+    branch_codes = set(
+        Branch.objects.filter(branchCode__in={data['branch'] for _, data in valid if data['branch']})
+        .values_list('branchCode', flat=True)
+    )
+
+    seen = set()
+    pending = []
+    for index, data in valid:
+        errors = {}
+        if data['email'] in taken:
+            errors['email'] = ['user with this email address already exists.']
+        elif data['email'] in seen:
+            errors['email'] = ['Duplicate email in this batch.']
+        if data['role'] and data['role'] not in role_ids:
+            errors['role'] = [f'Invalid pk "{data["role"]}" - object does not exist.']
+        if data['branch'] and data['branch'] not in branch_codes:
+            errors['branch'] = [f'Invalid pk "{data["branch"]}" - object does not exist.']
+        if errors:
+            results[index] = error_result(index, errors)
+            continue
+
+        seen.add(data['email'])
+        password = data.pop('password', None)
+        user = CustomUser(role_id=data.pop('role'), branch_id=data.pop('branch'), **data)
+        pending.append((index, user, password))
+
+    # Users without a password keep the blank one, as UserSerializer.create does
+    hashed = iter(hash_passwords([password for _, _, password in pending if password]))
+    for _, user, password in pending:
+        if password:
+            user.password = next(hashed)
+
+    with transaction.atomic():
+        CustomUser.objects.bulk_create([user for _, user, _ in pending], batch_size=500)
+
+    for index, user, _ in pending:
+        results[index] = {'index': index, 'status': 'created', 'id': str(user.id), 'email': user.email}
+    return results
+
+
+def bulk_assign_roles(rows):
+    """
+    Apply [{'user': id, 'role': id or None}, ...] with one bulk_update. The
+    later of two rows for the same user wins. users_auth_changed is sent
+    once for the changed users afterwards, so their token claims and cached
+    report scopes are invalidated for the whole batch at once.
+    """
+    valid, results = validate_rows(rows, BulkRoleAssignmentSerializer)
+
+    users = CustomUser.objects.in_bulk({data['user'] for _, data in valid})
+    role_ids = set(
+        Role.objects.filter(id__in={data['role'] for _, data in valid if data['role']})
+        .values_list('id', flat=True)
+    )
+
+    changed = {}
+    for index, data in valid:
+        errors = {}
+        user = users.get(data['user'])
+        if user is None:
+            errors['user'] = [f'Invalid pk "{data["user"]}" - object does not exist.']
+        if data['role'] and data['role'] not in role_ids:
+            errors['role'] = [f'Invalid pk "{data["role"]}" - object does not exist.']
+        if errors:
+            results[index] = error_result(index, errors)
+            continue
+
+        status = 'unchanged' if user.role_id == data['role'] else 'updated'
+        if status == 'updated':
+            user.role_id = data['role']
+            changed[user.pk] = user
+        results[index] = {'index': index, 'status': status, 'user': str(user.pk), 'role': data['role'] and str(data['role'])}
+
+    with transaction.atomic():
+        CustomUser.objects.bulk_update(list(changed.values()), ['role'], batch_size=500)
+
+    if changed:
+        users_auth_changed.send(sender=CustomUser, users=list(changed.values()))
+    return results
@@ -0,0 +1,153 @@
+# userManagement/revocation.py
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+REVOCATION_VERSION_KEY = 'userManagement:revocation_version'
+
+# Blacklist ids are allocated before commit, so concurrent revocations can
+# become visible out of id order. Incremental loads re-read this many ids
+# below the highest one seen; the periodic full reload is the backstop.
+INCREMENTAL_OVERLAP = 1000
+
+
+def revocation_version():
+    version = cache.get(REVOCATION_VERSION_KEY)
+    if version is None:
+        cache.add(REVOCATION_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(REVOCATION_VERSION_KEY)
+    return version
+
+
+def bump_revocation_version():
+    try:
+        cache.incr(REVOCATION_VERSION_KEY)
+    except ValueError:
+        revocation_version()
+
+
+class RevokedTokenSet:
+    """
+    Process-local set of blacklisted JTIs, so checking a refresh token that
+    was never revoked costs a set lookup instead of a blacklist query.
+
+    The set is topped up with newly blacklisted rows whenever the shared
+    revocation version moves, and at least every
+    TOKEN_REVOCATION_REFRESH_INTERVAL seconds for workers that do not share
+    a cache. It is rebuilt from the unexpired blacklist every
+    TOKEN_REVOCATION_FULL_RELOAD_INTERVAL seconds, which also drops JTIs of
+    expired tokens. Being a cache, the set may briefly miss a JTI revoked by
+    another worker; refresh rotation does not rely on it alone and only
+    succeeds for the request that inserts the token's blacklist row.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.jtis = frozenset()
+        self.max_id = 0
+        self.version = None
+        self.refreshed_at = 0.0
+        self.reloaded_at = 0.0
+
+    def refresh_interval(self):
+        return getattr(settings, 'TOKEN_REVOCATION_REFRESH_INTERVAL', 30)
+
+    def full_reload_interval(self):
+        return getattr(settings, 'TOKEN_REVOCATION_FULL_RELOAD_INTERVAL', 300)
+
+    def is_stale(self, version, now):
+        return version != self.version or now - self.refreshed_at > self.refresh_interval()
+
+    def load(self, version, now):
+        if now - self.reloaded_at > self.full_reload_interval():
+            rows = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+            jtis = set()
+            self.reloaded_at = now
+        else:
+            rows = BlacklistedToken.objects.filter(id__gt=self.max_id - INCREMENTAL_OVERLAP)
+            jtis = set(self.jtis)
+        for row_id, jti in rows.values_list('id', 'token__jti').iterator():
+            jtis.add(jti)
+            self.max_id = max(self.max_id, row_id)
+        self.jtis = frozenset(jtis)
+        self.version = version
+        self.refreshed_at = now
+
+    def is_revoked(self, jti):
+        version = revocation_version()
+        now = time.monotonic()
+        if self.is_stale(version, now):
+            with self.lock:
+                if self.is_stale(version, now):
+                    self.load(version, now)
+        return jti in self.jtis
+
+    def add(self, jti):
+        with self.lock:
+            self.jtis = self.jtis | {jti}
+
+    def clear(self):
+        with self.lock:
+            self.__init__()
+
+    def __len__(self):
+        return len(self.jtis)
+
+
+revoked_tokens = RevokedTokenSet()
+
+
+def is_revoked(jti):
+    return revoked_tokens.is_revoked(jti)
+
+
+def prune_expired_tokens(batch_size=None, now=None):
+    """
+    Delete expired outstanding tokens and their blacklist entries in batches
+    of batch_size, each in its own transaction so locks stay short. An expired
+    token is rejected on its `exp` claim alone, so its rows are dead weight.
+    Returns (outstanding_deleted, blacklisted_deleted).
+    """
+    batch_size = batch_size or getattr(settings, 'TOKEN_PRUNE_BATCH_SIZE', 5000)
+    now = now or timezone.now()
+    outstanding_deleted = blacklisted_deleted = 0
+    while True:
+        # Tokens share one lifetime, so expired rows sit at the low end of the id index
+        ids = list(
+            OutstandingToken.objects.filter(expires_at__lte=now)
+            .order_by('id')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        with transaction.atomic():
+            blacklisted_deleted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+            outstanding_deleted += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+    return outstanding_deleted, blacklisted_deleted
+
+
+def table_size(model):
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_total_relation_size(%s)", [model._meta.db_table])
+        return cursor.fetchone()[0]
+
+
+def token_table_metrics():
+    """Row counts and on-disk sizes (PostgreSQL only) of the token blacklist tables."""
+    now = timezone.now()
+    return {
+        'outstanding': OutstandingToken.objects.count(),
+        'outstanding_expired': OutstandingToken.objects.filter(expires_at__lte=now).count(),
+        'outstanding_bytes': table_size(OutstandingToken),
+        'blacklisted': BlacklistedToken.objects.count(),
+        'blacklisted_expired': BlacklistedToken.objects.filter(token__expires_at__lte=now).count(),
+        'blacklisted_bytes': table_size(BlacklistedToken),
+        'revoked_cache_size': len(revoked_tokens),
+    }
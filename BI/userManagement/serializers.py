@@ -1,5 +1,4 @@
 from rest_framework import serializers
-from django.contrib.auth import authenticate
 from django.contrib.auth.models import Permission as AuthPermission
 from .models import CustomUser, Role, AppPermission, Branch, Department
 
@@ -87,10 +86,10 @@ class UserSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         password = validated_data.pop('password', None)
-        user = CustomUser.objects.create(**validated_data)
+        user = CustomUser(**validated_data)
         if password:
             user.set_password(password)
-            user.save()
+        user.save()
         return user
 
     def update(self, instance, validated_data):
@@ -102,6 +101,28 @@ class UserSerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
+# -------------------- Bulk provisioning --------------------
+class BulkUserSerializer(serializers.Serializer):
+    """
+    One row of a bulk user import. Email uniqueness and the role/branch
+    references are checked for the whole batch at once by
+    provisioning.bulk_create_users, not per row.
+    """
+    email = serializers.EmailField()
+    first_name = serializers.CharField(max_length=30, required=False, allow_blank=True, default='')
+    last_name = serializers.CharField(max_length=30, required=False, allow_blank=True, default='')
+    password = serializers.CharField(write_only=True, required=False)
+    is_active = serializers.BooleanField(required=False, default=True)
+    is_staff = serializers.BooleanField(required=False, default=False)
+    role = serializers.UUIDField(required=False, allow_null=True, default=None)
+    branch = serializers.CharField(max_length=100, required=False, allow_null=True, default=None)
+
+
+class BulkRoleAssignmentSerializer(serializers.Serializer):
+    user = serializers.UUIDField()
+    role = serializers.UUIDField(allow_null=True)
+
+
 # -------------------- Login --------------------
 class LoginSerializer(serializers.Serializer):
     email = serializers.EmailField()
@@ -111,30 +132,20 @@ class LoginSerializer(serializers.Serializer):
         email = data.get('email')
         password = data.get('password')
 
-        if email and password:
-            # Authenticate with email
-            user = authenticate(
-                request=self.context.get('request'),
-                username=email,
-                password=password
-            )
-            if not user:
-                try:
-                    user = CustomUser.objects.get(email=email)
-                    if user.check_password(password):
-                        if not user.is_active:
-                            raise serializers.ValidationError('User account is disabled.')
-                        data['user'] = user
-                    else:
-                        raise serializers.ValidationError('Unable to log in with provided credentials.')
-                except CustomUser.DoesNotExist:
-                    raise serializers.ValidationError('Unable to log in with provided credentials.')
-            else:
-                if not user.is_active:
-                    raise serializers.ValidationError('User account is disabled.')
-                data['user'] = user
-        else:
+        if not (email and password):
             raise serializers.ValidationError('Must include "email" and "password".')
+
+        # Exactly one password hash per attempt: unknown emails hash against a
+        # throwaway user so they cost the same as a wrong password
+        user = CustomUser.objects.select_related('role').filter(email=email).first()
+        if user is None:
+            CustomUser().set_password(password)
+            raise serializers.ValidationError('Unable to log in with provided credentials.')
+        if not user.check_password(password):
+            raise serializers.ValidationError('Unable to log in with provided credentials.')
+        if not user.is_active:
+            raise serializers.ValidationError('User account is disabled.')
+        data['user'] = user
         return data
 
 # -------------------- Change Password --------------------
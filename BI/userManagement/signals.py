@@ -0,0 +1,88 @@
+# userManagement/signals.py
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_save
+from django.core.cache import cache
+from django.db import transaction
+from django.dispatch import Signal, receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .models import AppPermission, Branch, CustomUser, Role
+from .revocation import bump_revocation_version, revoked_tokens
+from .tokens import bump_permission_version, bump_user_versions, user_version_key
+
+# CustomUser fields whose change makes token permission claims stale
+AUTH_FIELDS = ('role_id', 'branch_id', 'is_active', 'is_staff', 'is_superuser')
+
+# Sent after a bulk update of AUTH_FIELDS, which sends no post_save.
+# Arguments: users (the updated CustomUser instances)
+users_auth_changed = Signal()
+
+
+def auth_state(user):
+    return tuple(user.__dict__.get(field) for field in AUTH_FIELDS)
+
+
+@receiver(post_init, sender=CustomUser)
+def remember_auth_state(sender, instance, **kwargs):
+    instance._auth_state = auth_state(instance)
+
+
+@receiver(post_save, sender=CustomUser)
+def user_auth_changed(sender, instance, created, **kwargs):
+    if not created and auth_state(instance) != instance._auth_state:
+        instance.auth_version = bump_user_versions([instance.pk])
+    instance._auth_state = auth_state(instance)
+
+
+@receiver(users_auth_changed)
+def users_bulk_changed(sender, users, **kwargs):
+    version = bump_user_versions([user.pk for user in users])
+    for user in users:
+        user.auth_version = version
+        user._auth_state = auth_state(user)
+
+
+@receiver(post_delete, sender=CustomUser)
+def user_deleted(sender, instance, **kwargs):
+    cache.delete(user_version_key(instance.pk))
+
+
+# Branch deletion nulls CustomUser.branch with a bare UPDATE (no signals),
+# so it invalidates everyone's claims like a role change does
+@receiver(post_delete, sender=Branch)
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+@receiver(post_save, sender=AppPermission)
+@receiver(post_delete, sender=AppPermission)
+def permissions_changed(sender, **kwargs):
+    bump_permission_version()
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+def role_permissions_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_permission_version()
+
+
+@receiver(m2m_changed, sender=CustomUser.user_permissions.through)
+def user_permissions_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        instance.auth_version = bump_user_versions([instance.pk])
+    elif pk_set:
+        bump_user_versions(pk_set)
+    else:
+        # Clearing a permission from every user: their ids are gone already
+        bump_permission_version()
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def token_blacklisted(sender, instance, created, **kwargs):
+    if created:
+        jti = instance.token.jti
+
+        def publish():
+            revoked_tokens.add(jti)
+            bump_revocation_version()
+
+        transaction.on_commit(publish)
@@ -1,3 +1,116 @@
-from django.test import TestCase
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import check_password
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+
+from BI.startup import ENTRY_POINTS, measure_startup, startup_budget
+
+from .authentication import ClaimsJWTAuthentication, ClaimsUser
+from .models import AppPermission, Branch, CustomUser, Role
+from .provisioning import bulk_assign_roles, hash_passwords
+from .tokens import ClaimsRefreshToken
+
+
+class StartupBudgetTests(SimpleTestCase):
+    """Cold-starts each entry point in a fresh interpreter (best of three)."""
+
+    def test_cold_start_within_budget(self):
+        budget = startup_budget()
+        if budget is None:
+            self.skipTest('STARTUP_BUDGET_SECONDS is not set')
+        for module in ENTRY_POINTS:
+            with self.subTest(module=module):
+                best = min((measure_startup(module) for _ in range(3)), key=lambda run: run['total'])
+                self.assertLessEqual(
+                    best['total'], budget,
+                    f"{module} took {best['total']:.2f}s to become ready "
+                    f"(app {best['ready']:.2f}s, URLconf {best['urlconf']:.2f}s); "
+                    f"run `manage.py profile_startup` to see the slowest imports"
+                )
+
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.branch = Branch.objects.create(branchCode='B01', branchName='Main')
+        self.other_branch = Branch.objects.create(branchCode='B02', branchName='North')
+        self.permission = AppPermission.objects.create(name='View reports', codename='view_reports')
+        self.role = Role.objects.create(name='Analyst')
+        self.role.permissions.add(self.permission)
+        self.user = CustomUser.objects.create_user('analyst@example.com', 'x', role=self.role, branch=self.branch)
+        self.other = CustomUser.objects.create_user('other@example.com', 'x', role=self.role, branch=self.branch)
+
+    def request_for(self, user):
+        access = ClaimsRefreshToken.for_user(user).access_token
+        return APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def principal(self, request):
+        return ClaimsJWTAuthentication().authenticate(request)[0]
+
+    def test_warm_auth_path_runs_no_queries(self):
+        request = self.request_for(self.user)
+        self.principal(request)
+        with self.assertNumQueries(0):
+            principal = self.principal(request)
+        self.assertIsInstance(principal, ClaimsUser)
+        self.assertTrue(principal.has_perm('view_reports'))
+        self.assertEqual(principal.branch_id, 'B01')
+
+    def test_other_users_change_keeps_claims(self):
+        request = self.request_for(self.user)
+        self.other.branch = self.other_branch
+        self.other.save()
+        self.assertIsInstance(self.principal(request), ClaimsUser)
+
+    def test_own_change_falls_back_to_user_row(self):
+        request = self.request_for(self.user)
+        self.user.branch = self.other_branch
+        self.user.save()
+        principal = self.principal(request)
+        self.assertIsInstance(principal, CustomUser)
+        self.assertEqual(principal.branch_id, 'B02')
+        self.assertIsInstance(self.principal(self.request_for(self.user)), ClaimsUser)
+
+    def test_user_permission_grant_falls_back_to_user_row(self):
+        request = self.request_for(self.user)
+        self.user.user_permissions.add(Permission.objects.first())
+        self.assertIsInstance(self.principal(request), CustomUser)
+
+    def test_role_change_falls_back_for_everyone(self):
+        request = self.request_for(self.other)
+        self.role.permissions.remove(self.permission)
+        self.assertIsInstance(self.principal(request), CustomUser)
+
+
+class BulkProvisioningTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.role = Role.objects.create(name='Analyst')
+        self.users = [CustomUser.objects.create_user(f'user{number}@example.com') for number in range(6)]
+
+    def test_role_assignment_invalidates_the_batch_at_once(self):
+        tokens = [ClaimsRefreshToken.for_user(user).access_token for user in self.users]
+        rows = [{'user': str(user.pk), 'role': str(self.role.pk)} for user in self.users]
+        # Users, roles, the bulk UPDATE in a savepoint and one auth_version
+        # UPDATE, whatever the batch size
+        with self.assertNumQueries(6):
+            results = bulk_assign_roles(rows)
+        self.assertEqual({result['status'] for result in results}, {'updated'})
+
+        authentication = ClaimsJWTAuthentication()
+        for access in tokens:
+            user = authentication.get_user(authentication.get_validated_token(str(access)))
+            self.assertIsInstance(user, CustomUser)
+            self.assertEqual(user.role_id, self.role.pk)
+
+    @override_settings(USER_BULK_HASH_WORKERS=4, PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+    def test_hashes_large_batches_in_threads(self):
+        passwords = [f'secret-{number}' for number in range(20)]
+        with mock.patch('userManagement.provisioning.ThreadPoolExecutor', wraps=ThreadPoolExecutor) as pool:
+            hashed = hash_passwords(passwords)
+        pool.assert_called_once_with(max_workers=4)
+        self.assertTrue(all(check_password(password, encoded) for password, encoded in zip(passwords, hashed)))
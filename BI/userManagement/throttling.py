@@ -0,0 +1,131 @@
+# userManagement/throttling.py
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+DEFAULT_LOGIN_THROTTLE_RATES = {
+    'ip': '30/min',
+    'email': '10/min',
+}
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'<requests>/<period>' in DRF throttle notation -> (requests, seconds)."""
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+class TokenBucket:
+    """capacity tokens, refilled continuously at capacity / period per second."""
+
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.refill_rate = capacity / period
+
+    def take(self, state, now):
+        """Consume one token from state (tokens, updated_at); returns (allowed, new_state, wait)."""
+        tokens, updated_at = state if state else (self.capacity, now)
+        tokens = min(self.capacity, tokens + (now - updated_at) * self.refill_rate)
+        if tokens >= 1:
+            return True, (tokens - 1, now), 0
+        return False, (tokens, now), (1 - tokens) / self.refill_rate
+
+
+class LocalBucketStore:
+    """Per-process buckets; idle (refilled) buckets are dropped once max_keys is reached."""
+
+    def __init__(self, max_keys=10000):
+        self.lock = threading.Lock()
+        self.states = {}
+        self.max_keys = max_keys
+
+    def take(self, key, bucket, now):
+        with self.lock:
+            allowed, state, wait = bucket.take(self.states.get(key), now)
+            self.states[key] = state
+            if len(self.states) > self.max_keys:
+                self.evict_idle(bucket, now)
+            return allowed, wait
+
+    def evict_idle(self, bucket, now):
+        full_after = bucket.capacity / bucket.refill_rate
+        self.states = {
+            key: state for key, state in self.states.items()
+            if now - state[1] < full_after
+        }
+
+    def clear(self):
+        with self.lock:
+            self.states.clear()
+
+
+class CacheBucketStore:
+    """Buckets kept in a Django cache so every worker shares them (best effort, not atomic)."""
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def take(self, key, bucket, now):
+        cache = caches[self.alias]
+        cache_key = f'userManagement:login_throttle:{key}'
+        allowed, state, wait = bucket.take(cache.get(cache_key), now)
+        cache.set(cache_key, state, int(bucket.capacity / bucket.refill_rate) + 1)
+        return allowed, wait
+
+    def clear(self):
+        pass
+
+
+local_buckets = LocalBucketStore()
+
+
+def bucket_store():
+    alias = getattr(settings, 'LOGIN_THROTTLE_CACHE', None)
+    return CacheBucketStore(alias) if alias else local_buckets
+
+
+class LoginThrottle(BaseThrottle):
+    """
+    Token bucket per client IP and per submitted email, checked before the
+    login serializer hashes anything. Rates come from LOGIN_THROTTLE_RATES
+    ({'ip': '30/min', 'email': '10/min'}); a rate of None disables that
+    bucket. Buckets live in process memory unless LOGIN_THROTTLE_CACHE names
+    a shared cache alias.
+    """
+
+    def get_rates(self):
+        rates = dict(DEFAULT_LOGIN_THROTTLE_RATES)
+        rates.update(getattr(settings, 'LOGIN_THROTTLE_RATES', {}))
+        return rates
+
+    def get_idents(self, request):
+        idents = {'ip': self.get_ident(request)}
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if isinstance(email, str) and email.strip():
+            idents['email'] = email.strip().lower()
+        return idents
+
+    def allow_request(self, request, view):
+        rates = self.get_rates()
+        store = bucket_store()
+        now = time.time()
+        self.wait_seconds = 0
+        allowed = True
+        for scope, ident in self.get_idents(request).items():
+            if not rates.get(scope):
+                continue
+            capacity, period = parse_rate(rates[scope])
+            scope_allowed, wait = store.take(f'{scope}:{ident}', TokenBucket(capacity, period), now)
+            if not scope_allowed:
+                allowed = False
+                self.wait_seconds = max(self.wait_seconds, wait)
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
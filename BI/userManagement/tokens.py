@@ -0,0 +1,116 @@
+# userManagement/tokens.py
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+PERMISSION_VERSION_KEY = 'userManagement:permission_version'
+PERMISSION_VERSION_CLAIM = 'perm_ver'
+USER_VERSION_CLAIM = 'user_ver'
+
+
+def version_ttl():
+    return getattr(settings, 'PERMISSION_VERSION_TTL', 5)
+
+
+def read_permission_version():
+    """
+    Role/permission version from the shared PermissionVersion row. The row
+    is seeded with a timestamp rather than 1, so tokens minted against an
+    earlier (since deleted) row can never match again.
+    """
+    from .models import PermissionVersion
+
+    version = PermissionVersion.objects.filter(pk=1).values_list('version', flat=True).first()
+    if version is None:
+        version = PermissionVersion.objects.get_or_create(
+            pk=1, defaults={'version': int(time.time() * 1000)}
+        )[0].version
+    return version
+
+
+def permission_version():
+    """
+    Current role/permission version, read through the cache for
+    PERMISSION_VERSION_TTL seconds so authentication does not query it per
+    request. A worker that read it just before a change keeps trusting
+    older claims for at most that long.
+    """
+    return cache.get_or_set(PERMISSION_VERSION_KEY, read_permission_version, version_ttl())
+
+
+def bump_permission_version():
+    from .models import PermissionVersion
+
+    if not PermissionVersion.objects.filter(pk=1).update(version=F('version') + 1):
+        read_permission_version()
+    cache.delete(PERMISSION_VERSION_KEY)
+
+
+def user_version_key(user_id):
+    return f'userManagement:user_version:{user_id}'
+
+
+def user_version(user_id):
+    """
+    auth_version of one user (None once deleted), read through the cache
+    for PERMISSION_VERSION_TTL seconds like permission_version().
+    """
+    from .models import CustomUser
+
+    return cache.get_or_set(
+        user_version_key(user_id),
+        lambda: CustomUser.objects.filter(pk=user_id).values_list('auth_version', flat=True).first(),
+        version_ttl()
+    )
+
+
+def bump_user_versions(user_ids):
+    """
+    Give the users a fresh auth_version with one UPDATE, so the claims of
+    their outstanding tokens stop being trusted. Returns the new version.
+    """
+    from .models import CustomUser
+
+    # Distinct from every earlier value, without reading the current one
+    version = time.time_ns() // 1000
+    CustomUser.objects.filter(pk__in=user_ids).update(auth_version=version)
+    cache.delete_many([user_version_key(user_id) for user_id in user_ids])
+    return version
+
+
+def user_permission_codenames(user):
+    return sorted({p.codename for p in user.get_all_permissions() if hasattr(p, 'codename')})
+
+
+def add_user_claims(token, user):
+    """Embed what request authorization needs so it can be served from the token."""
+    token['email'] = user.email
+    token['is_staff'] = user.is_staff
+    token['is_superuser'] = user.is_superuser
+    token['branch'] = user.branch_id
+    token['role'] = {'id': str(user.role.id), 'name': user.role.name} if user.role else None
+    token['perms'] = user_permission_codenames(user)
+    token[PERMISSION_VERSION_CLAIM] = permission_version()
+    token[USER_VERSION_CLAIM] = user.auth_version
+    return token
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token whose claims (and those of its access token) carry the user's role and permissions."""
+
+    @classmethod
+    def for_user(cls, user):
+        return add_user_claims(super().for_user(user), user)
+
+    def check_blacklist(self):
+        # Revoked JTIs are cached in-process; see revocation.RevokedTokenSet
+        from .revocation import is_revoked
+
+        if is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_('Token is blacklisted'))
@@ -2,19 +2,25 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
 from django.shortcuts import get_object_or_404
-from drf_yasg.utils import swagger_auto_schema
-from drf_yasg import openapi
+from BI.apidocs import swagger_auto_schema, openapi
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
 from django.conf import settings
+from django.db import IntegrityError
 from .models import CustomUser, Role, AppPermission, Branch, Department
 from .serializers import (
     UserSerializer, RoleSerializer, AppPermissionSerializer,
     LoginSerializer, ChangePasswordSerializer, UserRegistrationSerializer,
-    BranchSerializer, DepartmentSerializer
+    BranchSerializer, DepartmentSerializer, BulkUserSerializer,
+    BulkRoleAssignmentSerializer
 )
+from . import provisioning
+from .tokens import ClaimsRefreshToken
+from .authentication import ClaimsUser
+from .throttling import LoginThrottle
 from .permissions import (
     IsAdmin, IsOwnerOrAdmin, CanViewUsers, CanAddUsers, 
     CanChangeUsers, CanDeleteUsers, CanViewRoles, CanManageRoles,
@@ -30,15 +36,16 @@ class AuthViewSet(viewsets.ViewSet):
         request_body=LoginSerializer,
         responses={
             200: openapi.Response('Login successful', LoginSerializer),
-            400: 'Invalid credentials'
+            400: 'Invalid credentials',
+            429: 'Too many login attempts'
         }
     )
-    @action(detail=False, methods=['post'])
+    @action(detail=False, methods=['post'], throttle_classes=[LoginThrottle])
     def login(self, request):
         serializer = LoginSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
             user = serializer.validated_data['user']
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             return Response({
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
@@ -59,7 +66,7 @@ class AuthViewSet(viewsets.ViewSet):
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             return Response({
                 'refresh': str(refresh),
                 'access': str(refresh.access_token),
@@ -67,6 +74,42 @@ class AuthViewSet(viewsets.ViewSet):
             }, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    @swagger_auto_schema(
+        operation_description="Rotate a refresh token and re-issue tokens with current role and permission claims",
+        request_body=openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                'refresh': openapi.Schema(type=openapi.TYPE_STRING)
+            }
+        ),
+        responses={
+            200: 'New refresh and access tokens',
+            401: 'Invalid or expired token'
+        }
+    )
+    @action(detail=False, methods=['post'])
+    def refresh(self, request):
+        try:
+            old_refresh = ClaimsRefreshToken(request.data.get('refresh'))
+            user = CustomUser.objects.select_related('role').get(
+                **{api_settings.USER_ID_FIELD: old_refresh[api_settings.USER_ID_CLAIM]}
+            )
+        except (TokenError, KeyError, CustomUser.DoesNotExist):
+            return Response({'error': 'Invalid or expired refresh token'}, status=status.HTTP_401_UNAUTHORIZED)
+        if not user.is_active:
+            return Response({'error': 'User account is disabled.'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        # The in-process revoked set can lag other workers; the blacklist row is
+        # unique per token, so only the request that inserts it may rotate
+        _, created = old_refresh.blacklist()
+        if not created:
+            return Response({'error': 'Invalid or expired refresh token'}, status=status.HTTP_401_UNAUTHORIZED)
+        refresh = ClaimsRefreshToken.for_user(user)
+        return Response({
+            'refresh': str(refresh),
+            'access': str(refresh.access_token)
+        })
+
     @swagger_auto_schema(
         operation_description="User logout (blacklist refresh token)",
         request_body=openapi.Schema(
@@ -84,7 +127,7 @@ class AuthViewSet(viewsets.ViewSet):
     def logout(self, request):
         try:
             refresh_token = request.data.get('refresh')
-            token = RefreshToken(refresh_token)
+            token = ClaimsRefreshToken(refresh_token)
             token.blacklist()
             return Response(status=status.HTTP_205_RESET_CONTENT)
         except Exception as e:
@@ -96,7 +139,10 @@ class AuthViewSet(viewsets.ViewSet):
     )
     @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
     def me(self, request):
-        serializer = UserSerializer(request.user)
+        user = request.user
+        if isinstance(user, ClaimsUser):
+            user = user.get_user()
+        serializer = UserSerializer(user)
         return Response(serializer.data)
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -115,7 +161,9 @@ class UserViewSet(viewsets.ModelViewSet):
             return [AllowAny()]
         elif self.action in ['list', 'retrieve']:
             return [IsAuthenticated(), OrPermission(CanViewUsers, IsAdmin)]
-        elif self.action in ['update', 'partial_update']:
+        elif self.action == 'bulk_create':
+            return [IsAuthenticated(), OrPermission(CanAddUsers, IsAdmin)]
+        elif self.action in ['update', 'partial_update', 'bulk_assign_roles']:
             return [IsAuthenticated(), OrPermission(CanChangeUsers, IsAdmin)]
         elif self.action == 'destroy':
             return [IsAuthenticated(), OrPermission(CanDeleteUsers, IsAdmin)]
@@ -126,11 +174,73 @@ class UserViewSet(viewsets.ModelViewSet):
 
 
     def get_queryset(self):
+        if getattr(self, 'swagger_fake_view', False):
+            return CustomUser.objects.none()
         user = self.request.user
         if user.is_superuser or user.is_staff:
             return CustomUser.objects.all()
         return CustomUser.objects.filter(id=user.id)
 
+    def bulk_rows(self, request):
+        rows = request.data
+        if not isinstance(rows, list) or not rows:
+            return None, Response({'error': 'Expected a non-empty JSON array'}, status=status.HTTP_400_BAD_REQUEST)
+        max_rows = getattr(settings, 'USER_BULK_MAX_ROWS', 5000)
+        if len(rows) > max_rows:
+            return None, Response({'error': f'At most {max_rows} rows per request'}, status=status.HTTP_400_BAD_REQUEST)
+        return rows, None
+
+    def bulk_response(self, results, success_status):
+        failed = sum(1 for result in results if result['status'] == 'error')
+        if failed == len(results):
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif failed:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = success_status
+        return Response({
+            'total': len(results),
+            'failed': failed,
+            'results': results
+        }, status=response_status)
+
+    @swagger_auto_schema(
+        operation_description="Create many users in one transaction; returns one result per row in input order",
+        request_body=BulkUserSerializer(many=True),
+        responses={
+            201: 'All users created',
+            207: 'Some rows failed validation; the others were created',
+            400: 'No row could be created',
+            409: 'A conflicting user was created concurrently; nothing was created'
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='bulk-create')
+    def bulk_create(self, request):
+        rows, error = self.bulk_rows(request)
+        if error:
+            return error
+        try:
+            results = provisioning.bulk_create_users(rows)
+        except IntegrityError:
+            return Response({'error': 'A user in this batch was created concurrently; retry the import'}, status=status.HTTP_409_CONFLICT)
+        return self.bulk_response(results, status.HTTP_201_CREATED)
+
+    @swagger_auto_schema(
+        operation_description="Assign roles to many users at once (role null removes the role)",
+        request_body=BulkRoleAssignmentSerializer(many=True),
+        responses={
+            200: 'All assignments applied',
+            207: 'Some rows failed validation; the others were applied',
+            400: 'No assignment could be applied'
+        }
+    )
+    @action(detail=False, methods=['post'], url_path='bulk-assign-roles')
+    def bulk_assign_roles(self, request):
+        rows, error = self.bulk_rows(request)
+        if error:
+            return error
+        return self.bulk_response(provisioning.bulk_assign_roles(rows), status.HTTP_200_OK)
+
     @swagger_auto_schema(
         operation_description="Change user password",
         request_body=ChangePasswordSerializer,
@@ -282,7 +392,7 @@ class BranchViewSet(viewsets.ModelViewSet):
     serializer_class = BranchSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['branchCode', 'branchName']
-    filterset_fields = ['user']
+    filterset_fields = ['branchCode']
     ordering_fields = ['branchCode', 'branchName']
 
     def get_permissions(self):